@@ -1,28 +1,46 @@
-from flask import Flask, jsonify
+from flask import Flask, g, jsonify
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_jwt_extended import JWTManager
 from flask_cors import CORS
-from config import Config
+from config import get_config
+from .instrumentation import Instrumentation
+from .hashing import hasher, HashingOverloaded
+from .settings import engine_options, validate as validate_config
+from .pool import pool_monitor
+from .replica import RoutingSession, configure as configure_replica
 import logging
 
 # Set up basic logging
 logging.basicConfig(level=logging.DEBUG)
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 migrate = Migrate()
 jwt = JWTManager()
+metrics = Instrumentation()
 
-def create_app():
+# Define allowed origins for CORS (also used by the async handlers in app.asgi)
+CORS_ORIGINS = [
+    "https://phase4-project-group-09-school-n9do.onrender.com",  # Deployed frontend
+    "https://phase4-project-group-09-school-tmjg.onrender.com", # Second frontend URL
+    "http://localhost:5173",  # Local development
+    "http://localhost:5174"   # Added local development port
+]
+
+def create_app(config_class=None):
     app = Flask(__name__)
-    app.config.from_object(Config)
+    app.config.from_object(config_class or get_config())
+    validate_config(app.config)
+    app.config.setdefault("SQLALCHEMY_ENGINE_OPTIONS", engine_options(app.config))
+    configure_replica(app)
 
     db.init_app(app)
+    hasher.init_app(app)
     migrate.init_app(app, db)
     jwt.init_app(app)
 
     # Import models so they register with SQLAlchemy metadata
-    from .models import User, Class, Enrollment, Grade  # noqa: F401
+    from .models import User, Class, Enrollment, Grade, GradeStat, ActivityEvent  # noqa: F401
 
     # Register blueprints
     from .routes.auth import auth_bp
@@ -31,6 +49,9 @@ def create_app():
     from .routes.enrollments import enrollments_bp
     from .routes.grades import grades_bp
     from .routes.dashboard import dashboard_bp
+    from .routes.exports import exports_bp
+    from .routes.imports import imports_bp
+    from .routes.transcripts import transcripts_bp
 
     app.register_blueprint(auth_bp, url_prefix="/api/auth")
     app.register_blueprint(users_bp, url_prefix="/api/users")
@@ -38,17 +59,41 @@ def create_app():
     app.register_blueprint(enrollments_bp, url_prefix="/api/enrollments")
     app.register_blueprint(grades_bp, url_prefix="/api/grades")
     app.register_blueprint(dashboard_bp, url_prefix="/api/dashboard")
+    app.register_blueprint(exports_bp, url_prefix="/api/exports")
+    app.register_blueprint(imports_bp, url_prefix="/api/imports")
+    app.register_blueprint(transcripts_bp, url_prefix="/api/transcripts")
+
+    from .commands import register_commands
+    register_commands(app)
+
+    from .principals import configure as configure_principals
+    configure_principals(app)
+
+    from .cache import response_cache
+    response_cache.init_app(app)
+
+    from .activity import configure as configure_activity
+    configure_activity(app)
+
+    from .registration import registrar
+    registrar.init_app(app)
 
-    # Define allowed origins for CORS
-    origins = [
-        "https://phase4-project-group-09-school-n9do.onrender.com",  # Deployed frontend
-        "https://phase4-project-group-09-school-tmjg.onrender.com", # Second frontend URL
-        "http://localhost:5173",  # Local development
-        "http://localhost:5174"   # Added local development port
-    ]
+    from .analytics import analytics
+    analytics.init_app(app)
+
+    from .transcripts import service as transcript_service
+    transcript_service.init_app(app)
 
     # Initialize CORS after blueprints are registered
-    CORS(app, resources={r"/api/*": {"origins": origins}}, supports_credentials=True, automatic_options=True)
+    CORS(app, resources={r"/api/*": {"origins": CORS_ORIGINS}}, supports_credentials=True, automatic_options=True)
+
+    @app.before_request
+    def reset_request_state():
+        # g outlives the request when an app context was already pushed
+        # (tests, CLI), so drop what role_required and app.replica read from it
+        g.pop("_jwt_extended_jwt", None)
+        g.pop("_read_replica", None)
+        g.pop("_sticky_token", None)
 
     @app.route("/")
     def homepage():
@@ -58,6 +103,10 @@ def create_app():
     def health():
         return {"status": "ok"}, 200
 
+    @app.errorhandler(HashingOverloaded)
+    def hashing_overloaded(err):
+        return jsonify({"msg": "Server is busy, please retry shortly"}), 503, {"Retry-After": "1"}
+
     @jwt.expired_token_loader
     def expired_callback(jwt_header, jwt_payload):
         return jsonify({"msg": "Token has expired"}), 401
@@ -70,6 +119,11 @@ def create_app():
     def missing_token_callback(err):
         return jsonify({"msg": "Missing authorization token"}), 401
 
+    pool_monitor.init_app(app)
+
+    # Last, so every registered view gets wrapped
+    metrics.init_app(app)
+
     return app
 if __name__ == "__main__":
     app = create_app()
@@ -0,0 +1,155 @@
+"""Activity feed: an append-only log table with a per-process ring buffer.
+
+Write routes call record() before they commit, so an event lands in the
+same transaction as the change it describes. After the commit the event
+is also pushed into the process's ring buffer. The response-cache
+version of "activity" is bumped too, so other workers know their buffer
+is behind and reload it.
+
+feed() answers from the buffer when it is current and covers the page,
+and otherwise with one indexed read of activity_events.
+"""
+import threading
+from collections import deque
+from datetime import datetime
+
+from flask import g, has_request_context
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import event
+
+from . import db, queries
+from .cache import response_cache
+from .models import ActivityEvent
+from .replica import RoutingSession, use_primary
+
+TABLES = ("activity",)
+
+
+def record(kind, description, subject_id=None, actor_id=None):
+    """Add an event to the current transaction."""
+    if actor_id is None and has_request_context() and g.get("_jwt_extended_jwt"):
+        actor_id = get_jwt_identity()
+    activity = ActivityEvent(kind=kind, description=description[:255], subject_id=subject_id,
+                             actor_id=actor_id, created_at=datetime.utcnow())
+    db.session.add(activity)
+    db.session.info.setdefault("activity_pending", []).append(activity)
+    return activity
+
+
+def parse_cursor(value):
+    """Turn "<iso timestamp>" or "<iso timestamp>,<id>" into a (created_at, id) key.
+
+    Raises ValueError for anything else.
+    """
+    timestamp, _, event_id = value.partition(",")
+    created_at = datetime.fromisoformat(timestamp.replace("Z", "+00:00")).replace(tzinfo=None)
+    return (created_at, int(event_id)) if event_id else (created_at, 0)
+
+
+def cursor(item):
+    return f"{item['created_at'].isoformat()},{item['id']}"
+
+
+def _key(item):
+    return (item["created_at"], item["id"])
+
+
+class ActivityBuffer:
+    def __init__(self, maxlen=200):
+        self._lock = threading.Lock()
+        self.resize(maxlen)
+
+    def resize(self, maxlen):
+        with self._lock:
+            self.maxlen = maxlen
+            self._events = deque(maxlen=maxlen)  # oldest first
+            self._version = None
+            # True when the buffer holds every event in the table
+            self._complete = False
+
+    def is_current(self, version):
+        return self._version == version
+
+    def page(self, version, limit, before=None):
+        """Events newest first, or None when the buffer cannot answer."""
+        with self._lock:
+            if version != self._version:
+                return None
+            page = []
+            for item in reversed(self._events):
+                if before is None or _key(item) < before:
+                    page.append(item)
+                    if len(page) == limit:
+                        return page
+            return page if self._complete else None
+
+    def load(self, version, rows):
+        with self._lock:
+            self._events = deque(reversed(rows), maxlen=self.maxlen)
+            self._version = version
+            self._complete = len(rows) < self.maxlen
+
+    def append(self, items, old_version, new_version):
+        with self._lock:
+            if self._version != old_version or new_version != (old_version[0] + 1,):
+                # Another process wrote in between; reload on the next read
+                self._version = None
+                return
+            for item in sorted(items, key=_key):
+                if len(self._events) == self.maxlen:
+                    self._complete = False
+                self._events.append(item)
+            self._version = new_version
+
+    def clear(self):
+        self.resize(self.maxlen)
+
+
+buffer = ActivityBuffer()
+
+
+def configure(app):
+    buffer.resize(app.config.get("ACTIVITY_BUFFER_SIZE", buffer.maxlen))
+
+
+def _select(limit, before=None):
+    return queries.rows_to_activity(db.session.execute(queries.activity_stmt(limit, before)).all())
+
+
+def feed(limit=20, before=None):
+    """Newest events first, strictly older than the before key if given."""
+    version = response_cache.backend.versions(TABLES)
+    page = buffer.page(version, limit, before)
+    if page is None and not buffer.is_current(version):
+        # The buffer is kept under this version until the next write, so it must not lag
+        with use_primary():
+            buffer.load(version, _select(buffer.maxlen))
+        page = buffer.page(version, limit, before)
+    if page is None:
+        page = _select(limit, before)
+    return page
+
+
+@event.listens_for(RoutingSession, "after_flush_postexec")
+def _capture_ids(session, flush_context):
+    pending = session.info.get("activity_pending")
+    if pending:
+        flushed = session.info.setdefault("activity_flushed", [])
+        flushed += [queries.activity_item(a.id, a.created_at, a.kind, a.actor_id, a.subject_id,
+                                          a.description) for a in pending if a.id is not None]
+        session.info["activity_pending"] = [a for a in pending if a.id is None]
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _publish(session):
+    items = session.info.pop("activity_flushed", None)
+    if items:
+        old_version = response_cache.backend.versions(TABLES)
+        response_cache.bump(*TABLES)
+        buffer.append(items, old_version, response_cache.backend.versions(TABLES))
+
+
+@event.listens_for(RoutingSession, "after_rollback")
+def _discard(session):
+    session.info.pop("activity_pending", None)
+    session.info.pop("activity_flushed", None)
@@ -0,0 +1,223 @@
+"""Grade distributions per class: histogram, percentiles, spread, rank and z-scores.
+
+A student's score in a class is the mean of their grades there, read
+from the grade_stats rollup, so a whole term comes back in one query.
+The statistics of every class in a result are computed together: with
+NumPy the scores are sorted once by (class, score) and each statistic
+is a segmented reduction over that array. Without NumPy the same
+numbers come from plain Python, one class at a time.
+
+Results are cached per process by (class, term). An entry is served
+only while classes.grade_version, which app.grade_stats bumps on every
+grade write, still matches the version it was computed at.
+"""
+import math
+from itertools import chain
+
+from sqlalchemy import select
+
+from . import db
+from .cache import MemoryBackend
+from .models import Class, Enrollment, GradeStat
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+PERCENTILES = (10, 25, 50, 75, 90)
+# Histogram bins split this range evenly; scores outside it land in the end bins
+SCORE_RANGE = (0.0, 100.0)
+
+
+def _empty(bins):
+    return {
+        "count": 0, "mean": None, "std": None, "min": None, "max": None,
+        "percentiles": {f"p{p}": None for p in PERCENTILES},
+        "histogram": [0] * bins,
+        "students": [],
+    }
+
+
+def _bin(score, bins):
+    low, high = SCORE_RANGE
+    return min(max(int((score - low) // ((high - low) / bins)), 0), bins - 1)
+
+
+def _percentile(ordered, p):
+    # Linear interpolation between the closest ranks, like numpy.percentile
+    position = (len(ordered) - 1) * (p / 100)
+    low, high = math.floor(position), math.ceil(position)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+
+def _python_stats(rows, bins):
+    by_class = {}
+    for class_id, student_id, score in rows:
+        by_class.setdefault(class_id, []).append((score, -student_id))
+    results = {}
+    for class_id, pairs in by_class.items():
+        pairs.sort()
+        scores = [score for score, _ in pairs]
+        n = len(scores)
+        mean = sum(scores) / n
+        std = math.sqrt(sum((s - mean) * (s - mean) for s in scores) / n)
+        histogram = [0] * bins
+        for s in scores:
+            histogram[_bin(s, bins)] += 1
+        students, higher = [], 0
+        for i, (score, student_id) in enumerate(reversed(pairs)):
+            if i and score != students[-1][1]:
+                higher = i
+            students.append((-student_id, score, higher + 1, (score - mean) / std if std > 0 else None))
+        results[class_id] = {
+            "count": n, "mean": mean, "std": std, "min": scores[0], "max": scores[-1],
+            "percentiles": {f"p{p}": _percentile(scores, p) for p in PERCENTILES},
+            "histogram": histogram,
+            "students": students,
+        }
+    return results
+
+
+def _numpy_stats(rows, bins):
+    if not rows:
+        return {}
+    # Much faster than unzipping the rows into columns first
+    table = np.fromiter(chain.from_iterable(rows), float, count=len(rows) * 3).reshape(-1, 3)
+    class_ids, student_ids, scores = table[:, 0].astype(int), table[:, 1].astype(int), table[:, 2]
+    order = np.lexsort((-student_ids, scores, class_ids))
+    class_ids, student_ids, scores = class_ids[order], student_ids[order], scores[order]
+
+    starts = np.flatnonzero(np.r_[True, class_ids[1:] != class_ids[:-1]])
+    ends = np.r_[starts[1:], len(scores)]
+    counts = ends - starts
+    group = np.repeat(np.arange(len(starts)), counts)
+    means = np.add.reduceat(scores, starts) / counts
+    deviations = scores - means[group]
+    stds = np.sqrt(np.add.reduceat(deviations * deviations, starts) / counts)
+
+    percentiles = {}
+    for p in PERCENTILES:
+        position = (counts - 1) * (p / 100)
+        low, high = np.floor(position).astype(int), np.ceil(position).astype(int)
+        below, above = scores[starts + low], scores[starts + high]
+        percentiles[f"p{p}"] = (below + (above - below) * (position - low)).tolist()
+
+    low, high = SCORE_RANGE
+    cells = np.clip(((scores - low) // ((high - low) / bins)).astype(int), 0, bins - 1)
+    histograms = np.bincount(group * bins + cells, minlength=len(starts) * bins).reshape(-1, bins)
+
+    # Rank is 1 + the number of strictly higher scores in the class; ties share it
+    run_starts = np.r_[True, (class_ids[1:] != class_ids[:-1]) | (scores[1:] != scores[:-1])]
+    run_ends = np.r_[np.flatnonzero(run_starts)[1:], len(scores)]
+    ranks = ends[group] - run_ends[np.cumsum(run_starts) - 1] + 1
+    spread = stds[group]
+    z_scores = np.divide(deviations, spread, out=np.full_like(deviations, np.nan), where=spread > 0)
+
+    students = list(zip(student_ids.tolist(), scores.tolist(), ranks.tolist(),
+                        [None if math.isnan(z) else z for z in z_scores.tolist()]))
+    results = {}
+    for g, (class_id, start, end) in enumerate(zip(class_ids[starts].tolist(), starts.tolist(), ends.tolist())):
+        results[class_id] = {
+            "count": end - start, "mean": means[g].item(), "std": stds[g].item(),
+            "min": scores[start].item(), "max": scores[end - 1].item(),
+            "percentiles": {name: values[g] for name, values in percentiles.items()},
+            "histogram": histograms[g].tolist(),
+            "students": students[start:end][::-1],
+        }
+    return results
+
+
+def compute(rows, class_ids, bins=10, use_numpy=None):
+    """Statistics for each of class_ids from (class_id, student_id, score) rows.
+
+    Students are listed best first, as (student_id, score, rank, z_score)
+    tuples; z_score is None when every score in the class is the same.
+    """
+    if use_numpy is None:
+        use_numpy = np is not None
+    results = (_numpy_stats if use_numpy else _python_stats)(rows, bins)
+    return {class_id: results.get(class_id) or _empty(bins) for class_id in class_ids}
+
+
+def _scores():
+    return select(GradeStat.class_id, GradeStat.student_id, GradeStat.score_sum / GradeStat.score_count)
+
+
+class GradeAnalytics:
+    def __init__(self):
+        self.cache = MemoryBackend(20000)
+        self.bins = 10
+        self.use_numpy = np is not None
+
+    def init_app(self, app):
+        self.cache = MemoryBackend(app.config.get("ANALYTICS_CACHE_SIZE", 20000))
+        self.bins = app.config.get("ANALYTICS_HISTOGRAM_BINS", 10)
+        self.use_numpy = np is not None and app.config.get("ANALYTICS_USE_NUMPY", True)
+
+    def edges(self):
+        low, high = SCORE_RANGE
+        return [low + (high - low) * i / self.bins for i in range(self.bins + 1)]
+
+    def for_class(self, class_id):
+        """Statistics over every graded enrollment of a class, or None if it does not exist."""
+        version = db.session.execute(select(Class.grade_version).where(Class.id == class_id)).scalar()
+        if version is None:
+            return None
+        return self._stats({class_id: version}, _scores().where(GradeStat.class_id == class_id), None)[class_id]
+
+    def for_term(self, semester, academic_year, teacher_id=None):
+        """{class_id: statistics} for the classes with enrollments in a term."""
+        in_term = (Enrollment.semester == semester, Enrollment.academic_year == academic_year)
+        classes = select(Class.id, Class.grade_version).where(
+            Class.id.in_(select(Enrollment.class_id).where(*in_term))
+        ).order_by(Class.id)
+        query = _scores().join(Enrollment, Enrollment.id == GradeStat.enrollment_id).where(*in_term)
+        if teacher_id is not None:
+            classes = classes.where(Class.teacher_id == teacher_id)
+            query = query.where(GradeStat.class_id.in_(select(Class.id).where(Class.teacher_id == teacher_id)))
+        versions = dict(db.session.execute(classes).all())
+        return self._stats(versions, query, (semester, academic_year))
+
+    def _stats(self, versions, query, term):
+        results, stale = {}, []
+        for class_id, version in versions.items():
+            entry = self.cache.get((class_id, term))
+            if entry is not None and entry["version"] == version:
+                results[class_id] = entry["stats"]
+            else:
+                stale.append(class_id)
+        if stale:
+            if len(stale) < len(versions):
+                query = query.where(GradeStat.class_id.in_(stale))
+            # The versions were read first, so these rows are at least that new. Core
+            # execution skips the ORM's per-row processing, which matters for a term
+            rows = db.session.connection().execute(query).all()
+            fresh = compute(rows, stale, self.bins, self.use_numpy)
+            for class_id in stale:
+                self.cache.set((class_id, term), {"version": versions[class_id], "stats": fresh[class_id]})
+                results[class_id] = fresh[class_id]
+        return results
+
+
+analytics = GradeAnalytics()
+
+
+def _round(value):
+    return None if value is None else round(value, 4)
+
+
+def to_dict(class_id, stats, include_students=True):
+    data = {
+        "class_id": class_id,
+        "count": stats["count"],
+        **{key: _round(stats[key]) for key in ("mean", "std", "min", "max")},
+        "percentiles": {name: _round(value) for name, value in stats["percentiles"].items()},
+        "histogram": stats["histogram"],
+    }
+    if include_students:
+        data["students"] = [
+            {"student_id": student_id, "score": _round(score), "rank": rank, "z_score": _round(z)}
+            for student_id, score, rank, z in stats["students"]
+        ]
+    return data
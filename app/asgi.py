@@ -0,0 +1,197 @@
+"""ASGI entry point with natively async read endpoints.
+
+The read-heavy GET endpoints below are served on an async SQLAlchemy
+engine (aiosqlite / asyncpg), so one worker can keep many of them in
+flight while the database works. They run the same statements and
+payload builders as the Flask routes (app.queries). Every other request
+goes to the Flask app through asgiref's WsgiToAsgi adapter.
+
+    gunicorn -k uvicorn.workers.UvicornWorker asgi:app
+
+The async handlers do not go through the response cache or the
+Server-Timing instrumentation of the Flask app. With a read replica
+configured they read from it the same way as the Flask routes.
+"""
+import time
+
+import jwt as pyjwt
+from asgiref.wsgi import WsgiToAsgi
+from flask_jwt_extended import decode_token
+from flask_jwt_extended.exceptions import JWTExtendedException
+from sqlalchemy import select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+from werkzeug.http import parse_cookie
+
+from . import create_app, queries, CORS_ORIGINS
+from .models import User, Role
+from .principals import principals, Principal
+from .replica import STICKY_COOKIE, sticky
+from .serializers import dumps
+from .settings import engine_options
+
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def async_database_url(url):
+    """Map a sync SQLAlchemy URL onto the matching async driver."""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver for {backend} databases")
+    return url.set(drivername=ASYNC_DRIVERS[backend])
+
+
+def _async_engine(config, uri):
+    options = engine_options({**config, "SQLALCHEMY_DATABASE_URI": uri}, async_driver=True)
+    return create_async_engine(async_database_url(uri), **options)
+
+
+class AuthError(Exception):
+    def __init__(self, status, msg):
+        super().__init__(msg)
+        self.status = status
+        self.msg = msg
+
+
+async def dashboard_summary(conn, identity):
+    totals = (await conn.execute(queries.summary_stmt())).one()
+    recent = queries.rows_to_activity((await conn.execute(queries.activity_stmt(5))).all())
+    return queries.build_summary(totals, recent)
+
+
+async def teacher_summary(conn, identity):
+    rows = (await conn.execute(queries.teacher_summary_stmt(identity))).all()
+    return queries.build_teacher_summary(rows)
+
+
+async def student_summary(conn, identity):
+    rows = (await conn.execute(queries.student_summary_stmt(identity))).all()
+    return queries.build_student_summary(rows)
+
+
+async def class_options(conn, identity):
+    rows = (await conn.execute(queries.class_options_stmt())).all()
+    return queries.build_class_options(rows)
+
+
+async def student_options(conn, identity):
+    rows = (await conn.execute(queries.user_options_stmt(Role.student))).all()
+    return queries.build_student_options(rows)
+
+
+async def teacher_options(conn, identity):
+    rows = (await conn.execute(queries.user_options_stmt(Role.teacher))).all()
+    return queries.build_teacher_options(rows)
+
+
+async def me(conn, identity):
+    principal = principals.get(identity)
+    if principal is None:
+        row = (await conn.execute(
+            select(User.id, User.name, User.email, User.role, User.created_at).where(User.id == identity)
+        )).first()
+        if row is None:
+            return 404, {"msg": "User not found"}
+        principal = Principal(*row)
+        principals.put(principal)
+    return principal.to_dict()
+
+
+# path -> (handler, allowed roles or None for any authenticated user)
+ROUTES = {
+    "/api/dashboard/summary": (dashboard_summary, None),
+    "/api/dashboard/teacher-summary": (teacher_summary, ("teacher",)),
+    "/api/dashboard/student-summary": (student_summary, ("student",)),
+    "/api/classes/options": (class_options, ("admin",)),
+    "/api/users/students": (student_options, ("admin",)),
+    "/api/users/teachers": (teacher_options, ("admin",)),
+    "/api/users/me": (me, None),
+}
+
+
+class AsyncApp:
+    def __init__(self, flask_app, engine=None):
+        self.flask_app = flask_app
+        self.wsgi = WsgiToAsgi(flask_app)
+        config = flask_app.config
+        self.engine = engine or _async_engine(config, config["SQLALCHEMY_DATABASE_URI"])
+        replica_uri = config.get("SQLALCHEMY_REPLICA_URI")
+        # Same routing as app.replica: the replica unless the caller just wrote
+        self.replica_engine = _async_engine(config, replica_uri) if replica_uri else None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            return await self._lifespan(receive, send)
+        if scope["type"] == "http" and scope["method"] == "GET":
+            route = ROUTES.get(scope["path"].rstrip("/"))
+            if route:
+                return await self._serve(route, scope, send)
+        await self.wsgi(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.engine.dispose()
+                if self.replica_engine is not None:
+                    await self.replica_engine.dispose()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    def _authenticate(self, headers, roles):
+        """Return the JWT identity, mirroring jwt_required and role_required."""
+        auth = headers.get(b"authorization", b"").decode()
+        if not auth.startswith("Bearer "):
+            raise AuthError(401, "Missing authorization token")
+        try:
+            with self.flask_app.app_context():
+                claims = decode_token(auth[len("Bearer "):])
+        except pyjwt.ExpiredSignatureError:
+            raise AuthError(401, "Token has expired")
+        except (pyjwt.InvalidTokenError, JWTExtendedException):
+            raise AuthError(401, "Invalid token")
+        if claims.get("type") != "access":
+            raise AuthError(401, "Invalid token")
+        if roles and claims.get("role") not in roles:
+            raise AuthError(403, "Forbidden: insufficient role")
+        return int(claims[self.flask_app.config["JWT_IDENTITY_CLAIM"]])
+
+    async def _serve(self, route, scope, send):
+        started = time.perf_counter()
+        handler, roles = route
+        headers = dict(scope["headers"])
+        try:
+            identity = self._authenticate(headers, roles)
+            engine = self.engine
+            cookies = parse_cookie(headers.get(b"cookie", b"").decode("latin-1"))
+            if self.replica_engine is not None and not sticky.active(identity, cookies.get(STICKY_COOKIE)):
+                engine = self.replica_engine
+            async with engine.connect() as conn:
+                result = await handler(conn, identity)
+            status, payload = result if isinstance(result, tuple) else (200, result)
+        except AuthError as e:
+            status, payload = e.status, {"msg": e.msg}
+
+        body = dumps(payload)
+        response_headers = [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"server-timing", f"total;dur={(time.perf_counter() - started) * 1000:.2f}".encode()),
+        ]
+        origin = headers.get(b"origin")
+        if origin and origin.decode() in CORS_ORIGINS:
+            response_headers += [(b"access-control-allow-origin", origin),
+                                 (b"access-control-allow-credentials", b"true"),
+                                 (b"vary", b"Origin")]
+        await send({"type": "http.response.start", "status": status, "headers": response_headers})
+        await send({"type": "http.response.body", "body": body})
+
+
+def create_asgi_app(config_class=None):
+    return AsyncApp(create_app(config_class))
@@ -0,0 +1,214 @@
+"""Response cache with strong ETags for read-mostly GET endpoints.
+
+Cached views name the tables they read; write views name the tables they
+change. Every table has a version counter in the backend, and a cached
+entry is only served while the versions it was built from are current,
+so a hit (and a 304 for a matching If-None-Match) never touches the
+database.
+
+Backends: "memory" (per process, the default) and "file", an SQLite file
+shared by every gunicorn worker on the host (RESPONSE_CACHE_PATH). A write
+only bumps the versions of the worker that served it, so memory entries
+expire after RESPONSE_CACHE_TTL seconds to bound how long the others keep
+serving the old response. Both backends hold at most RESPONSE_CACHE_SIZE
+entries and drop them after RESPONSE_CACHE_TTL.
+"""
+import hashlib
+import json
+import math
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, make_response, request
+from flask_jwt_extended import get_jwt
+
+from .replica import use_primary
+
+
+class MemoryBackend:
+    def __init__(self, maxsize=1024, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._versions = {}
+
+    def versions(self, tables):
+        with self._lock:
+            return tuple(self._versions.get(t, 0) for t in tables)
+
+    def bump(self, tables):
+        with self._lock:
+            for t in tables:
+                self._versions[t] = self._versions.get(t, 0) + 1
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            entry, expires = item
+            if expires is not None and expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry):
+        with self._lock:
+            self._entries[key] = (entry, None if self.ttl is None else time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+
+class FileBackend:
+    """SQLite-file backend shared by all processes that point at the same path.
+
+    Entries are kept in insertion order: each set() drops expired rows and
+    the oldest ones beyond maxsize.
+    """
+
+    def __init__(self, path, maxsize=1024, ttl=None):
+        self.path = path
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._local = threading.local()
+        conn = self._connect()
+        conn.execute("CREATE TABLE IF NOT EXISTS versions (name TEXT PRIMARY KEY, version INTEGER NOT NULL)")
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(entries)")]
+        if columns and "stored_at" not in columns:
+            # A file from before entries were bounded; its entries are disposable
+            conn.execute("DROP TABLE entries")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries "
+            "(key TEXT PRIMARY KEY, versions TEXT, etag TEXT, body BLOB, mimetype TEXT, stored_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_entries_stored_at ON entries (stored_at)")
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def versions(self, tables):
+        rows = dict(self._connect().execute(
+            f"SELECT name, version FROM versions WHERE name IN ({','.join('?' * len(tables))})",
+            tables,
+        ))
+        return tuple(rows.get(t, 0) for t in tables)
+
+    def bump(self, tables):
+        conn = self._connect()
+        conn.executemany(
+            "INSERT INTO versions (name, version) VALUES (?, 1) "
+            "ON CONFLICT(name) DO UPDATE SET version = version + 1",
+            [(t,) for t in tables],
+        )
+
+    def _oldest_fresh(self):
+        return -math.inf if self.ttl is None else time.time() - self.ttl
+
+    def get(self, key):
+        row = self._connect().execute(
+            "SELECT versions, etag, body, mimetype FROM entries WHERE key = ? AND stored_at >= ?",
+            (key, self._oldest_fresh()),
+        ).fetchone()
+        if row is None:
+            return None
+        return {"versions": tuple(json.loads(row[0])), "etag": row[1], "body": row[2], "mimetype": row[3]}
+
+    def set(self, key, entry):
+        conn = self._connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO entries (key, versions, etag, body, mimetype, stored_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (key, json.dumps(entry["versions"]), entry["etag"], entry["body"], entry["mimetype"], time.time()),
+        )
+        conn.execute("DELETE FROM entries WHERE stored_at < ?", (self._oldest_fresh(),))
+        conn.execute(
+            "DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY stored_at DESC LIMIT -1 OFFSET ?)",
+            (self.maxsize,),
+        )
+
+
+class ResponseCache:
+    def __init__(self):
+        self.backend = MemoryBackend()
+        self.enabled = True
+
+    def init_app(self, app):
+        self.enabled = app.config.get("RESPONSE_CACHE_ENABLED", True)
+        kind = app.config.get("RESPONSE_CACHE_BACKEND", "memory")
+        size, ttl = app.config.get("RESPONSE_CACHE_SIZE", 1024), app.config.get("RESPONSE_CACHE_TTL") or None
+        if kind == "memory":
+            self.backend = MemoryBackend(size, ttl)
+        elif kind == "file":
+            self.backend = FileBackend(app.config["RESPONSE_CACHE_PATH"], size, ttl)
+        else:
+            raise ValueError(f"Unknown RESPONSE_CACHE_BACKEND: {kind}")
+
+    def bump(self, *tables):
+        self.backend.bump(tables)
+
+
+response_cache = ResponseCache()
+
+
+def _cache_key():
+    args = "&".join(f"{k}={v}" for k, v in sorted(request.args.items(multi=True)))
+    return f"{request.path}|{get_jwt().get('role')}|{args}"
+
+
+def cached(*tables):
+    """Serve a GET view from the response cache while `tables` are unchanged.
+
+    Must sit below @jwt_required()/@role_required so the role is known.
+    """
+    def wrapper(fn):
+        @wraps(fn)
+        def decorator(*args, **kwargs):
+            if not response_cache.enabled or request.method != "GET":
+                return fn(*args, **kwargs)
+            backend = response_cache.backend
+            key = _cache_key()
+            versions = backend.versions(tables)
+            entry = backend.get(key)
+            if entry is None or entry["versions"] != versions:
+                # A lagging replica could store stale data under the new versions
+                with use_primary():
+                    response = make_response(fn(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                body = response.get_data()
+                entry = {
+                    "versions": versions,
+                    "etag": hashlib.sha256(body).hexdigest()[:32],
+                    "body": body,
+                    "mimetype": response.mimetype,
+                }
+                backend.set(key, entry)
+            else:
+                response = current_app.response_class(entry["body"], mimetype=entry["mimetype"])
+            response.set_etag(entry["etag"])
+            return response.make_conditional(request)
+        return decorator
+    return wrapper
+
+
+def invalidates(*tables):
+    """Bump the version of `tables` after the view returns a 2xx response."""
+    def wrapper(fn):
+        @wraps(fn)
+        def decorator(*args, **kwargs):
+            response = make_response(fn(*args, **kwargs))
+            if 200 <= response.status_code < 300:
+                response_cache.bump(*tables)
+            return response
+        return decorator
+    return wrapper
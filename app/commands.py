@@ -0,0 +1,144 @@
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import click
+from flask import current_app
+from flask.cli import AppGroup, with_appcontext
+from . import db, grade_stats, rosters, waitlist
+from .cache import response_cache
+from .export import FORMATS, export_gradebook, gzip_chunks, ndjson_chunks
+from .transcripts import service as transcript_service
+from .importer import IMPORTERS, FORMATS as IMPORT_FORMATS, ImportFormatError, parse, run_import
+
+grade_stats_cli = AppGroup("grade-stats", help="Maintain the grade_stats rollup table.")
+
+
+@grade_stats_cli.command("rebuild")
+def rebuild_grade_stats():
+    """Backfill grade_stats from the grades table."""
+    rows = grade_stats.rebuild()
+    click.echo(f"Rebuilt grade_stats: {rows} enrollments")
+
+
+@grade_stats_cli.command("check")
+@click.option("--fix", is_flag=True, help="Recompute the rows that drifted.")
+def check_grade_stats(fix):
+    """Report enrollments whose rollup disagrees with their grades."""
+    drifted = grade_stats.find_drift()
+    click.echo(f"{len(drifted)} enrollments drifted")
+    if drifted and fix:
+        grade_stats.refresh(drifted)
+        db.session.commit()
+        click.echo("Drifted rows recomputed")
+
+
+roster_counts_cli = AppGroup("roster-counts", help="Maintain the per-class enrollment counters.")
+
+
+@roster_counts_cli.command("rebuild")
+def rebuild_roster_counts():
+    """Recount every class from the enrollments table and renumber the waitlists."""
+    rosters.refresh()
+    waitlist.rebuild()
+    db.session.commit()
+    click.echo("Rebuilt enrollment counters and waitlists")
+
+
+@roster_counts_cli.command("check")
+@click.option("--fix", is_flag=True, help="Recount the classes that drifted.")
+def check_roster_counts(fix):
+    """Report classes whose counters disagree with their enrollments."""
+    drifted = rosters.find_drift()
+    click.echo(f"{len(drifted)} classes drifted")
+    if drifted and fix:
+        rosters.refresh(drifted)
+        db.session.commit()
+        click.echo("Drifted classes recounted")
+
+
+export_cli = AppGroup("export", help="Export data as NDJSON or CSV.")
+
+
+@export_cli.command("gradebook")
+@click.option("--class-id", type=int, help="Only this class.")
+@click.option("--academic-year", help="Only this academic year, e.g. 2024/2025.")
+@click.option("--format", "fmt", type=click.Choice(list(FORMATS)), default="ndjson")
+@click.option("--gzip", "compress", is_flag=True, help="Gzip the output.")
+@click.option("--output", "-o", type=click.Path(dir_okay=False), help="Write here instead of stdout.")
+def export_gradebook_command(class_id, academic_year, fmt, compress, output):
+    """Stream a gradebook: one class, one academic year or the whole school."""
+    chunks = export_gradebook(fmt, class_id, academic_year, compress,
+                              current_app.config.get("EXPORT_BATCH_SIZE", 1000))
+    out = open(output, "wb") if output else click.get_binary_stream("stdout")
+    try:
+        for chunk in chunks:
+            out.write(chunk)
+    finally:
+        if output:
+            out.close()
+
+
+@export_cli.command("transcripts")
+@click.option("--academic-year", help="Only students enrolled in this academic year, e.g. 2024/2025.")
+@click.option("--scale", help="Grading scale; defaults to TRANSCRIPT_GRADING_SCALE.")
+@click.option("--gzip", "compress", is_flag=True, help="Gzip the output.")
+@click.option("--output", "-o", type=click.Path(dir_okay=False), help="Write here instead of stdout.")
+def export_transcripts_command(academic_year, scale, compress, output):
+    """Stream one NDJSON transcript per student, for an academic year's cohort or the whole school."""
+    if scale is not None and scale not in transcript_service.scales:
+        raise click.BadParameter(f"must be one of: {', '.join(transcript_service.scales)}", param_hint="--scale")
+    chunks = ndjson_chunks(transcript_service.cohort(academic_year, scale,
+                                                     current_app.config.get("EXPORT_BATCH_SIZE", 1000)))
+    if compress:
+        chunks = gzip_chunks(chunks)
+    out = open(output, "wb") if output else click.get_binary_stream("stdout")
+    try:
+        for chunk in chunks:
+            out.write(chunk)
+    finally:
+        if output:
+            out.close()
+
+
+@click.command("import")
+@with_appcontext
+@click.argument("kind", type=click.Choice(list(IMPORTERS)))
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--format", "fmt", type=click.Choice(IMPORT_FORMATS), help="Defaults to the file extension.")
+@click.option("--chunk-size", type=int, help="Rows validated per batch of lookups.")
+@click.option("--transaction-size", type=int, help="Rows per commit.")
+@click.option("--hash-workers", type=int, default=os.cpu_count(), show_default=True,
+              help="Processes hashing passwords.")
+@click.option("--dry-run", is_flag=True, help="Validate only; write nothing.")
+@click.option("--report", type=click.Path(dir_okay=False), help="Write the full JSON report here.")
+def import_command(kind, path, fmt, chunk_size, transaction_size, hash_workers, dry_run, report):
+    """Bulk-create users, classes or enrollments from a CSV, JSON or NDJSON file."""
+    config = current_app.config
+    fmt = fmt or os.path.splitext(path)[1].lstrip(".").lower()
+    started = time.perf_counter()
+    with open(path, "rb") as f, ProcessPoolExecutor(max(1, hash_workers)) as executor:
+        try:
+            result = run_import(kind, parse(f, fmt),
+                                chunk_size=chunk_size or config["IMPORT_CHUNK_SIZE"],
+                                transaction_size=transaction_size or config["IMPORT_TRANSACTION_SIZE"],
+                                dry_run=dry_run, executor=executor, max_errors=config["IMPORT_MAX_ERRORS"])
+        except ImportFormatError as e:
+            raise click.ClickException(str(e))
+    if result.created:
+        response_cache.bump(*IMPORTERS[kind].tables)
+    click.echo(f"{result.rows} rows: {result.created} created, {result.failed} failed "
+               f"in {time.perf_counter() - started:.1f}s")
+    for error in result.errors[:20]:
+        click.echo(f"  row {error['row']}: {'; '.join(error['errors'])}", err=True)
+    if report:
+        with open(report, "w") as out:
+            json.dump(result.to_dict(), out, indent=2)
+
+
+def register_commands(app):
+    app.cli.add_command(grade_stats_cli)
+    app.cli.add_command(roster_counts_cli)
+    app.cli.add_command(export_cli)
+    app.cli.add_command(import_command)
@@ -1,9 +1,2 @@
-import os
-
-class Config:
-    SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL", "sqlite:///SMS.db")
-    SQLALCHEMY_TRACK_MODIFICATIONS = False
-    JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "dev-secret-change-me")
-    JWT_ACCESS_TOKEN_EXPIRES = 3600  # 1 hour
-    
-    MAX_CONTENT_LENGTH = 16 * 1024 * 1024
+# The settings live in the root config.py; this module only keeps old imports working
+from config import Config, DevelopmentConfig, ProductionConfig, TestingConfig, get_config  # noqa: F401
@@ -0,0 +1,67 @@
+import pytest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+
+from config import TestingConfig
+from app import create_app, db
+from app.models import User, Class, Enrollment, Grade, Role, Semester
+from app.principals import principals
+
+
+@pytest.fixture
+def app():
+    app = create_app(TestingConfig)
+    principals.clear()
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def auth_headers(app):
+    """Return a function building Authorization headers for a user."""
+    def make(user):
+        token = create_access_token(identity=user.id, additional_claims={"role": user.role.value})
+        return {"Authorization": f"Bearer {token}"}
+    return make
+
+
+@pytest.fixture
+def statements(app):
+    """Collect every SQL statement sent to the engine while the test runs."""
+    seen = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        seen.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", record)
+    yield seen
+    event.remove(db.engine, "before_cursor_execute", record)
+
+
+def make_user(name, role=Role.student, email=None):
+    user = User(name=name, email=email or f"{name.lower().replace(' ', '.')}@test.local", role=role)
+    # A real hash is slow and irrelevant for these tests
+    user.password_hash = "x"
+    db.session.add(user)
+    return user
+
+
+def make_class(name, teacher):
+    cls = Class(name=name, description="", teacher=teacher)
+    db.session.add(cls)
+    return cls
+
+
+def enroll(student, cls, scores=(), academic_year="2024/2025", semester=Semester.first_semester):
+    enrollment = Enrollment(student=student, class_=cls, semester=semester, academic_year=academic_year)
+    enrollment.grades = [Grade(score=s) for s in scores]
+    db.session.add(enrollment)
+    return enrollment
@@ -0,0 +1,160 @@
+"""Incremental maintenance of the grade_stats rollup table.
+
+Every write to Grade should go through one of the helpers below so that
+count/sum/sum-of-squares stay in step without rescanning the grades
+table. Min and max cannot be maintained incrementally when a score is
+replaced, so those are recomputed from the enrollment's own grades, which
+is a lookup on grades.enrollment_id rather than a table scan. Deleted
+grades go through refresh().
+
+Each helper also bumps classes.grade_version of the classes it touched,
+which is what app.analytics keys its cached statistics on, and marks the
+students' transcripts stale (app.transcripts).
+"""
+from sqlalchemy import case, delete, func, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from . import db, transcripts
+from .models import Class, Enrollment, Grade, GradeStat
+
+
+def _fresh_stats(enrollment_ids=None):
+    query = (
+        select(
+            Enrollment.id,
+            Enrollment.class_id,
+            Enrollment.student_id,
+            func.count(Grade.id),
+            func.sum(Grade.score),
+            func.sum(Grade.score * Grade.score),
+            func.min(Grade.score),
+            func.max(Grade.score),
+        )
+        .join(Grade, Grade.enrollment_id == Enrollment.id)
+        .group_by(Enrollment.id, Enrollment.class_id, Enrollment.student_id)
+    )
+    if enrollment_ids is not None:
+        query = query.where(Enrollment.id.in_(enrollment_ids))
+    return query
+
+
+def _bound(fn, enrollment_id):
+    return select(fn(Grade.score)).where(Grade.enrollment_id == enrollment_id).scalar_subquery()
+
+
+def _update(enrollment_id, **values):
+    stmt = (
+        update(GradeStat)
+        .where(GradeStat.enrollment_id == enrollment_id)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    return db.session.execute(stmt).rowcount
+
+
+def touch(class_ids):
+    """Mark the grades of these classes (ids or a subquery) as changed."""
+    db.session.execute(
+        update(Class)
+        .where(Class.id.in_(class_ids))
+        .values(grade_version=Class.grade_version + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def grade_added(enrollment, score):
+    db.session.flush()
+    touch([enrollment.class_id])
+    transcripts.touch([enrollment.student_id])
+    # One upsert, so two first grades for an enrollment cannot both insert its row
+    insert = postgresql.insert if db.engine.dialect.name == "postgresql" else sqlite.insert
+    db.session.execute(
+        insert(GradeStat)
+        .values(
+            enrollment_id=enrollment.id,
+            class_id=enrollment.class_id,
+            student_id=enrollment.student_id,
+            score_count=1,
+            score_sum=score,
+            score_sum_sq=score * score,
+            score_min=score,
+            score_max=score,
+        )
+        .on_conflict_do_update(
+            index_elements=[GradeStat.enrollment_id],
+            set_={
+                "score_count": GradeStat.score_count + 1,
+                "score_sum": GradeStat.score_sum + score,
+                "score_sum_sq": GradeStat.score_sum_sq + score * score,
+                "score_min": case((GradeStat.score_min <= score, GradeStat.score_min), else_=score),
+                "score_max": case((GradeStat.score_max >= score, GradeStat.score_max), else_=score),
+            },
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def grade_changed(enrollment, old_score, new_score):
+    if old_score == new_score:
+        return
+    db.session.flush()
+    touch([enrollment.class_id])
+    transcripts.touch([enrollment.student_id])
+    _update(
+        enrollment.id,
+        score_sum=GradeStat.score_sum + (new_score - old_score),
+        score_sum_sq=GradeStat.score_sum_sq + (new_score * new_score - old_score * old_score),
+        score_min=_bound(func.min, enrollment.id),
+        score_max=_bound(func.max, enrollment.id),
+    )
+
+
+def _columns():
+    return [
+        GradeStat.enrollment_id, GradeStat.class_id, GradeStat.student_id,
+        GradeStat.score_count, GradeStat.score_sum, GradeStat.score_sum_sq,
+        GradeStat.score_min, GradeStat.score_max,
+    ]
+
+
+def refresh(enrollment_ids):
+    """Recompute the rollup rows of the given enrollments in two statements."""
+    enrollment_ids = list(enrollment_ids)
+    if not enrollment_ids:
+        return
+    db.session.flush()
+    touch(select(Enrollment.class_id).where(Enrollment.id.in_(enrollment_ids)))
+    transcripts.touch(select(Enrollment.student_id).where(Enrollment.id.in_(enrollment_ids)))
+    db.session.execute(
+        delete(GradeStat)
+        .where(GradeStat.enrollment_id.in_(enrollment_ids))
+        .execution_options(synchronize_session=False)
+    )
+    db.session.execute(insert(GradeStat).from_select(_columns(), _fresh_stats(enrollment_ids)))
+
+
+def rebuild():
+    """Recompute the whole rollup table from grades. Returns the row count."""
+    db.session.execute(delete(GradeStat))
+    db.session.execute(insert(GradeStat).from_select(_columns(), _fresh_stats()))
+    db.session.execute(update(Class).values(grade_version=Class.grade_version + 1))
+    transcripts.touch_all()
+    db.session.commit()
+    return db.session.query(func.count(GradeStat.enrollment_id)).scalar()
+
+
+def find_drift(tolerance=1e-6):
+    """Return the ids of enrollments whose rollup row disagrees with grades."""
+    fresh = {row[0]: row[3:] for row in db.session.execute(_fresh_stats())}
+    stored = {
+        row[0]: row[3:]
+        for row in db.session.execute(select(*_columns()))
+    }
+    drifted = []
+    for enrollment_id in fresh.keys() | stored.keys():
+        a, b = fresh.get(enrollment_id), stored.get(enrollment_id)
+        if a is None or b is None or any(
+            (x is None) != (y is None) or (x is not None and abs(x - y) > tolerance)
+            for x, y in zip(a, b)
+        ):
+            drifted.append(enrollment_id)
+    return sorted(drifted)
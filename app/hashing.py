@@ -0,0 +1,116 @@
+"""Password hashing on a bounded process pool.
+
+Hashing is CPU-bound, so a login storm would otherwise pin every request
+thread. Calls are admitted through a semaphore sized to the pool plus a
+short queue; anything beyond that fails fast with HashingOverloaded,
+which create_app turns into a 503 with Retry-After, as does a hash that
+is still queued after HASH_RESULT_TIMEOUT seconds. With
+HASH_POOL_WORKERS = 0 hashing runs inline in the request thread.
+"""
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from itertools import repeat
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+class HashingOverloaded(Exception):
+    pass
+
+
+class PasswordHasher:
+    def __init__(self):
+        self.method = "scrypt"
+        self.workers = 0
+        self.queue_limit = 0
+        self.admission_timeout = 0
+        self.result_timeout = 30
+        self._pool = None
+        self._pool_pid = None
+        self._prefix = None
+        self._slots = threading.BoundedSemaphore(1)
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.method = app.config.get("HASH_METHOD", "scrypt")
+        self.workers = app.config.get("HASH_POOL_WORKERS", 0)
+        self.queue_limit = app.config.get("HASH_QUEUE_LIMIT", 32)
+        self.admission_timeout = app.config.get("HASH_ADMISSION_TIMEOUT", 0)
+        self.result_timeout = app.config.get("HASH_RESULT_TIMEOUT", 30)
+        self._prefix = None
+        self._slots = threading.BoundedSemaphore(max(1, self.workers) + self.queue_limit)
+        self._shutdown_pool()
+
+    def _shutdown_pool(self):
+        if self._pool is not None and self._pool_pid == os.getpid():
+            self._pool.shutdown(wait=False)
+        self._pool = None
+
+    def _get_pool(self):
+        # Created lazily, and again after a fork (gunicorn preload), so each
+        # worker process owns its pool
+        with self._lock:
+            if self._pool is None or self._pool_pid != os.getpid():
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+                self._pool_pid = os.getpid()
+            return self._pool
+
+    def _admit(self):
+        if self.admission_timeout:
+            return self._slots.acquire(timeout=self.admission_timeout)
+        return self._slots.acquire(blocking=False)
+
+    def _run(self, fn, *args):
+        if not self._admit():
+            raise HashingOverloaded()
+        try:
+            if not self.workers:
+                return fn(*args)
+            return self._get_pool().submit(fn, *args).result(timeout=self.result_timeout)
+        except TimeoutError:
+            raise HashingOverloaded()
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def hash_many(self, passwords, executor=None):
+        """Hash a list in parallel, on executor or else the shared pool.
+
+        The whole list takes one admission slot. On the shared pool it is
+        submitted one worker's worth at a time, so a login arriving
+        mid-import waits behind at most that many hashes.
+        """
+        if not self._admit():
+            raise HashingOverloaded()
+        try:
+            if executor is not None:
+                return list(executor.map(generate_password_hash, passwords,
+                                         repeat(self.method), chunksize=8))
+            if not self.workers:
+                return [generate_password_hash(p, self.method) for p in passwords]
+            pool, hashes = self._get_pool(), []
+            for start in range(0, len(passwords), self.workers):
+                futures = [pool.submit(generate_password_hash, p, self.method)
+                           for p in passwords[start:start + self.workers]]
+                hashes.extend(f.result(timeout=self.result_timeout) for f in futures)
+            return hashes
+        except TimeoutError:
+            raise HashingOverloaded()
+        finally:
+            self._slots.release()
+
+    def verify(self, pwhash, password):
+        return self._run(check_password_hash, pwhash, password)
+
+    def needs_rehash(self, pwhash):
+        """True when pwhash was made with other parameters than HASH_METHOD."""
+        if self._prefix is None:
+            # "scrypt" expands to e.g. "scrypt:32768:8:1"; learn the full form once
+            self._prefix = generate_password_hash("", self.method).split("$", 1)[0]
+        return pwhash.split("$", 1)[0] != self._prefix
+
+
+hasher = PasswordHasher()
@@ -0,0 +1,364 @@
+"""Bulk import of users, classes and enrollments from CSV, JSON or NDJSON.
+
+Rows are validated IMPORT_CHUNK_SIZE at a time. Each chunk resolves the
+emails and ids it mentions with one query per kind, hashes its passwords
+in parallel, and is inserted with one executemany. A transaction is
+committed every IMPORT_TRANSACTION_SIZE rows. Rows that fail validation
+are reported by row number and skipped. If a transaction hits a conflict
+written concurrently, its rows are replayed one at a time so only the
+conflicting ones fail.
+"""
+import csv
+import io
+import json
+from abc import ABC, abstractmethod
+from datetime import datetime
+from itertools import islice
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from . import activity, db, rosters, transcripts, waitlist
+from .hashing import hasher
+from .models import User, Class, Enrollment, Role, EnrollmentStatus, Semester
+
+FORMATS = ("csv", "json", "ndjson")
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+class InvalidRow:
+    def __init__(self, message):
+        self.message = message
+
+
+def parse(stream, fmt):
+    """Yield one value per input row from a binary stream."""
+    if fmt not in FORMATS:
+        raise ImportFormatError(f"format must be one of: {', '.join(FORMATS)}")
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    if fmt == "csv":
+        yield from csv.DictReader(text)
+    elif fmt == "ndjson":
+        for line in text:
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError as e:
+                yield InvalidRow(f"invalid JSON: {e}")
+    else:
+        try:
+            data = json.load(text)
+        except ValueError as e:
+            raise ImportFormatError(f"invalid JSON: {e}")
+        if not isinstance(data, list):
+            raise ImportFormatError("JSON input must be an array of objects")
+        yield from data
+
+
+class ImportReport:
+    def __init__(self, kind, max_errors=1000):
+        self.kind = kind
+        self.max_errors = max_errors
+        self.rows = 0
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+
+    def fail(self, row, *messages):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"row": row, "errors": list(messages)})
+
+    def to_dict(self):
+        return {
+            "kind": self.kind,
+            "rows": self.rows,
+            "created": self.created,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+
+def _clean(row):
+    """Strip every value to a string, with blanks as missing (CSV has no nulls)."""
+    cleaned = {}
+    for key, value in row.items():
+        if key and value is not None:
+            cleaned[key] = str(value).strip() or None
+    return cleaned
+
+
+def _int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _enum(enum, value, default=None):
+    if value is None:
+        return default
+    return enum._value2member_map_.get(value)
+
+
+class Importer(ABC):
+    model = None
+    # Response-cache tables to bump after rows are created
+    tables = ()
+
+    def __init__(self, executor=None):
+        self.executor = executor
+        # Key -> first row number, to report duplicates within the input
+        self.seen = {}
+
+    @abstractmethod
+    def prepare(self, chunk, report, hash_passwords=True):
+        """Validate (row number, row) pairs; return (row number, values) to insert."""
+
+    def finish(self):
+        """Called after the last commit of a run that created rows."""
+
+
+class UserImporter(Importer):
+    model = User
+    tables = ("users",)
+
+    def prepare(self, chunk, report, hash_passwords=True):
+        emails = [row["email"] for _, row in chunk if row.get("email")]
+        existing = set(db.session.scalars(select(User.email).where(User.email.in_(emails))))
+        ready = []
+        for n, row in chunk:
+            errors = [f"{field} is required" for field in ("name", "email", "password") if not row.get(field)]
+            email = row.get("email")
+            role = _enum(Role, row.get("role"), Role.student)
+            if email and "@" not in email:
+                errors.append("invalid email")
+            if role is None:
+                errors.append(f"invalid role: {row['role']}")
+            if email in self.seen:
+                errors.append(f"duplicate email (row {self.seen[email]})")
+            elif email in existing:
+                errors.append("email already exists")
+            if errors:
+                report.fail(n, *errors)
+                continue
+            self.seen[email] = n
+            ready.append((n, {"name": row["name"], "email": email, "role": role,
+                              "password_hash": row["password"], "created_at": datetime.utcnow()}))
+
+        if hash_passwords and ready:
+            hashes = hasher.hash_many([values["password_hash"] for _, values in ready], self.executor)
+            for (_, values), pwhash in zip(ready, hashes):
+                values["password_hash"] = pwhash
+        return ready
+
+
+def _users_by(column, values):
+    if not values:
+        return {}
+    rows = db.session.execute(select(column, User.id, User.role).where(column.in_(values)))
+    return {key: (uid, role) for key, uid, role in rows}
+
+
+def _resolve_user(row, prefix, by_email, by_id, role):
+    """Return (user_id, error) for row[prefix_email] or row[prefix_id]."""
+    email, raw_id = row.get(f"{prefix}_email"), row.get(f"{prefix}_id")
+    if email:
+        found = by_email.get(email)
+        label = email
+    elif raw_id is not None:
+        if _int(raw_id) is None:
+            return None, f"{prefix}_id must be an integer"
+        found = by_id.get(_int(raw_id))
+        label = f"id {raw_id}"
+    else:
+        return None, None
+    if found is None:
+        return None, f"{prefix} {label} not found"
+    if found[1] != role:
+        return None, f"{prefix} {label} is not a {role.value}"
+    return found[0], None
+
+
+def _lookup_users(chunk, prefix):
+    emails = {row[f"{prefix}_email"] for _, row in chunk if row.get(f"{prefix}_email")}
+    ids = {_int(row.get(f"{prefix}_id")) for _, row in chunk} - {None}
+    return _users_by(User.email, emails), _users_by(User.id, ids)
+
+
+class ClassImporter(Importer):
+    model = Class
+    tables = ("classes",)
+
+    def prepare(self, chunk, report, hash_passwords=True):
+        by_email, by_id = _lookup_users(chunk, "teacher")
+        ready = []
+        for n, row in chunk:
+            errors = [] if row.get("name") else ["name is required"]
+            teacher_id, error = _resolve_user(row, "teacher", by_email, by_id, Role.teacher)
+            if error:
+                errors.append(error)
+            if errors:
+                report.fail(n, *errors)
+                continue
+            ready.append((n, {"name": row["name"], "description": row.get("description") or "",
+                              "teacher_id": teacher_id}))
+        return ready
+
+
+class EnrollmentImporter(Importer):
+    model = Enrollment
+    tables = ("enrollments",)
+
+    def prepare(self, chunk, report, hash_passwords=True):
+        by_email, by_id = _lookup_users(chunk, "student")
+        class_ids = {_int(row.get("class_id")) for _, row in chunk} - {None}
+        known_classes = set(db.session.scalars(select(Class.id).where(Class.id.in_(class_ids))))
+
+        resolved = []
+        for n, row in chunk:
+            errors = []
+            student_id, error = _resolve_user(row, "student", by_email, by_id, Role.student)
+            if error or student_id is None:
+                errors.append(error or "student_email or student_id is required")
+            class_id = _int(row.get("class_id"))
+            if class_id is None:
+                errors.append("class_id must be an integer" if row.get("class_id") else "class_id is required")
+            elif class_id not in known_classes:
+                errors.append(f"class {class_id} not found")
+            semester = _enum(Semester, row.get("semester"))
+            if semester is None:
+                errors.append("semester is required" if not row.get("semester")
+                              else f"invalid semester: {row['semester']}")
+            if not row.get("academic_year"):
+                errors.append("academic_year is required")
+            status = _enum(EnrollmentStatus, row.get("status"), EnrollmentStatus.active)
+            if status is None:
+                errors.append(f"invalid status: {row['status']}")
+            enrollment_date = datetime.utcnow()
+            if row.get("enrollment_date"):
+                try:
+                    enrollment_date = datetime.fromisoformat(row["enrollment_date"].replace("Z", "+00:00"))
+                except ValueError:
+                    errors.append("invalid enrollment_date")
+            if errors:
+                report.fail(n, *errors)
+                continue
+            resolved.append((n, {"student_id": student_id, "class_id": class_id, "status": status,
+                                 "semester": semester, "academic_year": row["academic_year"],
+                                 "enrollment_date": enrollment_date}))
+
+        pairs = {(v["student_id"], v["class_id"]) for _, v in resolved}
+        existing = set()
+        if pairs:
+            existing = set(db.session.execute(
+                select(Enrollment.student_id, Enrollment.class_id).where(
+                    Enrollment.student_id.in_({s for s, _ in pairs}),
+                    Enrollment.class_id.in_({c for _, c in pairs}),
+                )
+            ).tuples())
+        ready = []
+        for n, values in resolved:
+            pair = (values["student_id"], values["class_id"])
+            if pair in self.seen:
+                report.fail(n, f"duplicate enrollment (row {self.seen[pair]})")
+            elif pair in existing:
+                report.fail(n, "student is already enrolled in this class")
+            else:
+                self.seen[pair] = n
+                ready.append((n, values))
+        return ready
+
+    def finish(self):
+        # Bulk inserts skip the per-row counter updates (and capacity), so recount once
+        class_ids = {class_id for _, class_id in self.seen}
+        rosters.refresh(class_ids)
+        waitlist.rebuild(class_ids)
+        transcripts.touch(select(Enrollment.student_id).where(Enrollment.class_id.in_(class_ids)))
+
+
+IMPORTERS = {"users": UserImporter, "classes": ClassImporter, "enrollments": EnrollmentImporter}
+
+
+class _Writer:
+    """Insert prepared rows, committing every transaction_size rows."""
+
+    def __init__(self, model, transaction_size, report):
+        self.table = model.__table__
+        self.transaction_size = transaction_size
+        self.report = report
+        self.pending = []
+
+    def add(self, ready):
+        try:
+            db.session.execute(self.table.insert(), [values for _, values in ready])
+        except IntegrityError:
+            return self._replay(self.pending + ready)
+        self.pending += ready
+        if len(self.pending) >= self.transaction_size:
+            self.commit()
+
+    def commit(self):
+        try:
+            db.session.commit()
+        except IntegrityError:
+            return self._replay(self.pending)
+        self.report.created += len(self.pending)
+        self.pending = []
+
+    def _replay(self, rows):
+        # Someone else wrote a conflicting row since the lookups; find which rows clash
+        db.session.rollback()
+        self.pending = []
+        for n, values in rows:
+            try:
+                db.session.execute(self.table.insert(), values)
+                db.session.commit()
+                self.report.created += 1
+            except IntegrityError:
+                db.session.rollback()
+                self.report.fail(n, "conflicts with an existing row")
+
+
+def run_import(kind, rows, chunk_size=1000, transaction_size=5000, dry_run=False,
+               executor=None, max_errors=1000):
+    """Validate and insert rows of kind. Returns an ImportReport.
+
+    With dry_run nothing is written and passwords are not hashed.
+    """
+    importer = IMPORTERS[kind](executor)
+    report = ImportReport(kind, max_errors)
+    writer = _Writer(importer.model, max(transaction_size, 1), report)
+    numbered = enumerate(rows, 1)
+    while True:
+        chunk = list(islice(numbered, chunk_size))
+        if not chunk:
+            break
+        report.rows += len(chunk)
+        valid = []
+        for n, row in chunk:
+            if isinstance(row, InvalidRow):
+                report.fail(n, row.message)
+            elif not isinstance(row, dict):
+                report.fail(n, "row must be an object")
+            else:
+                valid.append((n, _clean(row)))
+        ready = importer.prepare(valid, report, hash_passwords=not dry_run)
+        if ready and not dry_run:
+            writer.add(ready)
+
+    if dry_run:
+        db.session.rollback()
+    else:
+        writer.commit()
+        if report.created:
+            importer.finish()
+            activity.record("import.completed", f"Imported {report.created} {kind} ({report.failed} failed)")
+            db.session.commit()
+    report.errors.sort(key=lambda e: e["row"])
+    return report
@@ -0,0 +1,142 @@
+"""Opt-in per-endpoint query count and latency instrumentation.
+
+Enabled with INSTRUMENTATION_ENABLED. When it is off, init_app returns
+before registering any hook, so there is no per-request or per-query cost.
+"""
+import bisect
+import logging
+import threading
+import time
+from functools import wraps
+
+from flask import g, has_request_context, request
+from flask_jwt_extended import jwt_required
+from sqlalchemy import event
+
+# Upper bounds in milliseconds; the last bucket catches everything slower
+BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class EndpointStats:
+    def __init__(self):
+        self.requests = 0
+        self.statements = 0
+        self.max_statements = 0
+        self.total_ms = 0.0
+        self.db_ms = 0.0
+        self.serialize_ms = 0.0
+        self.response_bytes = 0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+
+    def add(self, statements, total_ms, db_ms, serialize_ms, size):
+        self.requests += 1
+        self.statements += statements
+        self.max_statements = max(self.max_statements, statements)
+        self.total_ms += total_ms
+        self.db_ms += db_ms
+        self.serialize_ms += serialize_ms
+        self.response_bytes += size
+        self.buckets[bisect.bisect_left(BUCKETS_MS, total_ms)] += 1
+
+    def to_dict(self):
+        n = self.requests or 1
+        return {
+            "requests": self.requests,
+            "avg_statements": round(self.statements / n, 2),
+            "max_statements": self.max_statements,
+            "avg_ms": round(self.total_ms / n, 3),
+            "avg_db_ms": round(self.db_ms / n, 3),
+            "avg_serialize_ms": round(self.serialize_ms / n, 3),
+            "avg_response_bytes": round(self.response_bytes / n),
+            "histogram_ms": {
+                **{f"le_{bound}": count for bound, count in zip(BUCKETS_MS, self.buckets)},
+                "inf": self.buckets[-1],
+            },
+        }
+
+
+class Instrumentation:
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def init_app(self, app):
+        self.enabled = app.config.get("INSTRUMENTATION_ENABLED", False)
+        if not self.enabled:
+            return
+        self.max_statements = app.config.get("INSTRUMENTATION_MAX_STATEMENTS")
+
+        from . import db
+        from .utils import role_required
+        with app.app_context():
+            engine = db.engine
+        event.listen(engine, "before_cursor_execute", self._before_cursor)
+        event.listen(engine, "after_cursor_execute", self._after_cursor)
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.add_url_rule("/api/metrics", "metrics", jwt_required()(role_required("admin")(self.metrics_view)))
+
+        # Mark when each view returns so response building can be timed apart
+        for endpoint, view in list(app.view_functions.items()):
+            app.view_functions[endpoint] = self._timed_view(view)
+
+    def _timed_view(self, view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            try:
+                return view(*args, **kwargs)
+            finally:
+                g._metrics_view_end = time.perf_counter()
+        return wrapper
+
+    def _before_request(self):
+        g._metrics_start = time.perf_counter()
+        g._metrics_statements = 0
+        g._metrics_db = 0.0
+
+    def _before_cursor(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("_metrics_started", []).append(time.perf_counter())
+
+    def _after_cursor(self, conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["_metrics_started"].pop()
+        if has_request_context() and "_metrics_start" in g:
+            g._metrics_statements += 1
+            g._metrics_db += time.perf_counter() - started
+
+    def _after_request(self, response):
+        if "_metrics_start" not in g:
+            return response
+        now = time.perf_counter()
+        total_ms = (now - g._metrics_start) * 1000
+        db_ms = g._metrics_db * 1000
+        view_end = g.get("_metrics_view_end")
+        serialize_ms = (now - view_end) * 1000 if view_end else 0.0
+        statements = g._metrics_statements
+        size = response.calculate_content_length() or 0
+
+        response.headers["Server-Timing"] = (
+            f'db;dur={db_ms:.2f};desc="{statements} statements", '
+            f"serialize;dur={serialize_ms:.2f}, total;dur={total_ms:.2f}"
+        )
+        endpoint = request.endpoint or "<unmatched>"
+        with self._lock:
+            self._endpoints.setdefault(endpoint, EndpointStats()).add(
+                statements, total_ms, db_ms, serialize_ms, size
+            )
+        if self.max_statements and statements > self.max_statements:
+            logging.warning(
+                f"{endpoint} ran {statements} SQL statements (limit {self.max_statements})"
+            )
+        return response
+
+    def snapshot(self):
+        with self._lock:
+            return {name: stats.to_dict() for name, stats in sorted(self._endpoints.items())}
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+
+    def metrics_view(self):
+        return {"endpoints": self.snapshot()}, 200
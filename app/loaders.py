@@ -0,0 +1,32 @@
+"""Eager-loading profiles matching the depth of the models' to_dict output.
+
+Each helper returns loader options for a query whose results will be
+serialized with the same flags, so serialization never triggers a lazy
+load per row.
+"""
+from sqlalchemy.orm import joinedload, selectinload
+from .models import Class, Enrollment
+
+
+def enrollment_options(include_student=True, include_class=False, include_grades=False):
+    """Options for Enrollment.to_dict(include_grades=...), optionally with its class."""
+    options = []
+    if include_student:
+        options.append(joinedload(Enrollment.student))
+    if include_class:
+        options.append(joinedload(Enrollment.class_).joinedload(Class.teacher))
+    if include_grades:
+        options.append(selectinload(Enrollment.grades))
+    return options
+
+
+def class_options(include_students=False):
+    """Options for Class.to_dict(include_students=...)."""
+    options = [joinedload(Class.teacher)]
+    if include_students:
+        options.append(
+            selectinload(Class.enrollments).options(
+                joinedload(Enrollment.student), selectinload(Enrollment.grades)
+            )
+        )
+    return options
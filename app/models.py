@@ -1,7 +1,7 @@
 from datetime import datetime
 from enum import Enum
-from werkzeug.security import generate_password_hash, check_password_hash
 from app import db
+from app.hashing import hasher
 
 class Role(str, Enum):
     admin = "admin"
@@ -10,21 +10,30 @@ class Role(str, Enum):
 
 class User(db.Model):
     __tablename__ = "users"
+    __table_args__ = (
+        # Role-filtered lists are paged by id
+        db.Index("ix_users_role_id", "role", "id"),
+    )
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(120), nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False, index=True)
     password_hash = db.Column(db.String(255), nullable=False)
     role = db.Column(db.Enum(Role), default=Role.student, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Bumped by app.transcripts whenever this student's transcript changes
+    transcript_version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
 
     # Relationships
     classes_taught = db.relationship("Class", back_populates="teacher", lazy="dynamic")
 
     def set_password(self, password: str):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hasher.hash(password)
 
     def check_password(self, password: str) -> bool:
-        return check_password_hash(self.password_hash, password)
+        return hasher.verify(self.password_hash, password)
+
+    def password_needs_rehash(self) -> bool:
+        return hasher.needs_rehash(self.password_hash)
 
     def to_dict(self):
         return {
@@ -40,7 +49,18 @@ class Class(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(120), nullable=False)
     description = db.Column(db.Text, default="")
-    teacher_id = db.Column(db.Integer, db.ForeignKey("users.id"))
+    teacher_id = db.Column(db.Integer, db.ForeignKey("users.id"), index=True)
+    # Seats for active + pending enrollments; None means unlimited
+    capacity = db.Column(db.Integer)
+    # Enrollment counts by status, kept in step by app.rosters
+    active_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    pending_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    dropped_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    waitlisted_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    # Highest waitlist_position handed out in this class (see app.waitlist)
+    waitlist_tail = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    # Bumped by app.grade_stats on every grade write in the class; keys app.analytics' cache
+    grade_version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
 
     teacher = db.relationship("User", back_populates="classes_taught")
     enrollments = db.relationship("Enrollment", back_populates="class_", cascade="all, delete-orphan")
@@ -51,6 +71,11 @@ class Class(db.Model):
             "name": self.name,
             "description": self.description,
             "teacher": self.teacher.to_dict() if self.teacher else None,
+            "capacity": self.capacity,
+            "active_count": self.active_count,
+            "pending_count": self.pending_count,
+            "dropped_count": self.dropped_count,
+            "waitlisted_count": self.waitlisted_count,
         }
         if include_students:
             data["enrollments"] = [e.to_dict(include_grades=True) for e in self.enrollments]
@@ -60,6 +85,7 @@ class EnrollmentStatus(str, Enum):
     active = "active"
     dropped = "dropped"
     pending = "pending"
+    waitlisted = "waitlisted"
 
 class Semester(str, Enum):
     first_semester = "first_semester"
@@ -68,17 +94,25 @@ class Semester(str, Enum):
 
 class Enrollment(db.Model):
     __tablename__ = "enrollments"
+    __table_args__ = (
+        # Also serves lookups by student_id alone
+        db.UniqueConstraint("student_id", "class_id", name="uq_enrollments_student_class"),
+        # The per-class waitlist, in order; only waitlisted rows have a position
+        db.Index("ix_enrollments_class_waitlist", "class_id", "waitlist_position"),
+    )
     id = db.Column(db.Integer, primary_key=True)
     student_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
-    class_id = db.Column(db.Integer, db.ForeignKey("classes.id"), nullable=False)
+    class_id = db.Column(db.Integer, db.ForeignKey("classes.id"), nullable=False, index=True)
     status = db.Column(db.Enum(EnrollmentStatus), default=EnrollmentStatus.active, nullable=False)
     enrollment_date = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     semester = db.Column(db.Enum(Semester), nullable=False)
     academic_year = db.Column(db.String(20), nullable=False)
+    waitlist_position = db.Column(db.Integer)
 
     student = db.relationship("User")
     class_ = db.relationship("Class", back_populates="enrollments")
     grades = db.relationship("Grade", back_populates="enrollment", cascade="all, delete-orphan")
+    stats = db.relationship("GradeStat", uselist=False, cascade="all, delete-orphan")
 
     def to_dict(self, include_grades=False):
         data = {
@@ -97,7 +131,7 @@ class Enrollment(db.Model):
 class Grade(db.Model):
     __tablename__ = "grades"
     id = db.Column(db.Integer, primary_key=True)
-    enrollment_id = db.Column(db.Integer, db.ForeignKey("enrollments.id"), nullable=False)
+    enrollment_id = db.Column(db.Integer, db.ForeignKey("enrollments.id"), nullable=False, index=True)
     score = db.Column(db.Float, nullable=False)
     remarks = db.Column(db.String(255), default="")
 
@@ -110,3 +144,34 @@ class Grade(db.Model):
             "score": self.score,
             "remarks": self.remarks
         }
+
+class GradeStat(db.Model):
+    """Rollup of an enrollment's grades, kept in step by app.grade_stats."""
+    __tablename__ = "grade_stats"
+    enrollment_id = db.Column(db.Integer, db.ForeignKey("enrollments.id"), primary_key=True)
+    class_id = db.Column(db.Integer, db.ForeignKey("classes.id"), nullable=False, index=True)
+    student_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False, index=True)
+    score_count = db.Column(db.Integer, nullable=False, default=0)
+    score_sum = db.Column(db.Float, nullable=False, default=0)
+    score_sum_sq = db.Column(db.Float, nullable=False, default=0)
+    score_min = db.Column(db.Float)
+    score_max = db.Column(db.Float)
+
+    @property
+    def average(self):
+        return self.score_sum / self.score_count if self.score_count else None
+
+class ActivityEvent(db.Model):
+    """Append-only log behind the activity feed, written by app.activity."""
+    __tablename__ = "activity_events"
+    __table_args__ = (
+        # The feed pages newest first by (created_at, id)
+        db.Index("ix_activity_events_created_at_id", "created_at", "id"),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    kind = db.Column(db.String(40), nullable=False)
+    # Plain ids, not foreign keys: log rows outlive the users and records they mention
+    actor_id = db.Column(db.Integer)
+    subject_id = db.Column(db.Integer)
+    description = db.Column(db.String(255), nullable=False)
@@ -0,0 +1,145 @@
+"""Connection-pool telemetry, served at /api/metrics/pool.
+
+Counters are per process: every gunicorn worker owns its own pool, so
+the endpoint reports the pid, and the pool sizes and WEB_CONCURRENCY it
+was configured with, to compare against the database's connection limit.
+"""
+import bisect
+import os
+import threading
+import time
+
+from flask_jwt_extended import jwt_required
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool
+
+from .instrumentation import BUCKETS_MS
+
+
+class PoolMonitor:
+    COUNTERS = ("checkouts", "checkins", "connects", "overflow_connects", "timeouts",
+                "invalidations", "soft_invalidations")
+
+    def __init__(self):
+        self.enabled = False
+        self.engine = None
+        self._lock = threading.Lock()
+        self.reset()
+
+    def init_app(self, app):
+        self.enabled = app.config.get("POOL_METRICS_ENABLED", False)
+        if not self.enabled:
+            return
+        self.config = {key: app.config[key] for key in (
+            "DB_POOL_SIZE", "DB_MAX_OVERFLOW", "DB_POOL_TIMEOUT", "DB_POOL_RECYCLE",
+            "DB_POOL_PRE_PING", "DB_STATEMENT_TIMEOUT_MS", "WEB_CONCURRENCY", "DB_MAX_CONNECTIONS")}
+
+        from . import db
+        from .utils import role_required
+        with app.app_context():
+            self.engine = db.engine
+        # Pool listeners survive engine.dispose(), which swaps in a fresh pool
+        event.listen(self.engine, "checkout", self._on_checkout)
+        event.listen(self.engine, "checkin", self._on_checkin)
+        event.listen(self.engine, "connect", self._on_connect)
+        event.listen(self.engine, "invalidate", self._on_invalidate)
+        event.listen(self.engine, "soft_invalidate", self._on_soft_invalidate)
+        app.add_url_rule("/api/metrics/pool", "pool_metrics", jwt_required()(role_required("admin")(self.metrics_view)))
+
+    def reset(self):
+        with self._lock:
+            self._counts = dict.fromkeys(self.COUNTERS, 0)
+            self._wait_count = 0
+            self._wait_total_ms = 0.0
+            self._wait_max_ms = 0.0
+            self._wait_buckets = [0] * (len(BUCKETS_MS) + 1)
+            self._peak_checked_out = 0
+
+    def count(self, name):
+        with self._lock:
+            self._counts[name] += 1
+
+    def _on_checkout(self, dbapi_conn, record, proxy):
+        checked_out = self._pool_status().get("checked_out", 0)
+        with self._lock:
+            self._counts["checkouts"] += 1
+            self._peak_checked_out = max(self._peak_checked_out, checked_out)
+
+    def _on_checkin(self, dbapi_conn, record):
+        self.count("checkins")
+
+    def _on_connect(self, dbapi_conn, record):
+        self.count("connects")
+        if self._pool_status().get("overflow", 0) > 0:
+            self.count("overflow_connects")
+
+    def _on_invalidate(self, dbapi_conn, record, exception):
+        self.count("invalidations")
+
+    def _on_soft_invalidate(self, dbapi_conn, record, exception):
+        self.count("soft_invalidations")
+
+    def record_wait(self, seconds):
+        ms = seconds * 1000
+        with self._lock:
+            self._wait_count += 1
+            self._wait_total_ms += ms
+            self._wait_max_ms = max(self._wait_max_ms, ms)
+            self._wait_buckets[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+
+    def _pool_status(self):
+        pool = self.engine.pool if self.engine is not None else None
+        if not isinstance(pool, QueuePool):
+            return {}
+        return {
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": max(0, pool.overflow()),
+        }
+
+    def snapshot(self):
+        status = self._pool_status()
+        with self._lock:
+            n = self._wait_count or 1
+            return {
+                "pid": os.getpid(),
+                "pool": {**status, "class": type(self.engine.pool).__name__ if self.engine else None},
+                "peak_checked_out": self._peak_checked_out,
+                **self._counts,
+                "wait": {
+                    "count": self._wait_count,
+                    "avg_ms": round(self._wait_total_ms / n, 3),
+                    "max_ms": round(self._wait_max_ms, 3),
+                    "histogram_ms": {
+                        **{f"le_{bound}": count for bound, count in zip(BUCKETS_MS, self._wait_buckets)},
+                        "inf": self._wait_buckets[-1],
+                    },
+                },
+                "config": {
+                    **self.config,
+                    "max_connections_per_worker": self.config["DB_POOL_SIZE"] + self.config["DB_MAX_OVERFLOW"],
+                    "max_connections_all_workers": self.config["WEB_CONCURRENCY"]
+                    * (self.config["DB_POOL_SIZE"] + self.config["DB_MAX_OVERFLOW"]),
+                },
+            }
+
+    def metrics_view(self):
+        return self.snapshot(), 200
+
+
+pool_monitor = PoolMonitor()
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that reports how long each checkout waited, and timeouts."""
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            pool_monitor.count("timeouts")
+            raise
+        finally:
+            pool_monitor.record_wait(time.perf_counter() - started)
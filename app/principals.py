@@ -0,0 +1,97 @@
+"""Per-process cache of the user behind a JWT identity.
+
+current_principal() answers "who am I" from an LRU cache with a TTL, so
+endpoints that only need the caller's id, name or role do not load the
+User row on every request. Entries are dropped whenever a User row is
+inserted, updated or deleted in this process; other worker processes
+see the change once the TTL expires.
+"""
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import event
+
+from . import db
+from .models import User
+
+
+class Principal(namedtuple("Principal", "id name email role created_at")):
+    __slots__ = ()
+
+    @classmethod
+    def from_user(cls, user):
+        return cls(user.id, user.name, user.email, user.role, user.created_at)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "name": self.name,
+            "email": self.email,
+            "role": self.role.value,
+            "created_at": self.created_at.isoformat()
+        }
+
+
+class PrincipalCache:
+    def __init__(self, maxsize=10000, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            principal, expires = entry
+            if expires < time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return principal
+
+    def put(self, principal):
+        with self._lock:
+            self._entries[principal.id] = (principal, time.monotonic() + self.ttl)
+            self._entries.move_to_end(principal.id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+principals = PrincipalCache()
+
+
+def configure(app):
+    principals.maxsize = app.config.get("PRINCIPAL_CACHE_SIZE", principals.maxsize)
+    principals.ttl = app.config.get("PRINCIPAL_CACHE_TTL", principals.ttl)
+
+
+def current_principal():
+    """Return the Principal for the current JWT, or None if the user is gone."""
+    user_id = int(get_jwt_identity())
+    principal = principals.get(user_id)
+    if principal is None:
+        user = db.session.get(User, user_id)
+        if user is None:
+            return None
+        principal = Principal.from_user(user)
+        principals.put(principal)
+    return principal
+
+
+@event.listens_for(User, "after_insert")
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_user(mapper, connection, user):
+    principals.invalidate(user.id)
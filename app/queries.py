@@ -0,0 +1,151 @@
+"""Statements and payload builders for the read-heavy endpoints.
+
+Each endpoint is split into a Core select() and a function turning its
+rows into the response body, so the Flask routes and the async ASGI
+handlers in app.asgi run exactly the same SQL.
+"""
+from sqlalchemy import func, select, tuple_
+from .models import Class, User, Role, Enrollment, GradeStat, ActivityEvent
+from .rosters import SEATED
+
+
+def _average(score_sum, score_count):
+    return score_sum / score_count if score_count else None
+
+
+def summary_stmt():
+    """All dashboard totals in one round trip."""
+    def count_users(role):
+        return select(func.count(User.id)).where(User.role == role).scalar_subquery()
+
+    return select(
+        select(func.count(Class.id)).scalar_subquery(),
+        count_users(Role.student),
+        count_users(Role.teacher),
+        select(func.sum(GradeStat.score_sum)).scalar_subquery(),
+        select(func.sum(GradeStat.score_count)).scalar_subquery(),
+    )
+
+
+def activity_stmt(limit=20, before=None):
+    """Newest events first; before is a (created_at, id) keyset cursor."""
+    stmt = select(
+        ActivityEvent.id, ActivityEvent.created_at, ActivityEvent.kind,
+        ActivityEvent.actor_id, ActivityEvent.subject_id, ActivityEvent.description,
+    )
+    if before is not None:
+        stmt = stmt.where(tuple_(ActivityEvent.created_at, ActivityEvent.id) < tuple_(*before))
+    return stmt.order_by(ActivityEvent.created_at.desc(), ActivityEvent.id.desc()).limit(limit)
+
+
+def activity_item(event_id, created_at, kind, actor_id, subject_id, description):
+    return {"id": event_id, "created_at": created_at, "kind": kind, "actor_id": actor_id,
+            "subject_id": subject_id, "description": description}
+
+
+def rows_to_activity(rows):
+    return [activity_item(*row) for row in rows]
+
+
+def build_activity(items):
+    return [
+        {
+            "id": item["id"],
+            "kind": item["kind"],
+            "description": item["description"],
+            "actor_id": item["actor_id"],
+            "subject_id": item["subject_id"],
+            "timestamp": item["created_at"].isoformat()
+        }
+        for item in items
+    ]
+
+
+def build_summary(totals, recent):
+    total_classes, total_students, total_teachers, score_sum, score_count = totals
+    average_grade = _average(score_sum, score_count)
+    return {
+        "total_classes": total_classes,
+        "total_students": total_students,
+        "total_teachers": total_teachers,
+        "average_grade": round(average_grade, 2) if average_grade else 0,
+        "recent_activity": build_activity(recent)
+    }
+
+
+def teacher_summary_stmt(teacher_id):
+    # Every seated student in the teacher's classes with the grade rollups
+    # of those classes only
+    return (
+        select(User.id, User.name, func.sum(GradeStat.score_sum), func.sum(GradeStat.score_count))
+        .join(Enrollment, Enrollment.student_id == User.id)
+        .join(Class, Class.id == Enrollment.class_id)
+        .outerjoin(GradeStat, GradeStat.enrollment_id == Enrollment.id)
+        .where(Class.teacher_id == teacher_id, Enrollment.status.in_(SEATED))
+        .group_by(User.id, User.name)
+    )
+
+
+def build_teacher_summary(rows):
+    student_grades = []
+    for student_id, name, score_sum, score_count in rows:
+        avg_grade = _average(score_sum, score_count)
+        student_grades.append({
+            'id': student_id,
+            'name': name,
+            'average_grade': round(avg_grade, 2) if avg_grade else 0
+        })
+    return {
+        "total_students": len(student_grades),
+        "student_grades": sorted(student_grades, key=lambda x: x['name'])
+    }
+
+
+def student_summary_stmt(student_id):
+    # Every enrollment with its class name and grade rollup
+    return (
+        select(Enrollment.class_id, Class.name, GradeStat.score_sum, GradeStat.score_count)
+        .join(Class, Class.id == Enrollment.class_id)
+        .outerjoin(GradeStat, GradeStat.enrollment_id == Enrollment.id)
+        .where(Enrollment.student_id == student_id)
+    )
+
+
+def build_student_summary(rows):
+    if not rows:
+        return {"total_classes": 0, "overall_average_grade": 0, "class_grades": []}
+
+    overall_avg_grade = _average(sum(r[2] or 0 for r in rows), sum(r[3] or 0 for r in rows))
+    class_grades = []
+    for class_id, class_name, score_sum, score_count in rows:
+        avg_grade = _average(score_sum, score_count)
+        class_grades.append({
+            'class_id': class_id,
+            'class_name': class_name,
+            'average_grade': round(avg_grade, 2) if avg_grade else 'N/A'
+        })
+    return {
+        "total_classes": len(rows),
+        "overall_average_grade": round(overall_avg_grade, 2) if overall_avg_grade else 0,
+        "class_grades": sorted(class_grades, key=lambda x: x['class_name'])
+    }
+
+
+def user_options_stmt(role):
+    return select(User.id, User.name).where(User.role == role)
+
+
+def build_student_options(rows):
+    return [{"value": sid, "label": f"{name} - ID: {sid:03d}"} for sid, name in rows]
+
+
+def build_teacher_options(rows):
+    return [{"value": tid, "label": name} for tid, name in rows]
+
+
+def class_options_stmt():
+    return select(Class.id, Class.name).order_by(Class.name)
+
+
+def build_class_options(rows):
+    return [{"value": cid, "label": f"{name}"} for cid, name in rows]
@@ -0,0 +1,237 @@
+"""Registration-rush mode for student self-enrollment.
+
+With REGISTRATION_RUSH_ENABLED, POST /api/enrollments/enroll/<class_id>
+does not write by itself. It appends a ticket to an in-process FIFO
+queue for the class and waits. Whichever waiting request finds no batch
+in flight becomes the leader. It sleeps REGISTRATION_BATCH_WAIT_MS so
+the batch can fill, then takes up to REGISTRATION_BATCH_SIZE tickets. It
+applies them in one transaction and hands every ticket its result. The
+transaction is:
+- one lookup of existing enrollments
+- one counter update claiming the free seats
+- one multi-row INSERT
+
+Results are deterministic for a given arrival order. Tickets are seated
+strictly in queue order until the class is full and the rest are
+waitlisted. A student already in the class, or earlier in the same
+batch, gets "duplicate". The seat counter is shared through the
+database, so capacity holds across gunicorn workers, but FIFO order
+only holds within one process.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from itertools import count
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+
+from . import activity, db, rosters, transcripts
+from .cache import response_cache
+from .models import Enrollment, EnrollmentStatus, Role, User
+from .principals import Principal
+
+ENROLLED, WAITLISTED, DUPLICATE, NOT_FOUND, FAILED = "enrolled", "waitlisted", "duplicate", "not_found", "failed"
+
+logger = logging.getLogger(__name__)
+
+# A batch that keeps failing a constraint is not a race with another worker
+APPLY_ATTEMPTS = 3
+
+
+class RegistrationBusy(Exception):
+    """The class queue is full or the ticket waited too long; the client should retry."""
+
+
+class Ticket:
+    __slots__ = ("sequence", "student_id", "semester", "academic_year", "result", "enrollment")
+
+    def __init__(self, sequence, student_id, semester, academic_year):
+        self.sequence = sequence
+        self.student_id = student_id
+        self.semester = semester
+        self.academic_year = academic_year
+        self.result = None
+        self.enrollment = None
+
+
+class ClassQueue:
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.tickets = deque()
+        self.leading = False
+
+
+class Registrar:
+    def __init__(self):
+        self.enabled = False
+        self.batch_size = 200
+        self.batch_wait = 0.005
+        self.queue_limit = 10000
+        self.timeout = 30.0
+        self._lock = threading.Lock()
+        self._queues = {}
+        self._sequence = count(1)
+
+    def init_app(self, app):
+        self.enabled = app.config.get("REGISTRATION_RUSH_ENABLED", False)
+        self.batch_size = app.config.get("REGISTRATION_BATCH_SIZE", self.batch_size)
+        self.batch_wait = app.config.get("REGISTRATION_BATCH_WAIT_MS", self.batch_wait * 1000) / 1000
+        self.queue_limit = app.config.get("REGISTRATION_QUEUE_LIMIT", self.queue_limit)
+        self.timeout = app.config.get("REGISTRATION_TIMEOUT", self.timeout)
+
+    def _queue(self, class_id):
+        with self._lock:
+            return self._queues.setdefault(class_id, ClassQueue())
+
+    def submit(self, class_id, student_id, semester, academic_year):
+        """Queue a self-enrollment and block until its batch is applied. Returns the Ticket."""
+        queue = self._queue(class_id)
+        # Hand the request's pooled connection back while waiting; only leaders need one
+        db.session.close()
+        with queue.cond:
+            if len(queue.tickets) >= self.queue_limit:
+                raise RegistrationBusy("Registration queue is full")
+            ticket = Ticket(next(self._sequence), student_id, semester, academic_year)
+            queue.tickets.append(ticket)
+
+        deadline = time.monotonic() + self.timeout
+        while True:
+            with queue.cond:
+                if ticket.result is not None:
+                    return ticket
+                if queue.leading:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 and ticket in queue.tickets:
+                        queue.tickets.remove(ticket)
+                        raise RegistrationBusy("Timed out waiting for a registration slot")
+                    # Once taken into a batch the ticket is waited for to the end
+                    queue.cond.wait(max(remaining, 0.05))
+                    continue
+                queue.leading = True
+            self._lead(class_id, queue)
+
+    def _lead(self, class_id, queue):
+        batch = []
+        try:
+            time.sleep(self.batch_wait)
+            with queue.cond:
+                while queue.tickets and len(batch) < self.batch_size:
+                    batch.append(queue.tickets.popleft())
+            if batch:
+                apply_batch(class_id, batch)
+        except Exception:
+            logger.exception("Registration batch for class %s failed", class_id)
+            db.session.rollback()
+            for ticket in batch:
+                ticket.result = FAILED
+        finally:
+            with queue.cond:
+                queue.leading = False
+                queue.cond.notify_all()
+
+    def clear(self):
+        with self._lock:
+            self._queues.clear()
+
+
+registrar = Registrar()
+
+
+def _enrollment_dict(class_id, ticket, student, enrollment_id, status, enrollment_date):
+    return {
+        "id": enrollment_id,
+        "status": status.value,
+        "student": student.to_dict(),
+        "class_id": class_id,
+        "enrollment_date": enrollment_date.isoformat(),
+        "semester": ticket.semester.value,
+        "academic_year": ticket.academic_year,
+    }
+
+
+def apply_batch(class_id, batch):
+    """Enroll or waitlist a batch of tickets, in order, in one transaction.
+
+    Fails the tickets and re-raises if the batch still hits an
+    IntegrityError after APPLY_ATTEMPTS tries.
+    """
+    for attempt in range(1, APPLY_ATTEMPTS + 1):
+        try:
+            outcomes = _apply(class_id, batch)
+            db.session.commit()
+            break
+        except IntegrityError:
+            # Usually a student enrolled through another worker since the lookup; redo it
+            db.session.rollback()
+            if attempt == APPLY_ATTEMPTS:
+                for ticket in batch:
+                    ticket.result = FAILED
+                raise
+    response_cache.bump("enrollments")
+    for ticket, (result, enrollment) in zip(batch, outcomes):
+        ticket.enrollment = enrollment
+        ticket.result = result
+
+
+def _apply(class_id, batch):
+    """Write a batch and return a (result, enrollment dict) per ticket."""
+    # Queued requests never touch the database; their students are loaded here
+    students = {
+        p.id: p for p in map(Principal._make, db.session.execute(
+            select(User.id, User.name, User.email, User.role, User.created_at).where(
+                User.id.in_({t.student_id for t in batch}), User.role == Role.student)
+        ))
+    }
+    existing = set(db.session.scalars(
+        select(Enrollment.student_id).where(
+            Enrollment.class_id == class_id,
+            Enrollment.student_id.in_({t.student_id for t in batch}),
+        )
+    ))
+    outcomes = {}
+    admitted = []
+    for ticket in batch:
+        if ticket.student_id not in students:
+            outcomes[ticket.sequence] = (NOT_FOUND, None)
+        elif ticket.student_id in existing:
+            outcomes[ticket.sequence] = (DUPLICATE, None)
+        else:
+            existing.add(ticket.student_id)
+            admitted.append(ticket)
+    if not admitted:
+        return [outcomes[t.sequence] for t in batch]
+
+    claimed = rosters.take_many(class_id, len(admitted))
+    if claimed is None:
+        return [(NOT_FOUND, None)] * len(batch)
+    class_name, granted, tail = claimed
+
+    now = datetime.utcnow()
+    # The waitlisted tickets take the positions just appended, in order
+    first_position = tail - (len(admitted) - granted) + 1
+    rows = []
+    for i, ticket in enumerate(admitted):
+        seated = i < granted
+        rows.append({"student_id": ticket.student_id, "class_id": class_id,
+                     "status": EnrollmentStatus.active if seated else EnrollmentStatus.waitlisted,
+                     "waitlist_position": None if seated else first_position + i - granted,
+                     "semester": ticket.semester, "academic_year": ticket.academic_year,
+                     "enrollment_date": now})
+    ids = dict(db.session.execute(insert(Enrollment).returning(Enrollment.student_id, Enrollment.id), rows).all())
+    transcripts.touch(list(ids))
+
+    for ticket, row in zip(admitted, rows):
+        enrolled = row["status"] is EnrollmentStatus.active
+        student = students[ticket.student_id]
+        enrollment = _enrollment_dict(class_id, ticket, student, ids[ticket.student_id], row["status"], now)
+        outcomes[ticket.sequence] = (ENROLLED if enrolled else WAITLISTED, enrollment)
+        if enrolled:
+            description = f"New student {student.name} enrolled in {class_name}"
+        else:
+            description = f"{student.name} joined the waitlist for {class_name}"
+        activity.record("enrollment.created" if enrolled else "enrollment.waitlisted", description,
+                        subject_id=ticket.student_id, actor_id=ticket.student_id)
+    return [outcomes[t.sequence] for t in batch]
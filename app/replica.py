@@ -0,0 +1,122 @@
+"""Send GET reads to a replica database while writers read their own writes.
+
+With SQLALCHEMY_REPLICA_URI set, configure() creates a replica engine.
+GET requests on blueprints that register route_reads_to_replica read
+from it. Everything else stays on the primary:
+- flushes and all non-GET requests,
+- response-cache misses (see app.cache),
+- any request from a user who committed a write within the last
+  REPLICA_STICKY_SECONDS.
+
+The window travels with the client: a commit sets a signed cookie with
+the user's id and the time the window ends, so whichever worker serves
+the next read keeps it on the primary.
+"""
+import math
+import time
+from contextlib import contextmanager
+
+from flask import current_app, g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from itsdangerous import BadSignature, URLSafeSerializer
+from sqlalchemy import create_engine, event
+
+from .settings import engine_options
+
+STICKY_COOKIE = "read_primary"
+
+
+class StickyWindow:
+    def __init__(self, seconds=5):
+        self.seconds = seconds
+        self._serializer = None
+
+    def init_app(self, app):
+        self.seconds = app.config.get("REPLICA_STICKY_SECONDS", self.seconds)
+        self._serializer = URLSafeSerializer(app.config["SECRET_KEY"], salt="replica-sticky")
+
+    def token(self, identity):
+        """Cookie value that keeps identity on the primary for the next `seconds`."""
+        return self._serializer.dumps([str(identity), time.time() + self.seconds])
+
+    def active(self, identity, token):
+        if not token or self._serializer is None:
+            return False
+        try:
+            subject, until = self._serializer.loads(token)
+        except (BadSignature, TypeError, ValueError):
+            return False
+        return subject == str(identity) and until > time.time()
+
+
+sticky = StickyWindow()
+
+
+def configure(app):
+    sticky.init_app(app)
+    app.after_request(_set_sticky_cookie)
+    uri = app.config.get("SQLALCHEMY_REPLICA_URI")
+    engine = None
+    if uri:
+        # Not a Flask-SQLAlchemy bind: binds register a metadata on the shared db
+        options = engine_options({**app.config, "SQLALCHEMY_DATABASE_URI": uri,
+                                  "POOL_METRICS_ENABLED": False})
+        engine = create_engine(uri, **options)
+    app.extensions["replica_engine"] = engine
+
+
+def _identity():
+    claims = g.get("_jwt_extended_jwt")
+    return claims.get("sub") if claims else None
+
+
+def route_reads_to_replica():
+    """before_request hook for blueprints whose GET handlers may read stale data."""
+    g._read_replica = request.method in ("GET", "HEAD")
+
+
+def reads_from_replica():
+    """True when queries of the current request should go to the replica."""
+    if not has_request_context() or not g.get("_read_replica"):
+        return False
+    identity = _identity()
+    return identity is None or not sticky.active(identity, request.cookies.get(STICKY_COOKIE))
+
+
+@contextmanager
+def use_primary():
+    """Run the block against the primary even inside a replica-routed request."""
+    if not has_request_context():
+        yield
+        return
+    previous = g.get("_read_replica", False)
+    g._read_replica = False
+    try:
+        yield
+    finally:
+        g._read_replica = previous
+
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and reads_from_replica():
+            replica = current_app.extensions.get("replica_engine")
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _start_sticky_window(session):
+    if has_request_context():
+        identity = _identity()
+        if identity is not None:
+            g._sticky_token = sticky.token(identity)
+
+
+def _set_sticky_cookie(response):
+    token = g.pop("_sticky_token", None)
+    if token is not None:
+        response.set_cookie(STICKY_COOKIE, token, max_age=math.ceil(sticky.seconds), httponly=True,
+                            secure=request.is_secure, samesite="Lax")
+    return response
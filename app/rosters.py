@@ -0,0 +1,108 @@
+"""Per-class enrollment counters and capacity checks.
+
+classes.active_count, pending_count, dropped_count and waitlisted_count
+are moved by one UPDATE in the same transaction as the enrollment write, so class sizes
+are read without touching enrollments. A class with a capacity has
+active + pending capped by it. Taking a seat is a conditional UPDATE
+that matches no row when the class is full, which also holds the row
+lock that serializes concurrent enrollments in that class.
+"""
+from sqlalchemy import func, or_, select, update
+from . import db
+from .models import Class, Enrollment, EnrollmentStatus
+
+SEATED = (EnrollmentStatus.active, EnrollmentStatus.pending)
+
+
+def _counter(status):
+    return getattr(Class, f"{EnrollmentStatus(status).value}_count")
+
+
+def has_room():
+    return or_(Class.capacity.is_(None), Class.active_count + Class.pending_count < Class.capacity)
+
+
+def _execute(stmt):
+    return db.session.execute(stmt.execution_options(synchronize_session=False))
+
+
+def take(class_id, status=EnrollmentStatus.active):
+    """Count a new enrollment. Returns the class name, or None if the class is full or missing."""
+    column = _counter(status)
+    stmt = update(Class).where(Class.id == class_id).values({column: column + 1}).returning(Class.name)
+    if status in SEATED:
+        stmt = stmt.where(has_room())
+    return _execute(stmt).scalar()
+
+
+def take_many(class_id, count):
+    """Seat up to count new enrollments and waitlist the rest.
+
+    Returns (class name, seats granted, waitlist tail after the rest were
+    appended), or None if the class is missing.
+    The free seats are read and then claimed by an UPDATE guarded on the
+    values read, which is retried if another writer got in between.
+    """
+    while True:
+        row = db.session.execute(
+            select(Class.name, Class.capacity, Class.active_count + Class.pending_count).where(Class.id == class_id)
+        ).first()
+        if row is None:
+            return None
+        name, capacity, seated = row
+        granted = count if capacity is None else max(0, min(count, capacity - seated))
+        stmt = update(Class).where(
+            Class.id == class_id,
+            Class.capacity.is_(None) if capacity is None else Class.capacity == capacity,
+            Class.active_count + Class.pending_count == seated,
+        ).values(active_count=Class.active_count + granted,
+                 waitlisted_count=Class.waitlisted_count + (count - granted),
+                 waitlist_tail=Class.waitlist_tail + (count - granted))
+        tail = _execute(stmt.returning(Class.waitlist_tail)).scalar()
+        if tail is not None:
+            return name, granted, tail
+
+
+def release(class_id, status):
+    """Uncount a deleted enrollment."""
+    column = _counter(status)
+    _execute(update(Class).where(Class.id == class_id).values({column: column - 1}))
+
+
+def move(class_id, old_status, new_status):
+    """Move an enrollment between counters. Returns False if it needs a seat and none is left."""
+    old, new = _counter(old_status), _counter(new_status)
+    if old is new:
+        return True
+    stmt = update(Class).where(Class.id == class_id).values({old: old - 1, new: new + 1})
+    if new_status in SEATED and old_status not in SEATED:
+        stmt = stmt.where(has_room())
+    return _execute(stmt).rowcount == 1
+
+
+def _fresh_count(status):
+    return (
+        select(func.count(Enrollment.id))
+        .where(Enrollment.class_id == Class.id, Enrollment.status == status)
+        .scalar_subquery()
+    )
+
+
+def refresh(class_ids=None):
+    """Recount the given classes (all of them by default) in one statement."""
+    stmt = update(Class).values({_counter(s): _fresh_count(s) for s in EnrollmentStatus})
+    if class_ids is not None:
+        class_ids = list(class_ids)
+        if not class_ids:
+            return
+        stmt = stmt.where(Class.id.in_(class_ids))
+    _execute(stmt)
+
+
+def find_drift():
+    """Return the ids of classes whose counters disagree with their enrollments."""
+    stored = [_counter(s) for s in EnrollmentStatus]
+    fresh = [_fresh_count(s) for s in EnrollmentStatus]
+    rows = db.session.execute(select(Class.id, *stored, *fresh).order_by(Class.id))
+    n = len(stored)
+    return [row[0] for row in rows if tuple(row[1:1 + n]) != tuple(row[1 + n:])]
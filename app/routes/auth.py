@@ -1,12 +1,14 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import create_access_token
 from sqlalchemy.exc import IntegrityError
-from .. import db
+from .. import activity, db
 from ..models import User, Role
+from ..cache import invalidates
 
 auth_bp = Blueprint("auth", __name__)
 
 @auth_bp.post("/register")
+@invalidates("users")
 def register():
     data = request.get_json() or {}
     name = data.get("name")
@@ -25,6 +27,8 @@ def register():
     user.set_password(password)
     db.session.add(user)
     try:
+        db.session.flush()
+        activity.record("user.registered", f"{name} registered as a {user.role.value}", subject_id=user.id)
         db.session.commit()
     except IntegrityError:
         db.session.rollback()
@@ -44,5 +48,10 @@ def login():
     if not user or not user.check_password(password):
         return {"msg": "Invalid credentials"}, 401
 
+    # Upgrade hashes made with older HASH_METHOD parameters while we have the password
+    if user.password_needs_rehash():
+        user.set_password(password)
+        db.session.commit()
+
     access_token = create_access_token(identity=user.id, additional_claims={"role": user.role.value})
     return {"access_token": access_token, "user": user.to_dict()}, 200
@@ -1,26 +1,61 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
-from .. import db
-from ..models import Class, User, Role
-from ..utils import role_required
+from sqlalchemy import select
+from .. import db, queries, transcripts, waitlist
+from ..models import Class, Enrollment, User, Role
+from ..utils import role_required, parse_list_args, keyset_page
+from ..loaders import class_options
+from ..serializers import CLASS_FIELDS, class_plan, json_response
+from ..cache import cached, invalidates
+from ..replica import route_reads_to_replica
 
 classes_bp = Blueprint("classes", __name__)
+classes_bp.before_request(route_reads_to_replica)
+
+
+def _capacity(data, default=None):
+    """Read an optional capacity: a positive integer, or null for unlimited."""
+    value = data.get("capacity", default)
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+        raise ValueError("capacity must be a positive integer or null")
+    return value
 
 @classes_bp.get("/")
 @classes_bp.get("")
 @jwt_required()
 def list_classes():
-    classes = Class.query.all()
-    return {"classes": [c.to_dict() for c in classes]}, 200
+    try:
+        fields, limit, cursor, unpaginated = parse_list_args(CLASS_FIELDS)
+    except ValueError as e:
+        return {"msg": str(e)}, 400
+
+    # Teachers are outer-joined into the same query instead of loaded per class
+    plan = class_plan(tuple(fields) if fields else CLASS_FIELDS)
+    query = plan.query(db.session)
+
+    # ?all=true keeps the original unpaginated response
+    if unpaginated:
+        return json_response({"classes": plan.dicts(query.all())})
+
+    rows, next_cursor = keyset_page(query, Class.id, limit, cursor, key=lambda row: row[0])
+    return json_response({"classes": plan.dicts(rows), "next_cursor": next_cursor})
 
 @classes_bp.post("/")
 @role_required("admin")
+@invalidates("classes")
 def create_class():
     data = request.get_json() or {}
     name = data.get("name")
     if not name:
         return {"msg": "name is required"}, 400
 
+    try:
+        capacity = _capacity(data)
+    except ValueError as e:
+        return {"msg": str(e)}, 400
+
     teacher_id = data.get("teacher_id")
     if teacher_id:
         teacher = User.query.get(teacher_id)
@@ -30,7 +65,8 @@ def create_class():
     new_class = Class(
         name=name,
         description=data.get("description", ""),
-        teacher_id=teacher_id
+        teacher_id=teacher_id,
+        capacity=capacity
     )
 
     db.session.add(new_class)
@@ -39,12 +75,19 @@ def create_class():
 
 @classes_bp.put("/<int:class_id>")
 @role_required("admin")
+@invalidates("classes", "enrollments")
 def update_class(class_id):
     c = Class.query.get_or_404(class_id)
     data = request.get_json() or {}
+    renamed = data.get("name", c.name) != c.name
     c.name = data.get("name", c.name)
     c.description = data.get("description", c.description)
-    
+    try:
+        # Lowering it below the current roster only stops new enrollments
+        c.capacity = _capacity(data, c.capacity)
+    except ValueError as e:
+        return {"msg": str(e)}, 400
+
     teacher_id = data.get("teacher_id")
     if teacher_id:
         teacher = User.query.get(teacher_id)
@@ -52,13 +95,21 @@ def update_class(class_id):
             return {"msg": "Invalid teacher ID"}, 400
         c.teacher_id = teacher_id
 
+    # A raised capacity seats students from the waitlist straight away
+    waitlist.promote(class_id)
+    if renamed:
+        # Transcripts show class names
+        transcripts.touch(select(Enrollment.student_id).where(Enrollment.class_id == class_id))
     db.session.commit()
     return {"msg": "class updated", "class": c.to_dict()}, 200
 
 @classes_bp.delete("/<int:class_id>")
 @role_required("admin")
+@invalidates("classes", "enrollments", "grades")
 def delete_class(class_id):
     c = Class.query.get_or_404(class_id)
+    # Before the delete cascades to the enrollments
+    transcripts.touch(select(Enrollment.student_id).where(Enrollment.class_id == class_id))
     db.session.delete(c)
     db.session.commit()
     return {"msg": "class deleted"}, 200
@@ -67,7 +118,12 @@ def delete_class(class_id):
 @classes_bp.get("/<int:class_id>")
 @jwt_required()
 def class_details(class_id):
-    c = Class.query.get_or_404(class_id)
+    # Teacher, enrollments with students, and grades: three queries in total
+    c = (
+        Class.query.options(*class_options(include_students=True))
+        .filter_by(id=class_id)
+        .first_or_404()
+    )
     return c.to_dict(include_students=True), 200
 
 
@@ -81,10 +137,7 @@ def my_teaching_classes():
 
 @classes_bp.get("/options")
 @role_required("admin")
+@cached("classes")
 def get_class_options():
-    classes = Class.query.order_by(Class.name).all()
-    class_options = [
-        {"value": cls.id, "label": f"{cls.name}"}
-        for cls in classes
-    ]
-    return jsonify(class_options), 200
+    rows = db.session.execute(queries.class_options_stmt()).all()
+    return jsonify(queries.build_class_options(rows)), 200
@@ -1,118 +1,77 @@
-from flask import Blueprint, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from sqlalchemy import func
-from .. import db
-from ..models import Class, User, Role, Grade, Enrollment
+from flask import Blueprint, jsonify, request
+from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity
+from .. import activity, db, queries
+from ..analytics import analytics, to_dict as analytics_dict
+from ..models import Class, Semester
 from ..utils import role_required
+from ..cache import cached
+from ..replica import route_reads_to_replica
 
 dashboard_bp = Blueprint("dashboard", __name__)
+dashboard_bp.before_request(route_reads_to_replica)
 
 @dashboard_bp.get("/summary")
 @jwt_required()
+@cached("classes", "users", "enrollments", "grades", "activity")
 def dashboard_summary():
-    total_classes = db.session.query(func.count(Class.id)).scalar()
-    total_students = db.session.query(func.count(User.id)).filter(User.role == Role.student).scalar()
-    total_teachers = db.session.query(func.count(User.id)).filter(User.role == Role.teacher).scalar()
-    average_grade = db.session.query(func.avg(Grade.score)).scalar()
-
-    recent_activity = []
-    recent_enrollments = Enrollment.query.order_by(Enrollment.id.desc()).limit(5).all()
-    for enrollment in recent_enrollments:
-        recent_activity.append({
-            "id": enrollment.id,
-            "description": f"New student {enrollment.student.name} enrolled in {enrollment.class_.name}",
-            "timestamp": enrollment.student.created_at.isoformat()
-        })
-
+    totals = db.session.execute(queries.summary_stmt()).one()
+    return queries.build_summary(totals, activity.feed(5)), 200
+
+# Admin: the activity log, newest first; pass next_before back as ?before= for the next page
+@dashboard_bp.get("/activity")
+@role_required("admin")
+def activity_feed():
+    limit = min(max(request.args.get("limit", 20, type=int), 1), 100)
+    try:
+        before = activity.parse_cursor(request.args["before"]) if request.args.get("before") else None
+    except ValueError:
+        return {"msg": "before must be an ISO timestamp or a next_before cursor"}, 400
+    items = activity.feed(limit, before)
     return {
-        "total_classes": total_classes,
-        "total_students": total_students,
-        "total_teachers": total_teachers,
-        "average_grade": round(average_grade, 2) if average_grade else 0,
-        "recent_activity": recent_activity
+        "events": queries.build_activity(items),
+        "next_before": activity.cursor(items[-1]) if len(items) == limit else None,
     }, 200
 
 @dashboard_bp.get("/teacher-summary")
 @jwt_required()
 @role_required("teacher")
 def teacher_dashboard_summary():
-    teacher_id = get_jwt_identity()
-
-    # Get all classes for the teacher
-    teacher_classes = Class.query.filter_by(teacher_id=teacher_id).all()
-    if not teacher_classes:
-        return jsonify({"total_students": 0, "student_grades": []})
-
-    class_ids = [c.id for c in teacher_classes]
-
-    # Get all unique students in these classes
-    students = db.session.query(User).join(Enrollment).filter(
-        Enrollment.class_id.in_(class_ids)
-    ).distinct().all()
-
-    total_students = len(students)
-
-    student_grades = []
-    for student in students:
-        # Get all enrollments for this student in the teacher's classes
-        enrollments = Enrollment.query.filter(
-            Enrollment.student_id == student.id,
-            Enrollment.class_id.in_(class_ids)
-        ).all()
-        enrollment_ids = [e.id for e in enrollments]
-
-        # Calculate average grade from those enrollments
-        avg_grade = 0
-        if enrollment_ids:
-            avg_grade = db.session.query(func.avg(Grade.score)).filter(
-                Grade.enrollment_id.in_(enrollment_ids)
-            ).scalar()
-
-        student_grades.append({
-            'id': student.id,
-            'name': student.name,
-            'average_grade': round(avg_grade, 2) if avg_grade else 0
-        })
-
-    return jsonify({
-        "total_students": total_students,
-        "student_grades": sorted(student_grades, key=lambda x: x['name'])
-    })
+    rows = db.session.execute(queries.teacher_summary_stmt(get_jwt_identity())).all()
+    return jsonify(queries.build_teacher_summary(rows))
 
 @dashboard_bp.get("/student-summary")
 @jwt_required()
 @role_required("student")
 def student_dashboard_summary():
-    student_id = get_jwt_identity()
-
-    # Get all enrollments for the student
-    enrollments = Enrollment.query.filter_by(student_id=student_id).all()
-    if not enrollments:
-        return jsonify({"total_classes": 0, "overall_average_grade": 0, "class_grades": []})
-
-    total_classes = len(enrollments)
-    enrollment_ids = [e.id for e in enrollments]
-
-    # Calculate overall average grade
-    overall_avg_grade = db.session.query(func.avg(Grade.score)).filter(
-        Grade.enrollment_id.in_(enrollment_ids)
-    ).scalar()
-
-    class_grades = []
-    for enrollment in enrollments:
-        # Get average grade for each class enrollment
-        avg_grade = db.session.query(func.avg(Grade.score)).filter(
-            Grade.enrollment_id == enrollment.id
-        ).scalar()
-
-        class_grades.append({
-            'class_id': enrollment.class_id,
-            'class_name': enrollment.class_.name,
-            'average_grade': round(avg_grade, 2) if avg_grade else 'N/A'
-        })
-
-    return jsonify({
-        "total_classes": total_classes,
-        "overall_average_grade": round(overall_avg_grade, 2) if overall_avg_grade else 0,
-        "class_grades": sorted(class_grades, key=lambda x: x['class_name'])
-    })
+    rows = db.session.execute(queries.student_summary_stmt(get_jwt_identity())).all()
+    return jsonify(queries.build_student_summary(rows))
+
+# Teacher/Admin: score distribution, percentiles, ranks and z-scores of one class
+@dashboard_bp.get("/analytics/class/<int:class_id>")
+@role_required("admin", "teacher")
+def class_analytics(class_id):
+    cls = Class.query.get_or_404(class_id)
+    if get_jwt().get("role") == "teacher" and cls.teacher_id != get_jwt_identity():
+        return {"msg": "You are not the teacher for this class"}, 403
+    return {"histogram_edges": analytics.edges(), **analytics_dict(class_id, analytics.for_class(class_id))}, 200
+
+# Teacher/Admin: the same per class for a whole term; teachers see their own classes
+@dashboard_bp.get("/analytics/term")
+@role_required("admin", "teacher")
+def term_analytics():
+    try:
+        semester = Semester(request.args.get("semester", ""))
+    except ValueError:
+        return {"msg": "Invalid semester"}, 400
+    academic_year = request.args.get("academic_year")
+    if not academic_year:
+        return {"msg": "academic_year is required"}, 400
+    teacher_id = get_jwt_identity() if get_jwt().get("role") == "teacher" else None
+    include_students = request.args.get("students", "0").lower() in ("1", "true", "yes")
+    stats = analytics.for_term(semester, academic_year, teacher_id)
+    return {
+        "semester": semester.value,
+        "academic_year": academic_year,
+        "histogram_edges": analytics.edges(),
+        "classes": [analytics_dict(class_id, s, include_students) for class_id, s in stats.items()],
+    }, 200
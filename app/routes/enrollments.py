@@ -1,12 +1,29 @@
 from flask import Blueprint, request, jsonify
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import joinedload
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
-from .. import db
-from ..models import Enrollment, Class, User, Role, EnrollmentStatus
+from .. import activity, db, grade_stats, registration, rosters, transcripts, waitlist
+from ..models import Enrollment, Class, User, Role, EnrollmentStatus, Semester
 from ..utils import role_required
+from ..loaders import enrollment_options
+from ..cache import invalidates
+from ..principals import current_principal
+from ..registration import registrar, RegistrationBusy
+from ..replica import route_reads_to_replica
 from datetime import datetime
 
 enrollments_bp = Blueprint('enrollments', __name__)
+enrollments_bp.before_request(route_reads_to_replica)
+
+
+def _default_term(now=None):
+    """Semester and academic year for self-enrollment when the client sends none."""
+    now = now or datetime.utcnow()
+    # Academic years run August to July, written like the seed data: "2024/2025"
+    start = now.year if now.month >= 8 else now.year - 1
+    semester = Semester.first_semester if now.month >= 8 or now.month == 1 else Semester.second_semester
+    return semester, f"{start}/{start + 1}"
 
 @enrollments_bp.route('/teacher/enrollments/', methods=['GET'])
 @enrollments_bp.route('/teacher/enrollments', methods=['GET'])
@@ -49,6 +66,7 @@ def get_teacher_enrollments():
 @enrollments_bp.post('/')
 @jwt_required()
 @role_required('admin')
+@invalidates('enrollments')
 def create_enrollment():
     data = request.get_json()
     student_id = data.get('student_id')
@@ -60,18 +78,10 @@ def create_enrollment():
     if not all([student_id, class_id, enrollment_date_str, semester, academic_year]):
         return jsonify({'msg': 'Missing required fields'}), 400
 
-    # Validate student and class
+    # Validate student; the class is checked by the counter update below
     student = User.query.get_or_404(student_id)
     if student.role != Role.student:
         return jsonify({'msg': 'User is not a student'}), 400
-    
-    class_to_enroll = Class.query.get_or_404(class_id)
-
-    # Check for existing enrollment
-    existing_enrollment = Enrollment.query.filter_by(student_id=student_id, class_id=class_id).first()
-    if existing_enrollment:
-        return jsonify({'msg': 'Student is already enrolled in this class'}), 409
-
 
     try:
         enrollment_date = datetime.fromisoformat(enrollment_date_str.replace('Z', '+00:00'))
@@ -86,37 +96,117 @@ def create_enrollment():
         academic_year=academic_year,
         status=EnrollmentStatus.active
     )
-    db.session.add(new_enrollment)
-    db.session.commit()
+    error = _insert(new_enrollment, student.name, 'Student is already enrolled in this class', 409)
+    if error:
+        return error
+
+    return _created(new_enrollment, 'Student enrolled successfully')
+
+
+def _insert(enrollment, student_name, duplicate_msg, duplicate_status):
+    """Count and insert an enrollment and commit. Returns an error response or None.
+
+    The counter update doubles as the class existence and capacity check.
+    When the class is full the enrollment joins the back of the waitlist
+    instead. A duplicate insert rolls the counters back with everything else.
+    """
+    class_name = rosters.take(enrollment.class_id, enrollment.status)
+    if class_name is None:
+        enrollment.status = EnrollmentStatus.waitlisted
+        class_name = rosters.take(enrollment.class_id, enrollment.status)
+        if class_name is None:
+            db.session.rollback()
+            return jsonify({'msg': 'Class not found'}), 404
+        waitlist.enqueue(enrollment)
+    transcripts.touch([enrollment.student_id])
+    db.session.add(enrollment)
+    if enrollment.status is EnrollmentStatus.waitlisted:
+        activity.record("enrollment.waitlisted", f"{student_name} joined the waitlist for {class_name}",
+                        subject_id=enrollment.student_id)
+    else:
+        activity.record("enrollment.created", f"New student {student_name} enrolled in {class_name}",
+                        subject_id=enrollment.student_id)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # uq_enrollments_student_class, possibly lost to a concurrent request
+        db.session.rollback()
+        return jsonify({'msg': duplicate_msg}), duplicate_status
+    return None
+
 
-    return jsonify({'msg': 'Student enrolled successfully', 'enrollment': new_enrollment.to_dict()}), 201
+def _created(enrollment, msg):
+    if enrollment.status is EnrollmentStatus.waitlisted:
+        return jsonify({'msg': 'Class is full; added to the waitlist', 'enrollment': enrollment.to_dict(),
+                        'waitlist_position': waitlist.rank(enrollment)}), 202
+    return jsonify({'msg': msg, 'enrollment': enrollment.to_dict()}), 201
 
 
 @enrollments_bp.route('/enroll/<int:class_id>', methods=['POST'])
 @jwt_required()
 @role_required('student')
+@invalidates('enrollments')
 def enroll_in_class(class_id):
-    student_id = get_jwt_identity()
-    class_to_enroll = Class.query.get_or_404(class_id)
+    data = request.get_json(silent=True) or {}
+    semester, academic_year = _default_term()
+    try:
+        semester = Semester(data.get('semester', semester))
+    except ValueError:
+        return jsonify({'msg': 'Invalid semester'}), 400
+    academic_year = data.get('academic_year', academic_year)
 
+    if registrar.enabled:
+        return _enroll_queued(class_id, get_jwt_identity(), semester, academic_year)
 
-    existing_enrollment = Enrollment.query.filter_by(student_id=student_id, class_id=class_id).first()
-    if existing_enrollment:
-        return jsonify({'msg': 'Already enrolled in this class'}), 400
+    student = current_principal()
+    if student is None:
+        return jsonify({'msg': 'User not found'}), 404
+
+    enrollment = Enrollment(
+        student_id=student.id,
+        class_id=class_id,
+        semester=semester,
+        academic_year=academic_year,
+        status=EnrollmentStatus.active
+    )
+    error = _insert(enrollment, student.name, 'Already enrolled in this class', 400)
+    if error:
+        return error
+
+    return _created(enrollment, 'Enrolled successfully')
 
-    enrollment = Enrollment(student_id=student_id, class_id=class_id)
-    db.session.add(enrollment)
-    db.session.commit()
 
-    return jsonify({'msg': 'Enrolled successfully', 'enrollment': enrollment.to_dict()}), 201
+QUEUED_RESPONSES = {
+    registration.ENROLLED: ('Enrolled successfully', 201),
+    registration.WAITLISTED: ('Class is full; added to the waitlist', 202),
+    registration.DUPLICATE: ('Already enrolled in this class', 400),
+    registration.NOT_FOUND: ('Class or student not found', 404),
+    registration.FAILED: ('Registration failed; please try again', 503),
+}
+
+
+def _enroll_queued(class_id, student_id, semester, academic_year):
+    try:
+        ticket = registrar.submit(class_id, student_id, semester, academic_year)
+    except RegistrationBusy as e:
+        return jsonify({'msg': str(e)}), 503, {'Retry-After': '1'}
+    msg, status = QUEUED_RESPONSES[ticket.result]
+    body = {'msg': msg, 'result': ticket.result, 'ticket': ticket.sequence}
+    if ticket.enrollment:
+        body['enrollment'] = ticket.enrollment
+    return jsonify(body), status
 
 @enrollments_bp.route('/my-classes', methods=['GET'])
 @jwt_required()
 @role_required('student')
 def get_my_classes():
     student_id = get_jwt_identity()
-    enrollments = Enrollment.query.filter_by(student_id=student_id).all()
-    
+    enrollments = (
+        Enrollment.query.options(*enrollment_options(include_student=False, include_class=True))
+        .filter_by(student_id=student_id)
+        .all()
+    )
+
     enrolled_classes = []
     for enrollment in enrollments:
         class_info = {
@@ -131,11 +221,22 @@ def get_my_classes():
 @enrollments_bp.route('/drop/<int:class_id>', methods=['DELETE'])
 @jwt_required()
 @role_required('student')
+@invalidates('enrollments', 'grades')
 def drop_class(class_id):
     student_id = get_jwt_identity()
     enrollment = Enrollment.query.filter_by(student_id=student_id, class_id=class_id).first_or_404()
 
+    status = enrollment.status
+    waitlist.leave(enrollment)
     db.session.delete(enrollment)
+    rosters.release(class_id, status)
+    # The enrollment's grades go with it
+    grade_stats.touch([class_id])
+    transcripts.touch([student_id])
+    activity.record("enrollment.dropped", f"{enrollment.student.name} dropped {enrollment.class_.name}",
+                    subject_id=student_id)
+    if status in rosters.SEATED:
+        waitlist.promote(class_id)
     db.session.commit()
 
     return jsonify({'msg': 'Successfully dropped class'}), 200
@@ -146,12 +247,17 @@ def drop_class(class_id):
 @jwt_required()
 @role_required('admin', 'teacher')
 def get_class_enrollments(class_id):
-    enrollments = Enrollment.query.filter_by(class_id=class_id).all()
-    return jsonify([e.to_dict(include_student=True) for e in enrollments]), 200
+    enrollments = (
+        Enrollment.query.options(*enrollment_options())
+        .filter_by(class_id=class_id)
+        .all()
+    )
+    return jsonify([e.to_dict() for e in enrollments]), 200
 
 @enrollments_bp.route('/<int:enrollment_id>/update-status', methods=['PUT'])
 @jwt_required()
 @role_required('admin', 'teacher')
+@invalidates('enrollments')
 def update_enrollment_status(enrollment_id):
     enrollment = Enrollment.query.get_or_404(enrollment_id)
     data = request.get_json()
@@ -160,7 +266,64 @@ def update_enrollment_status(enrollment_id):
     if not new_status or new_status not in [status.value for status in EnrollmentStatus]:
         return jsonify({'msg': 'Invalid status provided'}), 400
 
-    enrollment.status = EnrollmentStatus(new_status)
+    new_status, old_status = EnrollmentStatus(new_status), enrollment.status
+    if new_status is old_status:
+        return jsonify({'msg': 'Enrollment status updated', 'enrollment': enrollment.to_dict()}), 200
+    demoted = old_status in rosters.SEATED and new_status is EnrollmentStatus.waitlisted
+    if demoted and waitlist.head(enrollment.class_id) is None:
+        # The freed seat would go straight back to them
+        return jsonify({'msg': 'Nobody is waiting for a seat in this class'}), 409
+    if not rosters.move(enrollment.class_id, old_status, new_status):
+        return jsonify({'msg': 'Class is full'}), 409
+    waitlist.leave(enrollment)
+    if new_status is EnrollmentStatus.waitlisted:
+        waitlist.enqueue(enrollment)
+    enrollment.status = new_status
+    transcripts.touch([enrollment.student_id])
+    activity.record("enrollment.status_changed",
+                    f"{enrollment.student.name} is now {new_status.value} in {enrollment.class_.name}",
+                    subject_id=enrollment.student_id)
+    if old_status in rosters.SEATED and new_status not in rosters.SEATED:
+        waitlist.promote(enrollment.class_id, exclude=enrollment.id)
     db.session.commit()
 
     return jsonify({'msg': 'Enrollment status updated', 'enrollment': enrollment.to_dict()}), 200
+
+
+# Student: place in the waitlist of a class
+@enrollments_bp.route('/waitlist/<int:class_id>', methods=['GET'])
+@jwt_required()
+@role_required('student')
+def my_waitlist_position(class_id):
+    enrollment = Enrollment.query.filter_by(student_id=get_jwt_identity(), class_id=class_id).first_or_404()
+    if enrollment.status is not EnrollmentStatus.waitlisted:
+        return jsonify({'msg': 'Not on the waitlist', 'status': enrollment.status.value}), 404
+    waiting = db.session.execute(select(Class.waitlisted_count).where(Class.id == class_id)).scalar()
+    return jsonify({'position': waitlist.rank(enrollment), 'waitlist_length': waiting}), 200
+
+
+# Admin/Teacher: the waitlist in order; pass next_after back as ?after= for the next page
+@enrollments_bp.route('/class/<int:class_id>/waitlist', methods=['GET'])
+@jwt_required()
+@role_required('admin', 'teacher')
+def get_class_waitlist(class_id):
+    limit = min(max(request.args.get('limit', 50, type=int), 1), 500)
+    after = request.args.get('after', type=int)
+    first = waitlist.head(class_id)
+    query = (
+        select(Enrollment.id, Enrollment.waitlist_position, User.id, User.name)
+        .join(User, User.id == Enrollment.student_id)
+        .where(Enrollment.class_id == class_id, Enrollment.waitlist_position.is_not(None))
+        .order_by(Enrollment.waitlist_position)
+        .limit(limit)
+    )
+    if after is not None:
+        query = query.where(Enrollment.waitlist_position > after)
+    rows = db.session.execute(query).all()
+    return jsonify({
+        'waitlist': [
+            {'enrollment_id': eid, 'position': pos - first + 1, 'student': {'id': sid, 'name': name}}
+            for eid, pos, sid, name in rows
+        ],
+        'next_after': rows[-1][1] if len(rows) == limit else None,
+    }), 200
@@ -0,0 +1,31 @@
+from flask import Blueprint, current_app, request, stream_with_context
+from ..utils import role_required
+from ..export import FORMATS, export_gradebook
+from ..replica import route_reads_to_replica
+
+exports_bp = Blueprint("exports", __name__)
+exports_bp.before_request(route_reads_to_replica)
+
+
+# Admin: stream the gradebook of one class, one academic year or the whole school
+@exports_bp.get("/gradebook")
+@role_required("admin")
+def gradebook():
+    fmt = request.args.get("format", "ndjson")
+    if fmt not in FORMATS:
+        return {"msg": f"format must be one of: {', '.join(FORMATS)}"}, 400
+    class_id = request.args.get("class_id", type=int)
+    academic_year = request.args.get("academic_year")
+    compress = "gzip" in request.headers.get("Accept-Encoding", "")
+
+    chunks = export_gradebook(fmt, class_id, academic_year, compress,
+                              current_app.config.get("EXPORT_BATCH_SIZE", 1000))
+    scope = f"class-{class_id}" if class_id else "school"
+    if academic_year:
+        scope += "-" + academic_year.replace("/", "-")
+    response = current_app.response_class(stream_with_context(chunks), mimetype=FORMATS[fmt])
+    response.headers["Content-Disposition"] = f'attachment; filename="gradebook-{scope}.{fmt}"'
+    response.headers["Vary"] = "Accept-Encoding"
+    if compress:
+        response.headers["Content-Encoding"] = "gzip"
+    return response
@@ -1,13 +1,16 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity
-from .. import db
-from ..models import Grade, Enrollment, Class, User
+from sqlalchemy import delete, insert, update
+from .. import activity, db, grade_stats, rosters
+from ..models import Grade, Enrollment, EnrollmentStatus, Class, User
 from ..utils import role_required
+from ..cache import invalidates
 
 grades_bp = Blueprint("grades", __name__)
 
 @grades_bp.post("/")
 @jwt_required()
+@invalidates("grades")
 def create_grade():
     data = request.get_json() or {}
     enrollment_id = data.get("enrollment_id")
@@ -22,14 +25,20 @@ def create_grade():
     user_id = int(claims.get("sub"))
     if e.class_.teacher_id != user_id:
         return {"msg": "Only the class teacher can submit grades"}, 403
+    if e.status is EnrollmentStatus.waitlisted:
+        return {"msg": "Waitlisted students cannot be graded"}, 409
 
     g = Grade(enrollment_id=e.id, score=float(score), remarks=remarks)
     db.session.add(g)
+    grade_stats.grade_added(e, g.score)
+    activity.record("grade.created", f"{e.student.name} was graded {g.score:g} in {e.class_.name}",
+                    subject_id=e.student_id)
     db.session.commit()
     return {"msg": "grade created", "grade": g.to_dict()}, 201
 
 @grades_bp.put("/<int:grade_id>")
 @jwt_required()
+@invalidates("grades")
 def update_grade(grade_id):
     g = Grade.query.get_or_404(grade_id)
     e = g.enrollment
@@ -40,9 +49,13 @@ def update_grade(grade_id):
 
     data = request.get_json() or {}
     if "score" in data:
+        old_score = g.score
         g.score = float(data["score"])
+        grade_stats.grade_changed(e, old_score, g.score)
     if "remarks" in data:
         g.remarks = data["remarks"]
+    activity.record("grade.updated", f"{e.student.name}'s grade in {e.class_.name} was updated",
+                    subject_id=e.student_id)
     db.session.commit()
     return {"msg": "grade updated", "grade": g.to_dict()}, 200
 
@@ -55,6 +68,7 @@ def list_for_enrollment(enrollment_id):
 
 @grades_bp.post("/class/<int:class_id>")
 @role_required("teacher")
+@invalidates("grades")
 def batch_update_grades(class_id):
     teacher_id = get_jwt_identity()
     cls = Class.query.get_or_404(class_id)
@@ -67,34 +81,82 @@ def batch_update_grades(class_id):
     if not isinstance(grades_to_update, dict):
         return {"msg": "Invalid payload format"}, 400
 
+    # Parse the payload up front so the database work can be set-based
+    outcomes = []
+    scores = {}
     for student_id_str, score_str in grades_to_update.items():
         try:
             student_id = int(student_id_str)
             score = float(score_str) if score_str else None
         except (ValueError, TypeError):
-            continue # Skip invalid entries
-
-        enrollment = Enrollment.query.filter_by(
-            class_id=class_id, student_id=student_id
-        ).first()
-
-        if not enrollment:
-            continue # Skip if student is not enrolled
-
-        grade = Grade.query.filter_by(enrollment_id=enrollment.id).first()
-
-        if score is not None:
-            if grade:
-                grade.score = score
+            outcomes.append({"student_id": student_id_str, "outcome": "skipped", "reason": "invalid entry"})
+            continue
+        scores[student_id] = score
+
+    # One IN query for the enrollments, one for their existing grades
+    enrollments, unseated = {}, set()
+    if scores:
+        rows = db.session.query(Enrollment.student_id, Enrollment.id, Enrollment.status).filter(
+            Enrollment.class_id == class_id, Enrollment.student_id.in_(scores)
+        )
+        for student_id, enrollment_id, status in rows:
+            if status in rosters.SEATED:
+                enrollments[student_id] = enrollment_id
             else:
-                new_grade = Grade(enrollment_id=enrollment.id, score=score)
-                db.session.add(new_grade)
-        elif grade:
+                unseated.add(student_id)
+    existing = {}
+    if enrollments:
+        rows = db.session.query(Grade.enrollment_id, Grade.id).filter(
+            Grade.enrollment_id.in_(enrollments.values())
+        ).order_by(Grade.id)
+        for enrollment_id, grade_id in rows:
+            existing.setdefault(enrollment_id, grade_id)
+
+    to_insert, to_update, to_delete = [], [], []
+    for student_id, score in scores.items():
+        enrollment_id = enrollments.get(student_id)
+        if student_id in unseated:
+            outcomes.append({"student_id": student_id, "outcome": "skipped", "reason": "not seated"})
+            continue
+        if enrollment_id is None:
+            outcomes.append({"student_id": student_id, "outcome": "skipped", "reason": "not enrolled"})
+            continue
+        grade_id = existing.get(enrollment_id)
+        if score is not None and grade_id:
+            to_update.append({"id": grade_id, "score": score})
+            outcomes.append({"student_id": student_id, "outcome": "updated", "grade_id": grade_id, "score": score})
+        elif score is not None:
+            to_insert.append({"enrollment_id": enrollment_id, "score": score, "remarks": ""})
+            outcomes.append({"student_id": student_id, "outcome": "created", "score": score})
+        elif grade_id:
             # If score is empty/null and grade exists, delete it
-            db.session.delete(grade)
-
+            to_delete.append(grade_id)
+            outcomes.append({"student_id": student_id, "outcome": "deleted", "grade_id": grade_id})
+        else:
+            outcomes.append({"student_id": student_id, "outcome": "skipped", "reason": "no grade"})
+
+    if to_update:
+        db.session.execute(update(Grade), to_update)
+    if to_insert:
+        created = db.session.execute(
+            insert(Grade).returning(Grade.enrollment_id, Grade.id), to_insert
+        ).all()
+        created_ids = dict(created)
+        for outcome in outcomes:
+            if outcome["outcome"] == "created":
+                outcome["grade_id"] = created_ids.get(enrollments[outcome["student_id"]])
+    if to_delete:
+        db.session.execute(
+            delete(Grade).where(Grade.id.in_(to_delete)).execution_options(synchronize_session=False)
+        )
+
+    grade_stats.refresh(enrollments[s] for s in scores if s in enrollments)
+    changed = len(to_insert) + len(to_update) + len(to_delete)
+    if changed:
+        activity.record("grades.batch_updated", f"{changed} grades updated in {cls.name}", subject_id=cls.id)
     db.session.commit()
-    return {"msg": "Grades updated successfully"}, 200
-
-
 
+    summary = {}
+    for outcome in outcomes:
+        summary[outcome["outcome"]] = summary.get(outcome["outcome"], 0) + 1
+    return {"msg": "Grades updated successfully", "summary": summary, "results": outcomes}, 200
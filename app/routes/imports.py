@@ -0,0 +1,53 @@
+from flask import Blueprint, current_app, request
+from ..utils import role_required
+from ..cache import invalidates
+from ..importer import IMPORTERS, ImportFormatError, parse, run_import
+
+imports_bp = Blueprint("imports", __name__)
+
+CONTENT_TYPES = {"text/csv": "csv", "application/x-ndjson": "ndjson", "application/json": "json"}
+
+
+def _size(name, default):
+    """Read an optional ?name= row count. Raises ValueError unless it is an integer >= 1."""
+    value = request.args.get(name)
+    if value is None:
+        return default
+    try:
+        value = int(value)
+    except ValueError:
+        value = 0
+    if value < 1:
+        raise ValueError(f"{name} must be a positive integer")
+    return value
+
+
+# Admin: bulk-create users, classes or enrollments from a CSV, JSON or NDJSON body
+@imports_bp.post("/<kind>")
+@role_required("admin")
+@invalidates("users", "classes", "enrollments")
+def bulk_import(kind):
+    if kind not in IMPORTERS:
+        return {"msg": f"kind must be one of: {', '.join(IMPORTERS)}"}, 404
+    fmt = request.args.get("format") or CONTENT_TYPES.get(request.mimetype)
+    if fmt is None:
+        return {"msg": "Send text/csv, application/json or application/x-ndjson, or pass ?format="}, 400
+
+    config = current_app.config
+    try:
+        chunk_size = _size("chunk_size", config["IMPORT_CHUNK_SIZE"])
+        transaction_size = _size("transaction_size", config["IMPORT_TRANSACTION_SIZE"])
+    except ValueError as e:
+        return {"msg": str(e)}, 400
+    try:
+        report = run_import(
+            kind,
+            parse(request.stream, fmt),
+            chunk_size=chunk_size,
+            transaction_size=transaction_size,
+            dry_run=request.args.get("dry_run", "").lower() == "true",
+            max_errors=config["IMPORT_MAX_ERRORS"],
+        )
+    except ImportFormatError as e:
+        return {"msg": str(e)}, 400
+    return report.to_dict(), 200
@@ -0,0 +1,67 @@
+from flask import Blueprint, current_app, request, stream_with_context
+from flask_jwt_extended import get_jwt_identity
+from ..export import gzip_chunks, ndjson_chunks
+from ..models import User, Role
+from ..transcripts import service
+from ..utils import role_required
+from ..replica import route_reads_to_replica
+
+transcripts_bp = Blueprint("transcripts", __name__)
+transcripts_bp.before_request(route_reads_to_replica)
+
+
+def _scale():
+    """The ?scale= name, or None for the configured default. Raises ValueError if unknown."""
+    name = request.args.get("scale")
+    if name is not None and name not in service.scales:
+        raise ValueError(f"scale must be one of: {', '.join(service.scales)}")
+    return name
+
+
+# Student: their own transcript
+@transcripts_bp.get("/me")
+@role_required("student")
+def my_transcript():
+    try:
+        scale = _scale()
+    except ValueError as e:
+        return {"msg": str(e)}, 400
+    student_id = get_jwt_identity()
+    return {"student_id": student_id, **service.for_student(student_id, scale)}, 200
+
+
+# Admin: any student's transcript
+@transcripts_bp.get("/student/<int:student_id>")
+@role_required("admin")
+def student_transcript(student_id):
+    try:
+        scale = _scale()
+    except ValueError as e:
+        return {"msg": str(e)}, 400
+    student = User.query.get_or_404(student_id)
+    if student.role != Role.student:
+        return {"msg": "User is not a student"}, 400
+    return {"student_id": student_id, "student_name": student.name, **service.for_student(student_id, scale)}, 200
+
+
+# Admin: stream one NDJSON transcript per student, for everyone enrolled in ?academic_year= or the whole school
+@transcripts_bp.get("/cohort")
+@role_required("admin")
+def cohort_transcripts():
+    try:
+        scale = _scale()
+    except ValueError as e:
+        return {"msg": str(e)}, 400
+    academic_year = request.args.get("academic_year")
+    compress = "gzip" in request.headers.get("Accept-Encoding", "")
+
+    chunks = ndjson_chunks(service.cohort(academic_year, scale, current_app.config.get("EXPORT_BATCH_SIZE", 1000)))
+    if compress:
+        chunks = gzip_chunks(chunks)
+    scope = academic_year.replace("/", "-") if academic_year else "school"
+    response = current_app.response_class(stream_with_context(chunks), mimetype="application/x-ndjson")
+    response.headers["Content-Disposition"] = f'attachment; filename="transcripts-{scope}.ndjson"'
+    response.headers["Vary"] = "Accept-Encoding"
+    if compress:
+        response.headers["Content-Encoding"] = "gzip"
+    return response
@@ -2,60 +2,73 @@ import logging
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from ..models import User, Role
-from ..utils import role_required
-from .. import db
+from ..utils import role_required, parse_list_args, keyset_page
+from ..serializers import USER_FIELDS, user_plan, json_response
+from ..principals import current_principal
+from ..cache import cached, invalidates
+from .. import activity, db, queries
+from ..replica import route_reads_to_replica
 
 users_bp = Blueprint("users", __name__)
+users_bp.before_request(route_reads_to_replica)
 
 
 @users_bp.get("/me")
 @jwt_required()
 def me():
-    uid = get_jwt_identity()
-    user = User.query.get(int(uid))
-    return user.to_dict(), 200
+    principal = current_principal()
+    if not principal:
+        return {"msg": "User not found"}, 404
+    return principal.to_dict(), 200
 
 #  Admin: List all users
 @users_bp.get("/")
 @users_bp.get("")
 @role_required("admin")
 def list_users():
+    try:
+        fields, limit, cursor, unpaginated = parse_list_args(USER_FIELDS)
+    except ValueError as e:
+        return {"msg": str(e)}, 400
+
+    # Only the requested columns are selected, and rows go straight to JSON
+    plan = user_plan(tuple(fields) if fields else USER_FIELDS)
     role = request.args.get("role")
-    query = User.query
+    query = plan.query(db.session)
     if role:
         try:
             role_enum = Role(role)
-            query = query.filter_by(role=role_enum)
+            query = query.filter(User.role == role_enum)
         except ValueError:
             return {"msg": f"Invalid role: {role}"}, 400
-    users = query.all()
-    return {"users": [u.to_dict() for u in users]}, 200
+
+    # ?all=true keeps the original unpaginated response
+    if unpaginated:
+        return json_response({"users": plan.dicts(query.all())})
+
+    rows, next_cursor = keyset_page(query, User.id, limit, cursor, key=lambda row: row[0])
+    return json_response({"users": plan.dicts(rows), "next_cursor": next_cursor})
 
 
 @users_bp.get("/students")
 @role_required("admin")
+@cached("users")
 def list_students():
-    students = User.query.filter_by(role=Role.student).all()
-    student_options = [
-        {"value": student.id, "label": f"{student.name} - ID: {student.id:03d}"}
-        for student in students
-    ]
-    return jsonify(student_options), 200
+    rows = db.session.execute(queries.user_options_stmt(Role.student)).all()
+    return jsonify(queries.build_student_options(rows)), 200
 
 
 @users_bp.get("/teachers")
 @role_required("admin")
+@cached("users")
 def list_teachers():
-    teachers = User.query.filter_by(role=Role.teacher).all()
-    teacher_options = [
-        {"value": teacher.id, "label": teacher.name}
-        for teacher in teachers
-    ]
-    return jsonify(teacher_options), 200
+    rows = db.session.execute(queries.user_options_stmt(Role.teacher)).all()
+    return jsonify(queries.build_teacher_options(rows)), 200
 
 # Admin: Create a new Student or Teacher
 @users_bp.post("/")
 @role_required("admin")
+@invalidates("users")
 def create_user():
     data = request.get_json() or {}
 
@@ -74,6 +87,8 @@ def create_user():
     new_user.set_password(password)
 
     db.session.add(new_user)
+    db.session.flush()
+    activity.record("user.created", f"New {new_user.role.value} {name} was added", subject_id=new_user.id)
     db.session.commit()
 
     return {
@@ -0,0 +1,118 @@
+"""Row-to-JSON serialization for list endpoints.
+
+A FieldPlan is compiled once per (model, fields) and turns rows of
+selected columns straight into JSON bytes, skipping ORM object
+construction and the per-object to_dict calls. orjson is used when it
+is installed; it handles enums and datetimes natively, so no per-value
+conversion runs on that path.
+"""
+import json
+from functools import lru_cache
+
+import sqlalchemy as sa
+from flask import current_app
+from sqlalchemy.orm import aliased
+
+from .models import User, Class, Enrollment, Grade
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+def _converter(column):
+    if isinstance(column.type, sa.Enum):
+        return lambda v: v.value
+    if isinstance(column.type, sa.DateTime):
+        return lambda v: v.isoformat()
+    return None
+
+
+class FieldPlan:
+    """Selected columns of one entity, plus nested plans joined onto it.
+
+    The entity's primary key is always selected first (as the row key
+    used for keyset cursors) even when "id" is not among the fields.
+    """
+
+    def __init__(self, entity, fields, nested=None):
+        self.entity = entity
+        self.fields = tuple(fields)
+        self.nested = dict(nested or {})
+        own = [getattr(entity, f) for f in self.fields]
+        self.columns = [entity.id.label(None), *own]
+        for plan, _ in self.nested.values():
+            self.columns.extend(plan.columns)
+        self.width = len(self.columns)
+        self._steps = [(name, _converter(col)) for name, col in zip(self.fields, own)]
+        self._plain = [name for name, _ in self._steps]
+
+    def query(self, session):
+        query = session.query(*self.columns).select_from(self.entity)
+        for plan, onclause in self.nested.values():
+            query = query.outerjoin(plan.entity, onclause)
+        return query
+
+    def to_dict(self, row, offset=0, convert=True):
+        if row[offset] is None:
+            return None
+        values = row[offset + 1:offset + 1 + len(self._steps)]
+        if convert:
+            data = {
+                name: conv(v) if conv and v is not None else v
+                for (name, conv), v in zip(self._steps, values)
+            }
+        else:
+            data = dict(zip(self._plain, values))
+        i = offset + 1 + len(self._steps)
+        for name, (plan, _) in self.nested.items():
+            data[name] = plan.to_dict(row, i, convert)
+            i += plan.width
+        return data
+
+    def dicts(self, rows):
+        # orjson serializes enums and datetimes itself
+        convert = orjson is None
+        return [self.to_dict(row, 0, convert) for row in rows]
+
+
+USER_FIELDS = ("id", "name", "email", "role", "created_at")
+CLASS_FIELDS = ("id", "name", "description", "teacher", "capacity",
+                "active_count", "pending_count", "dropped_count", "waitlisted_count")
+ENROLLMENT_FIELDS = ("id", "status", "class_id", "enrollment_date", "semester", "academic_year")
+GRADE_FIELDS = ("id", "enrollment_id", "score", "remarks")
+
+
+@lru_cache(maxsize=64)
+def user_plan(fields=USER_FIELDS):
+    return FieldPlan(User, fields)
+
+
+@lru_cache(maxsize=64)
+def class_plan(fields=CLASS_FIELDS):
+    nested = {}
+    if "teacher" in fields:
+        teacher = aliased(User)
+        nested["teacher"] = (FieldPlan(teacher, USER_FIELDS), teacher.id == Class.teacher_id)
+    return FieldPlan(Class, [f for f in fields if f != "teacher"], nested)
+
+
+@lru_cache(maxsize=64)
+def enrollment_plan(fields=ENROLLMENT_FIELDS):
+    return FieldPlan(Enrollment, fields)
+
+
+@lru_cache(maxsize=64)
+def grade_plan(fields=GRADE_FIELDS):
+    return FieldPlan(Grade, fields)
+
+
+def dumps(payload):
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, separators=(",", ":")).encode()
+
+
+def json_response(payload, status=200):
+    return current_app.response_class(dumps(payload), status=status, mimetype="application/json")
@@ -0,0 +1,89 @@
+"""Engine options and startup validation for the settings in config.py."""
+import logging
+
+from sqlalchemy.engine import make_url
+
+from config import INSECURE_DEFAULTS
+
+
+class ConfigError(Exception):
+    pass
+
+
+def _in_memory(url):
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def engine_options(config, async_driver=False):
+    """Build SQLALCHEMY_ENGINE_OPTIONS from the DB_* settings.
+
+    In-memory SQLite gets none: it runs on a single shared connection.
+    """
+    url = make_url(config["SQLALCHEMY_DATABASE_URI"])
+    if _in_memory(url):
+        return {}
+
+    options = {
+        "pool_size": config["DB_POOL_SIZE"],
+        "max_overflow": config["DB_MAX_OVERFLOW"],
+        "pool_timeout": config["DB_POOL_TIMEOUT"],
+        "pool_recycle": config["DB_POOL_RECYCLE"],
+        "pool_pre_ping": config["DB_POOL_PRE_PING"],
+    }
+    timeout = config["DB_STATEMENT_TIMEOUT_MS"]
+    if timeout and url.get_backend_name() == "postgresql":
+        if async_driver:
+            options["connect_args"] = {"server_settings": {"statement_timeout": str(timeout)}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={timeout}"}
+    if not async_driver and config.get("POOL_METRICS_ENABLED"):
+        from .pool import TimedQueuePool
+        options["poolclass"] = TimedQueuePool
+    return options
+
+
+def validate(config):
+    """Raise ConfigError for settings the app cannot start with."""
+    errors = []
+    try:
+        url = make_url(config["SQLALCHEMY_DATABASE_URI"])
+    except Exception as e:
+        raise ConfigError(f"SQLALCHEMY_DATABASE_URI is not a database URL: {e}")
+    if url.get_backend_name() not in ("sqlite", "postgresql"):
+        errors.append(f"unsupported database backend {url.get_backend_name()!r}")
+    replica = config.get("SQLALCHEMY_REPLICA_URI")
+    if replica and make_url(replica).get_backend_name() != url.get_backend_name():
+        errors.append("SQLALCHEMY_REPLICA_URI must use the same backend as the primary")
+    if config.get("REPLICA_STICKY_SECONDS", 0) < 0:
+        errors.append("REPLICA_STICKY_SECONDS must not be negative")
+
+    if config["DB_POOL_SIZE"] < 1:
+        errors.append("DB_POOL_SIZE must be at least 1")
+    if config["DB_MAX_OVERFLOW"] < 0:
+        errors.append("DB_MAX_OVERFLOW must not be negative")
+    if config["DB_POOL_TIMEOUT"] <= 0:
+        errors.append("DB_POOL_TIMEOUT must be positive")
+    if config["DB_STATEMENT_TIMEOUT_MS"] < 0:
+        errors.append("DB_STATEMENT_TIMEOUT_MS must not be negative")
+    if config["WEB_CONCURRENCY"] < 1:
+        errors.append("WEB_CONCURRENCY must be at least 1")
+    if config.get("ANALYTICS_HISTOGRAM_BINS", 10) < 1:
+        errors.append("ANALYTICS_HISTOGRAM_BINS must be at least 1")
+
+    if config.get("ENV_NAME") == "production":
+        for key, insecure in INSECURE_DEFAULTS.items():
+            if config[key] == insecure:
+                errors.append(f"{key} must be set in production")
+        if _in_memory(url):
+            errors.append("production cannot run on an in-memory database")
+
+    if errors:
+        raise ConfigError("Invalid configuration: " + "; ".join(errors))
+
+    if url.get_backend_name() == "postgresql":
+        budget = config["WEB_CONCURRENCY"] * (config["DB_POOL_SIZE"] + config["DB_MAX_OVERFLOW"])
+        if budget > config["DB_MAX_CONNECTIONS"]:
+            logging.warning(
+                f"{config['WEB_CONCURRENCY']} workers x (DB_POOL_SIZE + DB_MAX_OVERFLOW) = {budget} "
+                f"connections exceeds DB_MAX_CONNECTIONS ({config['DB_MAX_CONNECTIONS']})"
+            )
@@ -0,0 +1,102 @@
+from datetime import datetime, timedelta
+
+from app import db
+from app.activity import buffer, feed, record
+from app.cache import response_cache
+from app.models import ActivityEvent, Role
+from app.conftest import make_user, make_class, enroll
+
+
+def test_write_routes_log_events_and_summary_shows_them(client, auth_headers):
+    admin = make_user("Admin", role=Role.admin)
+    teacher = make_user("Teacher", role=Role.teacher)
+    ann = make_user("Ann")
+    math = make_class("Math", teacher)
+    db.session.commit()
+
+    response = client.post("/api/enrollments/", headers=auth_headers(admin), json={
+        "student_id": ann.id, "class_id": math.id, "enrollment_date": "2024-09-02T08:00:00Z",
+        "semester": "first_semester", "academic_year": "2024/2025"})
+    assert response.status_code == 201
+    enrollment_id = response.get_json()["enrollment"]["id"]
+    assert client.post("/api/grades/", headers=auth_headers(teacher),
+                       json={"enrollment_id": enrollment_id, "score": 88}).status_code == 201
+    assert client.post("/api/users/", headers=auth_headers(admin),
+                       json={"name": "Bob", "email": "bob@test.local", "password": "pw"}).status_code == 201
+
+    recent = client.get("/api/dashboard/summary", headers=auth_headers(admin)).get_json()["recent_activity"]
+    assert [(e["kind"], e["description"]) for e in recent] == [
+        ("user.created", "New student Bob was added"),
+        ("grade.created", "Ann was graded 88 in Math"),
+        ("enrollment.created", "New student Ann enrolled in Math"),
+    ]
+    assert recent[2]["actor_id"] == admin.id and recent[2]["subject_id"] == ann.id
+    assert ActivityEvent.query.count() == 3
+
+
+def test_rolled_back_events_are_not_published(app):
+    record("user.created", "Ghost")
+    db.session.rollback()
+    record("user.created", "Real")
+    db.session.commit()
+    assert [e["description"] for e in feed()] == ["Real"]
+
+
+def test_feed_pages_by_timestamp_past_the_buffer(client, auth_headers):
+    admin = make_user("Admin", role=Role.admin)
+    start = datetime(2024, 9, 1)
+    db.session.add_all([ActivityEvent(kind="test", description=f"event {i}",
+                                      created_at=start + timedelta(minutes=i // 2)) for i in range(12)])
+    db.session.commit()
+    buffer.resize(5)
+
+    seen, before = [], None
+    while True:
+        params = {"limit": 4, **({"before": before} if before else {})}
+        body = client.get("/api/dashboard/activity", query_string=params, headers=auth_headers(admin)).get_json()
+        seen += [e["description"] for e in body["events"]]
+        before = body["next_before"]
+        if before is None:
+            break
+    assert seen == [f"event {i}" for i in reversed(range(12))]
+
+    body = client.get("/api/dashboard/activity", query_string={"before": "2024-09-01T00:02:00"},
+                      headers=auth_headers(admin)).get_json()
+    assert [e["description"] for e in body["events"]] == ["event 3", "event 2", "event 1", "event 0"]
+    assert client.get("/api/dashboard/activity", query_string={"before": "yesterday"},
+                      headers=auth_headers(admin)).status_code == 400
+    assert client.get("/api/dashboard/activity", headers=auth_headers(make_user("Eve"))).status_code == 403
+
+
+def test_buffer_serves_commits_without_queries_and_reloads_after_foreign_writes(app, statements):
+    record("user.created", "one")
+    db.session.commit()
+    assert [e["description"] for e in feed()] == ["one"]
+
+    record("user.created", "two")
+    db.session.commit()
+    statements.clear()
+    assert [e["description"] for e in feed()] == ["two", "one"]
+    assert statements == []
+
+    # Another worker wrote and bumped the shared version
+    db.session.add(ActivityEvent(kind="test", description="elsewhere", created_at=datetime.utcnow()))
+    db.session.commit()
+    response_cache.bump("activity")
+    assert [e["description"] for e in feed()] == ["elsewhere", "two", "one"]
+
+
+def test_enrollment_status_and_drop_are_logged(client, auth_headers):
+    teacher = make_user("Teacher", role=Role.teacher)
+    ann = make_user("Ann")
+    math = make_class("Math", teacher)
+    enrollment = enroll(ann, math)
+    db.session.commit()
+
+    client.put(f"/api/enrollments/{enrollment.id}/update-status", headers=auth_headers(teacher),
+               json={"status": "pending"})
+    client.delete(f"/api/enrollments/drop/{math.id}", headers=auth_headers(ann))
+    assert [(e["kind"], e["description"]) for e in feed()] == [
+        ("enrollment.dropped", "Ann dropped Math"),
+        ("enrollment.status_changed", "Ann is now pending in Math"),
+    ]
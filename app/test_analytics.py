@@ -0,0 +1,94 @@
+import random
+
+import pytest
+
+from app import analytics, db, grade_stats
+from app.models import Role
+from app.conftest import make_user, make_class, enroll
+
+
+def test_statistics_of_one_class():
+    rows = [(1, 10, 50.0), (1, 11, 70.0), (1, 12, 90.0), (1, 13, 70.0)]
+    for use_numpy in (False, True):
+        if use_numpy and analytics.np is None:
+            continue
+        stats = analytics.compute(rows, [1, 2], bins=4, use_numpy=use_numpy)
+        data = analytics.to_dict(1, stats[1])
+        assert (data["count"], data["mean"], data["std"], data["min"], data["max"]) == (4, 70, 14.1421, 50, 90)
+        assert data["percentiles"] == {"p10": 56, "p25": 65, "p50": 70, "p75": 75, "p90": 84}
+        assert data["histogram"] == [0, 0, 3, 1]
+        assert [(s["student_id"], s["rank"], s["z_score"]) for s in data["students"]] == [
+            (12, 1, 1.4142), (11, 2, 0), (13, 2, 0), (10, 4, -1.4142)]
+        assert stats[2]["count"] == 0 and stats[2]["students"] == []
+
+
+@pytest.mark.skipif(analytics.np is None, reason="NumPy is not installed")
+def test_numpy_and_python_agree():
+    rng = random.Random(7)
+    rows = [(c, s, float(rng.choice([rng.randint(0, 100), 65, 105, -3])))
+            for c in range(1, 60) for s in range(rng.randint(1, 40))]
+    rows.append((60, 1, 80.0))
+    rows.append((60, 2, 80.0))
+    rng.shuffle(rows)
+    class_ids = list(range(1, 62))
+    fast = analytics.compute(rows, class_ids, bins=7, use_numpy=True)
+    slow = analytics.compute(rows, class_ids, bins=7, use_numpy=False)
+    assert [analytics.to_dict(c, fast[c]) for c in class_ids] == [analytics.to_dict(c, slow[c]) for c in class_ids]
+    assert fast[60]["students"][0][3] is None
+
+
+def seed():
+    admin = make_user("Admin", role=Role.admin)
+    teacher, other = make_user("Teacher", role=Role.teacher), make_user("Other", role=Role.teacher)
+    math, art, old = make_class("Math", teacher), make_class("Art", other), make_class("Old", teacher)
+    students = [make_user(f"Student {i}") for i in range(4)]
+    for student, scores in zip(students, [(40, 60), (80,), (90,), ()]):
+        enroll(student, math, scores)
+        enroll(student, art, (70,))
+    enroll(students[0], old, (10,), academic_year="2023/2024")
+    db.session.commit()
+    grade_stats.rebuild()
+    return admin, teacher, other, math, art, students
+
+
+def test_class_analytics_are_cached_until_a_grade_changes(client, auth_headers, statements):
+    admin, teacher, other, math, art, students = seed()
+    headers = auth_headers(teacher)
+    assert client.get(f"/api/dashboard/analytics/class/{math.id}", headers=auth_headers(other)).status_code == 403
+
+    body = client.get(f"/api/dashboard/analytics/class/{math.id}", headers=headers).get_json()
+    assert (body["count"], body["mean"], body["histogram_edges"][:2]) == (3, 73.3333, [0, 10])
+    assert [(s["student_id"], s["score"], s["rank"]) for s in body["students"]] == [
+        (students[2].id, 90, 1), (students[1].id, 80, 2), (students[0].id, 50, 3)]
+
+    statements.clear()
+    client.get(f"/api/dashboard/analytics/class/{math.id}", headers=headers)
+    assert not any("grade_stats" in s for s in statements)
+
+    client.post("/api/grades/", json={"enrollment_id": math.enrollments[3].id, "score": 100}, headers=headers)
+    body = client.get(f"/api/dashboard/analytics/class/{math.id}", headers=headers).get_json()
+    assert (body["count"], body["max"], body["students"][0]["student_id"]) == (4, 100, students[3].id)
+
+
+def test_term_analytics_compute_only_changed_classes(client, auth_headers, statements):
+    admin, teacher, other, math, art, students = seed()
+    term = {"semester": "first_semester", "academic_year": "2024/2025"}
+    url = "/api/dashboard/analytics/term"
+
+    body = client.get(url, query_string=term, headers=auth_headers(admin)).get_json()
+    assert [(c["class_id"], c["count"], "students" in c) for c in body["classes"]] == [
+        (math.id, 3, False), (art.id, 4, False)]
+    body = client.get(url, query_string={**term, "students": "1"}, headers=auth_headers(teacher)).get_json()
+    assert [c["class_id"] for c in body["classes"]] == [math.id] and len(body["classes"][0]["students"]) == 3
+
+    client.delete(f"/api/enrollments/drop/{art.id}", headers=auth_headers(students[0]))
+    headers = auth_headers(admin)
+    statements.clear()
+    body = client.get(url, query_string=term, headers=headers).get_json()
+    assert [c["count"] for c in body["classes"]] == [3, 3]
+    # One read of the versions and one of the scores of the class that changed
+    assert len(statements) == 2 and "IN (" in statements[1]
+
+    assert client.get(url, query_string={"semester": "summer", "academic_year": "2024/2025"},
+                      headers=auth_headers(admin)).status_code == 400
+    assert client.get(url, query_string=term, headers=auth_headers(students[0])).status_code == 403
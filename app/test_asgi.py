@@ -0,0 +1,106 @@
+import asyncio
+import json
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+from config import TestingConfig
+from app import create_app, db, grade_stats
+from app.asgi import AsyncApp, ROUTES, async_database_url
+from app.models import Role
+from app.principals import principals
+from app.conftest import make_user, make_class, enroll
+
+
+@pytest.fixture
+def asgi(tmp_path):
+    class FileConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'asgi.db'}"
+
+    app = create_app(FileConfig)
+    principals.clear()
+    with app.app_context():
+        db.create_all()
+        yield AsyncApp(app)
+        db.session.remove()
+        db.drop_all()
+
+
+def token_for(user):
+    return create_access_token(identity=user.id, additional_claims={"role": user.role.value})
+
+
+def call(asgi_app, path, token=None):
+    """Send one GET through the ASGI app; return (status, headers, json body)."""
+    headers = [(b"host", b"testserver")]
+    if token:
+        headers.append((b"authorization", f"Bearer {token}".encode()))
+    scope = {"type": "http", "http_version": "1.1", "method": "GET", "path": path,
+             "raw_path": path.encode(), "root_path": "", "scheme": "http", "query_string": b"",
+             "headers": headers, "server": ("testserver", 80), "client": ("127.0.0.1", 1234)}
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    async def run():
+        await asgi_app(scope, receive, send)
+        await asgi_app.engine.dispose()
+
+    asyncio.run(run())
+    start = sent[0]
+    body = b"".join(m.get("body", b"") for m in sent[1:])
+    return start["status"], dict(start["headers"]), json.loads(body)
+
+
+def test_async_routes_match_flask(asgi):
+    admin = make_user("Admin", role=Role.admin)
+    teacher = make_user("Teacher", role=Role.teacher)
+    student = make_user("Student")
+    enroll(student, make_class("Math", teacher), scores=[70, 90])
+    db.session.commit()
+    grade_stats.rebuild()
+    tokens = {"admin": token_for(admin), "teacher": token_for(teacher), "student": token_for(student)}
+    client = asgi.flask_app.test_client()
+
+    cases = {
+        "/api/dashboard/summary": "admin",
+        "/api/dashboard/teacher-summary": "teacher",
+        "/api/dashboard/student-summary": "student",
+        "/api/classes/options": "admin",
+        "/api/users/students": "admin",
+        "/api/users/teachers": "admin",
+        "/api/users/me": "student",
+    }
+    assert set(cases) == set(ROUTES)
+    for path, role in cases.items():
+        status, headers, body = call(asgi, path, tokens[role])
+        # A fresh app context per request, so g does not carry the previous JWT
+        with asgi.flask_app.app_context():
+            expected = client.get(path, headers={"Authorization": f"Bearer {tokens[role]}"})
+        assert (status, body) == (expected.status_code, expected.get_json()), path
+        assert b"server-timing" in headers
+
+
+def test_async_routes_check_token_and_role(asgi):
+    student = make_user("Student")
+    db.session.commit()
+    assert call(asgi, "/api/classes/options")[::2] == (401, {"msg": "Missing authorization token"})
+    assert call(asgi, "/api/classes/options", "garbage")[::2] == (401, {"msg": "Invalid token"})
+    assert call(asgi, "/api/classes/options", token_for(student))[::2] == \
+        (403, {"msg": "Forbidden: insufficient role"})
+
+
+def test_other_routes_fall_through_to_flask(asgi):
+    status, _, body = call(asgi, "/api/health")
+    assert (status, body) == (200, {"status": "ok"})
+
+
+def test_async_database_url():
+    assert str(async_database_url("sqlite:///app.db")) == "sqlite+aiosqlite:///app.db"
+    assert async_database_url("postgresql+psycopg2://u@h/db").drivername == "postgresql+asyncpg"
+    with pytest.raises(ValueError):
+        async_database_url("mysql://u@h/db")
@@ -0,0 +1,76 @@
+import threading
+
+from werkzeug.security import generate_password_hash
+
+from app import db
+from app.hashing import PasswordHasher, hasher
+from app.models import User
+from app.conftest import make_user
+
+
+def test_login_rehashes_outdated_hash(client):
+    user = make_user("Student")
+    user.password_hash = generate_password_hash("secret", "pbkdf2:sha256:500")
+    db.session.commit()
+
+    response = client.post("/api/auth/login", json={"email": user.email, "password": "secret"})
+    assert response.status_code == 200
+    db.session.expire_all()
+    stored = db.session.get(User, user.id).password_hash
+    assert stored.startswith("pbkdf2:sha256:1000$")
+
+    # Already current: left alone
+    client.post("/api/auth/login", json={"email": user.email, "password": "secret"})
+    db.session.expire_all()
+    assert db.session.get(User, user.id).password_hash == stored
+
+
+def test_overload_returns_503(client, monkeypatch):
+    monkeypatch.setattr(hasher, "_slots", threading.BoundedSemaphore(1))
+    hasher._slots.acquire()
+
+    response = client.post("/api/auth/register",
+                           json={"name": "Busy", "email": "busy@test.local", "password": "pw"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert User.query.count() == 0
+
+
+def test_pool_hashes_in_worker_process(app):
+    pool_hasher = PasswordHasher()
+    app.config["HASH_POOL_WORKERS"] = 1
+    pool_hasher.init_app(app)
+    try:
+        pwhash = pool_hasher.hash("secret")
+        assert pwhash.startswith("pbkdf2:sha256:1000$")
+        assert pool_hasher.verify(pwhash, "secret")
+        assert not pool_hasher.verify(pwhash, "wrong")
+    finally:
+        pool_hasher._shutdown_pool()
+
+
+def test_hash_many_leaves_room_for_logins(app, monkeypatch):
+    class RecordingPool:
+        def __init__(self):
+            self.pending = self.most_pending = 0
+
+        def submit(self, fn, *args):
+            self.pending += 1
+            self.most_pending = max(self.most_pending, self.pending)
+            pool = self
+
+            class Done:
+                def result(self, timeout=None):
+                    pool.pending -= 1
+                    return fn(*args)
+            return Done()
+
+    pool_hasher = PasswordHasher()
+    app.config["HASH_POOL_WORKERS"] = 2
+    pool_hasher.init_app(app)
+    pool = RecordingPool()
+    monkeypatch.setattr(pool_hasher, "_get_pool", lambda: pool)
+    hashes = pool_hasher.hash_many([f"pw{i}" for i in range(7)])
+    assert len(hashes) == 7 and pool_hasher.verify(hashes[6], "pw6")
+    # Never more than one worker's worth queued ahead of a login
+    assert pool.most_pending == 2
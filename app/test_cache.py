@@ -0,0 +1,74 @@
+from app import cache, db
+from app.cache import FileBackend, MemoryBackend
+from app.models import Role
+from app.conftest import make_user
+
+
+def test_conditional_get_skips_database(client, auth_headers, statements):
+    admin = make_user("Admin", role=Role.admin)
+    db.session.commit()
+    headers = auth_headers(admin)
+
+    first = client.get("/api/classes/options", headers=headers)
+    assert first.status_code == 200 and first.headers["ETag"]
+
+    statements.clear()
+    again = client.get("/api/classes/options", headers={**headers, "If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 304
+    assert statements == []
+
+    hit = client.get("/api/classes/options", headers=headers)
+    assert hit.get_json() == [] and statements == []
+
+
+def test_writes_bump_versions(client, auth_headers):
+    admin = make_user("Admin", role=Role.admin)
+    db.session.commit()
+    headers = auth_headers(admin)
+    etag = client.get("/api/classes/options", headers=headers).headers["ETag"]
+
+    assert client.post("/api/classes/", json={"name": "Math"}, headers=headers).status_code == 201
+    response = client.get("/api/classes/options", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.get_json() == [{"value": 1, "label": "Math"}]
+
+    # A rejected write leaves the cache alone
+    etag = response.headers["ETag"]
+    client.post("/api/classes/", json={}, headers=headers)
+    assert client.get("/api/classes/options", headers={**headers, "If-None-Match": etag}).status_code == 304
+
+
+def test_file_backend_is_shared(tmp_path):
+    path = str(tmp_path / "cache.db")
+    worker_a, worker_b = FileBackend(path), FileBackend(path)
+    worker_a.set("k", {"versions": (0,), "etag": "e", "body": b"{}", "mimetype": "application/json"})
+    assert worker_b.get("k")["versions"] == (0,)
+    worker_b.bump(("classes",))
+    assert worker_a.versions(("classes", "users")) == (1, 0)
+
+
+def test_memory_entries_expire_so_other_workers_catch_up(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    backend, forever = MemoryBackend(ttl=10), MemoryBackend()
+    for b in (backend, forever):
+        b.set("k", {"versions": (0,)})
+    now[0] += 9
+    assert backend.get("k") == {"versions": (0,)}
+    now[0] += 2
+    assert backend.get("k") is None and forever.get("k") == {"versions": (0,)}
+
+
+def test_file_backend_drops_expired_and_oldest_entries(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "time", lambda: now[0])
+    backend = FileBackend(str(tmp_path / "cache.db"), maxsize=2, ttl=10)
+    for key in ("a", "b", "c"):
+        backend.set(key, {"versions": (0,), "etag": key, "body": b"{}", "mimetype": "application/json"})
+        now[0] += 1
+    assert [backend.get(k) and backend.get(k)["etag"] for k in ("a", "b", "c")] == [None, "b", "c"]
+    now[0] += 9
+    assert backend.get("b") is None and backend.get("c")["etag"] == "c"
+    now[0] += 1
+    backend.set("d", {"versions": (0,), "etag": "d", "body": b"{}", "mimetype": "application/json"})
+    assert backend._connect().execute("SELECT key FROM entries").fetchall() == [("d",)]
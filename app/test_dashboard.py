@@ -0,0 +1,86 @@
+from app import db, grade_stats
+from app.models import Role
+from app.conftest import make_user, make_class, enroll
+
+
+def seed_teacher(student_count):
+    teacher = make_user("Teacher", role=Role.teacher)
+    other = make_user("Other Teacher", role=Role.teacher)
+    classes = [make_class(f"Class {i}", teacher) for i in range(3)]
+    foreign = make_class("Foreign", other)
+    for i in range(student_count):
+        student = make_user(f"Student {i:03d}")
+        for cls in classes[: 1 + i % 3]:
+            enroll(student, cls, scores=[50 + i % 50, 60])
+        # Grades in another teacher's class must not leak into the average
+        enroll(student, foreign, scores=[0])
+    grade_stats.rebuild()
+    return teacher
+
+
+def test_teacher_summary_averages(client, auth_headers):
+    teacher = seed_teacher(2)
+    response = client.get("/api/dashboard/teacher-summary", headers=auth_headers(teacher))
+
+    assert response.status_code == 200
+    assert response.get_json() == {
+        "total_students": 2,
+        "student_grades": [
+            {"id": 3, "name": "Student 000", "average_grade": 55.0},
+            {"id": 4, "name": "Student 001", "average_grade": 55.5},
+        ],
+    }
+
+
+def test_teacher_summary_without_classes(client, auth_headers):
+    teacher = make_user("Lonely", role=Role.teacher)
+    db.session.commit()
+    response = client.get("/api/dashboard/teacher-summary", headers=auth_headers(teacher))
+    assert response.get_json() == {"total_students": 0, "student_grades": []}
+
+
+def test_teacher_summary_query_count_is_constant(client, auth_headers, statements):
+    counts = []
+    for student_count in (3, 30):
+        db.session.remove()
+        db.drop_all()
+        db.create_all()
+        teacher = seed_teacher(student_count)
+        headers = auth_headers(teacher)
+        statements.clear()
+        response = client.get("/api/dashboard/teacher-summary", headers=headers)
+        assert response.get_json()["total_students"] == student_count
+        counts.append(len(statements))
+
+    assert counts[0] == counts[1] == 1
+
+
+def test_student_summary(client, auth_headers, statements):
+    teacher = make_user("Teacher", role=Role.teacher)
+    student = make_user("Student")
+    enroll(student, make_class("Math", teacher), scores=[80, 91])
+    enroll(student, make_class("Art", teacher))
+    enroll(student, make_class("Biology", teacher), scores=[70])
+    grade_stats.rebuild()
+    headers = auth_headers(student)
+
+    statements.clear()
+    response = client.get("/api/dashboard/student-summary", headers=headers)
+
+    assert response.get_json() == {
+        "total_classes": 3,
+        "overall_average_grade": 80.33,
+        "class_grades": [
+            {"class_id": 2, "class_name": "Art", "average_grade": "N/A"},
+            {"class_id": 3, "class_name": "Biology", "average_grade": 70.0},
+            {"class_id": 1, "class_name": "Math", "average_grade": 85.5},
+        ],
+    }
+    assert len(statements) == 1
+
+
+def test_student_summary_without_enrollments(client, auth_headers):
+    student = make_user("Student")
+    db.session.commit()
+    response = client.get("/api/dashboard/student-summary", headers=auth_headers(student))
+    assert response.get_json() == {"total_classes": 0, "overall_average_grade": 0, "class_grades": []}
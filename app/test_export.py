@@ -0,0 +1,74 @@
+import csv
+import gzip
+import io
+import json
+
+from app import db
+from app.export import COLUMNS
+from app.models import Role
+from app.conftest import make_user, make_class, enroll
+
+
+def gradebook(client, headers, **params):
+    headers = {**headers, **params.pop("extra_headers", {})}
+    return client.get("/api/exports/gradebook", query_string=params, headers=headers)
+
+
+def seed():
+    admin = make_user("Admin", role=Role.admin)
+    teacher = make_user("Teacher", role=Role.teacher)
+    ann, bob = make_user("Ann"), make_user("Bob")
+    math, art = make_class("Math", teacher), make_class("Art", teacher)
+    enroll(ann, math, scores=[70, 90])
+    enroll(bob, math, scores=[60])
+    enroll(ann, art, academic_year="2023/2024")
+    db.session.commit()
+    return admin, math
+
+
+def test_ndjson_export_streams_every_grade(client, auth_headers):
+    admin, math = seed()
+    response = gradebook(client, auth_headers(admin))
+    assert response.status_code == 200 and response.is_streamed
+    assert response.mimetype == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.get_data().splitlines()]
+    assert [(r["class_name"], r["student_name"], r["score"]) for r in rows] == [
+        ("Math", "Ann", 70), ("Math", "Ann", 90), ("Math", "Bob", 60), ("Art", "Ann", None),
+    ]
+    assert rows[0]["teacher_name"] == "Teacher" and rows[0]["semester"] == "first_semester"
+
+
+def test_csv_export_filters_by_class_and_year(client, auth_headers):
+    admin, math = seed()
+    response = gradebook(client, auth_headers(admin), format="csv", class_id=math.id)
+    rows = list(csv.reader(io.StringIO(response.get_data(as_text=True))))
+    assert rows[0] == list(COLUMNS) and len(rows) == 4
+    assert f'gradebook-class-{math.id}.csv' in response.headers["Content-Disposition"]
+
+    response = gradebook(client, auth_headers(admin), format="csv", academic_year="2023/2024")
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert [(r["class_name"], r["score"]) for r in rows] == [("Art", "")]
+
+
+def test_export_is_gzipped_when_accepted(client, auth_headers):
+    admin, _ = seed()
+    response = gradebook(client, auth_headers(admin), extra_headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert len(gzip.decompress(response.get_data()).splitlines()) == 4
+
+
+def test_export_requires_admin_and_known_format(client, auth_headers):
+    admin, _ = seed()
+    assert gradebook(client, auth_headers(admin), format="xml").status_code == 400
+    assert gradebook(client, auth_headers(make_user("Eve"))).status_code == 403
+
+
+def test_export_cli(app, tmp_path):
+    seed()
+    result = app.test_cli_runner().invoke(args=["export", "gradebook", "--format", "csv"])
+    assert result.exit_code == 0 and len(result.output.splitlines()) == 5
+
+    target = tmp_path / "school.ndjson.gz"
+    result = app.test_cli_runner().invoke(args=["export", "gradebook", "--gzip", "-o", str(target)])
+    assert result.exit_code == 0
+    assert len(gzip.decompress(target.read_bytes()).splitlines()) == 4
@@ -0,0 +1,61 @@
+from app import db, grade_stats
+from app.models import Grade, GradeStat, Role
+from app.conftest import make_user, make_class, enroll
+
+
+def seed():
+    teacher = make_user("Teacher", role=Role.teacher)
+    cls = make_class("Math", teacher)
+    students = [make_user(f"Student {i}") for i in range(3)]
+    enrollments = [enroll(s, cls) for s in students]
+    db.session.commit()
+    return teacher, cls, students, enrollments
+
+
+def stat(enrollment):
+    db.session.expire_all()
+    return db.session.get(GradeStat, enrollment.id)
+
+
+def test_single_grade_writes_update_rollup(client, auth_headers):
+    teacher, _, _, enrollments = seed()
+    headers = auth_headers(teacher)
+    e = enrollments[0]
+
+    first = client.post("/api/grades/", json={"enrollment_id": e.id, "score": 80}, headers=headers)
+    client.post("/api/grades/", json={"enrollment_id": e.id, "score": 60}, headers=headers)
+    row = stat(e)
+    assert (row.score_count, row.score_sum, row.score_sum_sq) == (2, 140, 80 * 80 + 60 * 60)
+    assert (row.score_min, row.score_max) == (60, 80)
+
+    grade_id = first.get_json()["grade"]["id"]
+    client.put(f"/api/grades/{grade_id}", json={"score": 50}, headers=headers)
+    row = stat(e)
+    assert (row.score_count, row.score_sum, row.score_min, row.score_max) == (2, 110, 50, 60)
+    assert grade_stats.find_drift() == []
+
+
+def test_batch_update_refreshes_rollup(client, auth_headers):
+    teacher, cls, students, enrollments = seed()
+    headers = auth_headers(teacher)
+
+    payload = {"grades": {str(students[0].id): "90", str(students[1].id): "70"}}
+    client.post(f"/api/grades/class/{cls.id}", json=payload, headers=headers)
+    assert stat(enrollments[0]).score_sum == 90
+
+    payload = {"grades": {str(students[0].id): "", str(students[1].id): "75"}}
+    client.post(f"/api/grades/class/{cls.id}", json=payload, headers=headers)
+    assert stat(enrollments[0]) is None
+    assert stat(enrollments[1]).score_max == 75
+    assert grade_stats.find_drift() == []
+
+
+def test_rebuild_reconciles_drift(app):
+    _, _, _, enrollments = seed()
+    db.session.add(Grade(enrollment_id=enrollments[0].id, score=42))
+    db.session.commit()
+    assert grade_stats.find_drift() == [enrollments[0].id]
+
+    result = app.test_cli_runner().invoke(args=["grade-stats", "rebuild"])
+    assert "1 enrollments" in result.output
+    assert grade_stats.find_drift() == []
@@ -0,0 +1,49 @@
+from app import db
+from app.models import Grade, Role
+from app.conftest import make_user, make_class, enroll
+
+
+def test_batch_update_reports_outcomes(client, auth_headers, statements):
+    teacher = make_user("Teacher", role=Role.teacher)
+    cls = make_class("Math", teacher)
+    graded, ungraded, cleared, idle = [make_user(f"Student {i}") for i in range(4)]
+    outsider = make_user("Outsider")
+    enroll(graded, cls, scores=[40])
+    enroll(ungraded, cls)
+    enroll(cleared, cls, scores=[55])
+    enroll(idle, cls)
+    db.session.commit()
+    headers = auth_headers(teacher)
+
+    payload = {"grades": {
+        str(graded.id): "88",
+        str(ungraded.id): 71,
+        str(cleared.id): "",
+        str(idle.id): None,
+        str(outsider.id): "90",
+        "abc": "10",
+    }}
+    statements.clear()
+    response = client.post(f"/api/grades/class/{cls.id}", json=payload, headers=headers)
+    body = response.get_json()
+    # Class lookup, enrollments, grades, one statement per write kind, the
+    # rollup refresh, the grade version bump, the students whose transcripts
+    # go stale and the activity event, however many students are in the payload
+    assert len(statements) == 11
+
+    assert response.status_code == 200
+    outcomes = {r["student_id"]: r["outcome"] for r in body["results"]}
+    assert outcomes == {
+        "abc": "skipped",
+        graded.id: "updated",
+        ungraded.id: "created",
+        cleared.id: "deleted",
+        idle.id: "skipped",
+        outsider.id: "skipped",
+    }
+    assert body["summary"] == {"skipped": 3, "updated": 1, "created": 1, "deleted": 1}
+
+    created = next(r for r in body["results"] if r["outcome"] == "created")
+    assert db.session.get(Grade, created["grade_id"]).score == 71
+    scores = sorted(g.score for g in Grade.query.all())
+    assert scores == [71, 88]
@@ -0,0 +1,114 @@
+import json
+
+from app import db
+from app.cache import response_cache
+from app.models import User, Enrollment, Class, Role, Semester
+from app.conftest import make_user, make_class, enroll
+
+
+def post_import(client, headers, kind, body, content_type, **params):
+    return client.post(f"/api/imports/{kind}", data=body, query_string=params,
+                       headers={**headers, "Content-Type": content_type})
+
+
+def test_import_users_from_csv(client, auth_headers):
+    admin = make_user("Admin", role=Role.admin)
+    make_user("Taken", email="taken@test.local")
+    db.session.commit()
+    body = (
+        "name,email,password,role\n"
+        "Ann,ann@test.local,pw-ann,student\n"
+        "Tom,tom@test.local,pw-tom,teacher\n"
+        "No Password,nopw@test.local,,\n"
+        "Bad Role,bad@test.local,pw,janitor\n"
+        "Ann Again,ann@test.local,pw,student\n"
+        "Taken,taken@test.local,pw,student\n"
+    )
+    versions = response_cache.backend.versions(("users",))
+    response = post_import(client, auth_headers(admin), "users", body, "text/csv", chunk_size=2)
+    report = response.get_json()
+    assert response.status_code == 200
+    assert (report["rows"], report["created"], report["failed"]) == (6, 2, 4)
+    assert report["errors"] == [
+        {"row": 3, "errors": ["password is required"]},
+        {"row": 4, "errors": ["invalid role: janitor"]},
+        {"row": 5, "errors": ["duplicate email (row 1)"]},
+        {"row": 6, "errors": ["email already exists"]},
+    ]
+    tom = User.query.filter_by(email="tom@test.local").one()
+    assert tom.role == Role.teacher and tom.check_password("pw-tom")
+    assert response_cache.backend.versions(("users",)) > versions
+
+
+def test_import_enrollments_from_ndjson(client, auth_headers):
+    admin = make_user("Admin", role=Role.admin)
+    teacher = make_user("Teacher", role=Role.teacher)
+    ann, bob = make_user("Ann"), make_user("Bob")
+    math = make_class("Math", teacher)
+    enroll(bob, math)
+    db.session.commit()
+    rows = [
+        {"student_email": ann.email, "class_id": math.id, "semester": "first_semester", "academic_year": "2024/2025"},
+        {"student_id": bob.id, "class_id": math.id, "semester": "first_semester", "academic_year": "2024/2025"},
+        {"student_email": ann.email, "class_id": math.id, "semester": "first_semester", "academic_year": "2024/2025"},
+        {"student_email": teacher.email, "class_id": 999, "semester": "summer", "academic_year": ""},
+    ]
+    body = "\n".join(json.dumps(r) for r in rows) + "\nnot json\n"
+    report = post_import(client, auth_headers(admin), "enrollments", body, "application/x-ndjson").get_json()
+    assert (report["created"], report["failed"]) == (1, 4)
+    assert report["errors"] == [
+        {"row": 2, "errors": ["student is already enrolled in this class"]},
+        {"row": 3, "errors": ["duplicate enrollment (row 1)"]},
+        {"row": 4, "errors": [f"student {teacher.email} is not a student", "class 999 not found",
+                              "invalid semester: summer", "academic_year is required"]},
+        {"row": 5, "errors": [report["errors"][3]["errors"][0]]},
+    ]
+    assert report["errors"][3]["errors"][0].startswith("invalid JSON")
+    assert Enrollment.query.filter_by(student_id=ann.id).one().semester == Semester.first_semester
+
+
+def test_import_classes_from_json_with_small_transactions(client, auth_headers):
+    admin = make_user("Admin", role=Role.admin)
+    teacher = make_user("Teacher", role=Role.teacher)
+    db.session.commit()
+    rows = [{"name": f"Class {i}", "teacher_email": teacher.email} for i in range(5)]
+    rows.append({"name": "Orphan", "teacher_email": admin.email})
+    report = post_import(client, auth_headers(admin), "classes", json.dumps(rows), "application/json",
+                         chunk_size=2, transaction_size=2).get_json()
+    assert (report["created"], report["failed"]) == (5, 1)
+    assert report["errors"][0]["errors"] == [f"teacher {admin.email} is not a teacher"]
+    assert Class.query.filter_by(teacher_id=teacher.id).count() == 5
+
+
+def test_dry_run_writes_nothing(client, auth_headers):
+    admin = make_user("Admin", role=Role.admin)
+    db.session.commit()
+    report = post_import(client, auth_headers(admin), "users", "name,email,password\nAnn,ann@x.local,pw\n",
+                         "text/csv", dry_run="true").get_json()
+    assert (report["created"], report["failed"]) == (0, 0)
+    assert User.query.count() == 1
+
+
+def test_import_rejects_bad_requests(client, auth_headers):
+    admin, student = make_user("Admin", role=Role.admin), make_user("Student")
+    db.session.commit()
+    headers = auth_headers(admin)
+    assert post_import(client, headers, "grades", "", "text/csv").status_code == 404
+    assert post_import(client, headers, "users", "", "text/plain").status_code == 400
+    assert post_import(client, headers, "users", "{}", "application/json").status_code == 400
+    for bad in ("0", "-1", "ten"):
+        assert post_import(client, headers, "users", "", "text/csv", chunk_size=bad).status_code == 400
+        assert post_import(client, headers, "users", "", "text/csv", transaction_size=bad).status_code == 400
+    assert post_import(client, auth_headers(student), "users", "", "text/csv").status_code == 403
+
+
+def test_import_cli(app, tmp_path):
+    source = tmp_path / "students.csv"
+    source.write_text("name,email,password\n" + "".join(
+        f"Student {i},student{i}@test.local,pw{i}\n" for i in range(20)))
+    result = app.test_cli_runner().invoke(args=["import", "users", str(source), "--hash-workers", "2",
+                                                "--report", str(tmp_path / "report.json")])
+    assert result.exit_code == 0, result.output
+    assert "20 created, 0 failed" in result.output
+    assert json.loads((tmp_path / "report.json").read_text())["created"] == 20
+    assert User.query.filter_by(email="student7@test.local").one().check_password("pw7")
@@ -0,0 +1,41 @@
+from config import TestingConfig
+from app import create_app, db, metrics
+from app.models import Role
+from app.conftest import make_user, make_class, enroll
+
+
+class InstrumentedConfig(TestingConfig):
+    INSTRUMENTATION_ENABLED = True
+
+
+def test_disabled_by_default(client):
+    response = client.get("/api/health")
+    assert "Server-Timing" not in response.headers
+    assert client.get("/api/metrics").status_code == 404
+
+
+def test_records_statements_per_endpoint(auth_headers):
+    app = create_app(InstrumentedConfig)
+    metrics.reset()
+    with app.app_context():
+        db.create_all()
+        admin = make_user("Admin", role=Role.admin)
+        teacher = make_user("Teacher", role=Role.teacher)
+        student = make_user("Student")
+        enroll(student, make_class("Math", teacher), scores=[90])
+        db.session.commit()
+        client = app.test_client()
+
+        response = client.get("/api/dashboard/student-summary", headers=auth_headers(student))
+        assert 'desc="1 statements"' in response.headers["Server-Timing"]
+
+        assert client.get("/api/metrics").status_code == 401
+        assert client.get("/api/metrics", headers=auth_headers(student)).status_code == 403
+        body = client.get("/api/metrics", headers=auth_headers(admin)).get_json()
+        stats = body["endpoints"]["dashboard.student_dashboard_summary"]
+        assert stats["requests"] == 1
+        assert stats["max_statements"] == 1
+        assert stats["avg_response_bytes"] == response.content_length
+        assert sum(stats["histogram_ms"].values()) == 1
+        db.session.remove()
+        db.drop_all()
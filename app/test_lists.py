@@ -0,0 +1,55 @@
+from app import db
+from app.models import Role
+from app.conftest import make_user, make_class
+
+
+def test_list_users_keyset_pages(client, auth_headers):
+    admin = make_user("Admin", role=Role.admin)
+    for i in range(5):
+        make_user(f"Student {i}")
+    db.session.commit()
+    headers = auth_headers(admin)
+
+    seen, cursor = [], None
+    while True:
+        url = "/api/users/?limit=2" + (f"&cursor={cursor}" if cursor else "")
+        body = client.get(url, headers=headers).get_json()
+        seen += [u["id"] for u in body["users"]]
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == [1, 2, 3, 4, 5, 6]
+
+    body = client.get("/api/users/?all=true&role=student", headers=headers).get_json()
+    assert body.keys() == {"users"} and len(body["users"]) == 5
+
+
+def test_list_users_projection(client, auth_headers, statements):
+    admin = make_user("Admin", role=Role.admin)
+    db.session.commit()
+    headers = auth_headers(admin)
+
+    statements.clear()
+    body = client.get("/api/users/?fields=id,name", headers=headers).get_json()
+    assert body["users"] == [{"id": 1, "name": "Admin"}]
+    assert "password_hash" not in statements[0] and "email" not in statements[0]
+
+    response = client.get("/api/users/?fields=id,password_hash", headers=headers)
+    assert response.status_code == 400
+
+
+def test_list_classes_loads_teachers_in_one_query(client, auth_headers, statements):
+    teacher = make_user("Teacher", role=Role.teacher)
+    for i in range(4):
+        make_class(f"Class {i}", teacher if i % 2 else None)
+    db.session.commit()
+    headers = auth_headers(teacher)
+
+    statements.clear()
+    body = client.get("/api/classes/?limit=3", headers=headers).get_json()
+    assert len(statements) == 1
+    assert [c["teacher"] and c["teacher"]["name"] for c in body["classes"]] == [None, "Teacher", None]
+    assert body["next_cursor"] == 3
+
+    body = client.get("/api/classes/?fields=name&cursor=3", headers=headers).get_json()
+    assert body == {"classes": [{"name": "Class 3"}], "next_cursor": None}
@@ -0,0 +1,49 @@
+from app import db
+from app.models import Role
+from app.conftest import make_user, make_class, enroll
+
+
+def seed(student_count):
+    teacher = make_user("Teacher", role=Role.teacher)
+    admin = make_user("Admin", role=Role.admin)
+    classes = [make_class(f"Class {i}", teacher) for i in range(2)]
+    students = []
+    for i in range(student_count):
+        student = make_user(f"Student {i}")
+        for cls in classes:
+            enroll(student, cls, scores=[70, 80])
+        students.append(student)
+    db.session.commit()
+    return admin, classes[0], students[0]
+
+
+def count_queries(client, statements, url, headers):
+    statements.clear()
+    response = client.get(url, headers=headers)
+    assert response.status_code == 200
+    return len(statements)
+
+
+def test_query_counts_do_not_grow_with_roster(client, auth_headers, statements):
+    counts = []
+    for student_count in (2, 25):
+        db.session.remove()
+        db.drop_all()
+        db.create_all()
+        admin, cls, student = seed(student_count)
+        admin_headers, student_headers = auth_headers(admin), auth_headers(student)
+        counts.append((
+            count_queries(client, statements, f"/api/classes/{cls.id}", admin_headers),
+            count_queries(client, statements, f"/api/enrollments/class/{cls.id}/enrollments", admin_headers),
+            count_queries(client, statements, "/api/enrollments/my-classes", student_headers),
+        ))
+
+    assert counts[0] == counts[1] == (3, 1, 1)
+
+
+def test_class_details_payload(client, auth_headers):
+    admin, cls, student = seed(1)
+    body = client.get(f"/api/classes/{cls.id}", headers=auth_headers(admin)).get_json()
+    assert body["teacher"]["name"] == "Teacher"
+    assert body["enrollments"][0]["student"]["id"] == student.id
+    assert [g["score"] for g in body["enrollments"][0]["grades"]] == [70, 80]
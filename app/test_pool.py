@@ -0,0 +1,95 @@
+import pytest
+from sqlalchemy import exc
+
+from config import TestingConfig, ProductionConfig, get_config
+from app import create_app, db
+from app.models import Role
+from app.conftest import make_user
+from app.pool import TimedQueuePool, pool_monitor
+from app.settings import ConfigError, engine_options, validate
+
+
+def settings(cls=TestingConfig, **overrides):
+    config = {key: getattr(cls, key) for key in dir(cls) if key.isupper()}
+    config.update(overrides)
+    return config
+
+
+@pytest.fixture
+def pooled_app(tmp_path):
+    class PooledConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'pool.db'}"
+        DB_POOL_SIZE = 1
+        DB_MAX_OVERFLOW = 0
+        DB_POOL_TIMEOUT = 0.1
+        POOL_METRICS_ENABLED = True
+
+    app = create_app(PooledConfig)
+    pool_monitor.reset()
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def test_engine_options_per_backend():
+    assert engine_options(settings()) == {}
+
+    sqlite_file = engine_options(settings(SQLALCHEMY_DATABASE_URI="sqlite:////tmp/x.db"))
+    assert sqlite_file["pool_size"] == TestingConfig.DB_POOL_SIZE
+    assert "poolclass" not in sqlite_file
+    monitored = engine_options(settings(SQLALCHEMY_DATABASE_URI="sqlite:////tmp/x.db", POOL_METRICS_ENABLED=True))
+    assert monitored["poolclass"] is TimedQueuePool
+    assert "connect_args" not in sqlite_file
+
+    postgres = settings(ProductionConfig, SQLALCHEMY_DATABASE_URI="postgresql://u@h/db")
+    assert engine_options(postgres)["connect_args"] == {"options": "-c statement_timeout=30000"}
+    async_options = engine_options(postgres, async_driver=True)
+    assert async_options["connect_args"] == {"server_settings": {"statement_timeout": "30000"}}
+    assert "poolclass" not in async_options
+
+
+def test_validate_rejects_bad_settings():
+    validate(settings())
+    with pytest.raises(ConfigError, match="DB_POOL_SIZE"):
+        validate(settings(DB_POOL_SIZE=0))
+    with pytest.raises(ConfigError, match="unsupported database backend"):
+        validate(settings(SQLALCHEMY_DATABASE_URI="mysql://u@h/db"))
+    with pytest.raises(ConfigError, match="SECRET_KEY must be set"):
+        validate(settings(ProductionConfig, SQLALCHEMY_DATABASE_URI="postgresql://u@h/db",
+                          SECRET_KEY="a-very-secret-key"))
+
+
+def test_get_config():
+    assert get_config("production") is ProductionConfig
+    with pytest.raises(ValueError):
+        get_config("staging")
+
+
+def test_pool_metrics_endpoint(pooled_app, auth_headers):
+    admin, student = make_user("Admin", role=Role.admin), make_user("Student")
+    db.session.commit()
+    admin_headers, student_headers = auth_headers(admin), auth_headers(student)
+    client = pooled_app.test_client()
+    client.get("/api/users/me")
+    db.session.execute(db.text("SELECT 1"))
+    db.session.commit()
+
+    assert client.get("/api/metrics/pool").status_code == 401
+    assert client.get("/api/metrics/pool", headers=student_headers).status_code == 403
+    body = client.get("/api/metrics/pool", headers=admin_headers).get_json()
+    assert body["pool"]["class"] == "TimedQueuePool"
+    assert body["checkouts"] >= 1 and body["checkins"] >= 1
+    assert body["wait"]["count"] == body["checkouts"]
+    assert body["config"]["max_connections_per_worker"] == 1
+
+
+def test_pool_timeouts_are_counted(pooled_app):
+    held = db.engine.connect()
+    try:
+        with pytest.raises(exc.TimeoutError):
+            db.engine.connect()
+    finally:
+        held.close()
+    assert pool_monitor.snapshot()["timeouts"] == 1
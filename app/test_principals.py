@@ -0,0 +1,48 @@
+from app import db
+from app.models import User, Role
+from app.principals import Principal, principals
+from app.conftest import make_user
+
+
+def test_me_is_served_from_cache(client, auth_headers, statements):
+    user = make_user("Student")
+    user.set_password("old-password")
+    db.session.commit()
+    headers = auth_headers(user)
+
+    first = client.get("/api/users/me", headers=headers).get_json()
+    statements.clear()
+    second = client.get("/api/users/me", headers=headers).get_json()
+    assert first == second and first["email"] == "student@test.local"
+    assert statements == []
+
+
+def test_user_writes_invalidate_cache(client, auth_headers):
+    user = make_user("Student")
+    user.set_password("old-password")
+    db.session.commit()
+    headers = auth_headers(user)
+    client.get("/api/users/me", headers=headers)
+    assert principals.get(user.id) is not None
+
+    client.put("/api/users/change-password", headers=headers,
+               json={"old_password": "old-password", "new_password": "new-password"})
+    assert principals.get(user.id) is None
+
+    client.get("/api/users/me", headers=headers)
+    db.session.get(User, user.id).role = Role.teacher
+    db.session.commit()
+    assert client.get("/api/users/me", headers=headers).get_json()["role"] == "teacher"
+
+
+def test_cache_evicts_least_recently_used(app):
+    principals.maxsize = 2
+    try:
+        users = [make_user(f"User {i}") for i in range(3)]
+        db.session.commit()
+        for u in users:
+            principals.put(Principal.from_user(u))
+        assert principals.get(users[0].id) is None
+        assert principals.get(users[2].id).name == "User 2"
+    finally:
+        principals.maxsize = app.config["PRINCIPAL_CACHE_SIZE"]
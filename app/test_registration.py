@@ -0,0 +1,106 @@
+import threading
+
+import pytest
+from flask_jwt_extended import create_access_token
+from sqlalchemy.exc import IntegrityError
+
+from config import TestingConfig
+from app import create_app, db, registration, rosters
+from app.models import Class, Enrollment, EnrollmentStatus, Role
+from app.registration import registrar
+from app.conftest import make_user, make_class, enroll
+
+
+@pytest.fixture
+def rush(tmp_path):
+    class RushConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'rush.db'}"
+        REGISTRATION_RUSH_ENABLED = True
+        REGISTRATION_BATCH_WAIT_MS = 20
+
+    app = create_app(RushConfig)
+    registrar.clear()
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def auth_headers(user):
+    token = create_access_token(identity=user.id, additional_claims={"role": user.role.value})
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_concurrent_enrollments_are_batched_fifo(rush):
+    teacher = make_user("Teacher", role=Role.teacher)
+    math = make_class("Math", teacher)
+    math.capacity = 5
+    students = [make_user(f"Student {i}") for i in range(12)]
+    db.session.commit()
+    class_id = math.id
+    headers = [auth_headers(s) for s in students]
+    # The last student also submits twice
+    headers.append(headers[-1])
+
+    results = [None] * len(headers)
+    start = threading.Barrier(len(headers))
+
+    def post(i):
+        start.wait()
+        response = rush.test_client().post(f"/api/enrollments/enroll/{class_id}", headers=headers[i])
+        results[i] = (response.status_code, response.get_json())
+
+    threads = [threading.Thread(target=post, args=(i,)) for i in range(len(headers))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    outcomes = sorted((body["ticket"], body["result"], code) for code, body in results)
+    assert [o[1] for o in outcomes].count("enrolled") == 5
+    assert [o[1] for o in outcomes].count("waitlisted") == 7
+    assert [o[1] for o in outcomes].count("duplicate") == 1
+    # Seats go to the earliest tickets
+    admitted = [result for _, result, _ in outcomes if result != "duplicate"]
+    assert admitted == ["enrolled"] * 5 + ["waitlisted"] * 7
+    assert {(result, code) for _, result, code in outcomes} == {
+        ("enrolled", 201), ("waitlisted", 202), ("duplicate", 400)}
+
+    db.session.expire_all()
+    cls = db.session.get(Class, class_id)
+    assert (cls.active_count, cls.waitlisted_count) == (5, 7)
+    waiting = Enrollment.query.filter_by(status=EnrollmentStatus.waitlisted).order_by(Enrollment.waitlist_position)
+    assert [e.waitlist_position for e in waiting] == list(range(1, 8))
+    assert rosters.find_drift() == []
+
+
+def test_queued_enrollment_reports_duplicates_and_missing_classes(rush):
+    teacher = make_user("Teacher", role=Role.teacher)
+    ann = make_user("Ann")
+    math = make_class("Math", teacher)
+    enroll(ann, math)
+    db.session.commit()
+    client = rush.test_client()
+
+    response = client.post(f"/api/enrollments/enroll/{math.id}", headers=auth_headers(ann))
+    assert response.status_code == 400 and response.get_json()["result"] == "duplicate"
+    response = client.post("/api/enrollments/enroll/999", headers=auth_headers(ann))
+    assert response.status_code == 404
+
+
+def test_a_batch_that_keeps_failing_a_constraint_gives_up(rush, monkeypatch):
+    teacher = make_user("Teacher", role=Role.teacher)
+    ann = make_user("Ann")
+    math = make_class("Math", teacher)
+    db.session.commit()
+    calls = []
+
+    def broken(class_id, batch):
+        calls.append(class_id)
+        raise IntegrityError("INSERT", {}, Exception("NOT NULL constraint failed"))
+
+    monkeypatch.setattr(registration, "_apply", broken)
+    response = rush.test_client().post(f"/api/enrollments/enroll/{math.id}", headers=auth_headers(ann))
+    assert response.status_code == 503 and response.get_json()["result"] == "failed"
+    assert len(calls) == registration.APPLY_ATTEMPTS
@@ -0,0 +1,97 @@
+"""Replica routing against two SQLite files.
+
+The replica starts as a copy of the primary, then falls behind: anything
+written afterwards only exists on the primary.
+"""
+import shutil
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+from config import TestingConfig
+from app import create_app, db
+from app.models import Role
+from app.replica import STICKY_COOKIE
+from app.conftest import make_user, make_class, enroll
+
+
+@pytest.fixture
+def replicated(tmp_path):
+    primary, replica = tmp_path / "primary.db", tmp_path / "replica.db"
+
+    class ReplicaConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{primary}"
+        SQLALCHEMY_REPLICA_URI = f"sqlite:///{replica}"
+
+    app = create_app(ReplicaConfig)
+    with app.app_context():
+        db.create_all()
+        admin = make_user("Admin", role=Role.admin)
+        teacher = make_user("Teacher", role=Role.teacher)
+        student = make_user("Student")
+        enrollment = enroll(student, make_class("Math", teacher))
+        db.session.commit()
+        users = {u.role.value: u.id for u in (admin, teacher, student)}
+        users["enrollment"] = enrollment.id
+        db.session.remove()
+        shutil.copy(primary, replica)
+        yield app, users
+        db.session.remove()
+        db.drop_all()
+
+
+def request(app, method, path, user_id, role, cookie=None, **kwargs):
+    token = create_access_token(identity=user_id, additional_claims={"role": role})
+    # A fresh app context and client per request, as if each went to a different worker
+    with app.app_context():
+        client = app.test_client()
+        if cookie:
+            client.set_cookie(STICKY_COOKIE, cookie)
+        response = client.open(path, method=method, json=kwargs.get("json"),
+                               headers={"Authorization": f"Bearer {token}"})
+        sticky_cookie = client.get_cookie(STICKY_COOKIE)
+        return response.status_code, response.get_json(), sticky_cookie and sticky_cookie.value
+
+
+def write_to_primary(app, name):
+    with app.app_context():
+        db.session.add(make_class(name, None))
+        db.session.commit()
+
+
+def test_get_reads_replica(replicated):
+    app, users = replicated
+    write_to_primary(app, "Physics")
+    status, body, _ = request(app, "GET", "/api/classes/?all=true", users["admin"], "admin")
+    assert status == 200
+    assert [c["name"] for c in body["classes"]] == ["Math"]
+
+
+def test_writer_reads_own_writes(replicated, monkeypatch):
+    app, users = replicated
+    status, _, cookie = request(app, "POST", "/api/grades/", users["teacher"], "teacher",
+                                json={"enrollment_id": users["enrollment"], "score": 80})
+    assert status == 201 and cookie
+
+    summary = "/api/dashboard/teacher-summary"
+    _, teacher_view, _ = request(app, "GET", summary, users["teacher"], "teacher", cookie=cookie)
+    assert teacher_view["student_grades"][0]["average_grade"] == 80
+
+    # The cookie is bound to its user; other users still read the lagging replica
+    _, student_view, _ = request(app, "GET", "/api/dashboard/student-summary", users["student"], "student",
+                              cookie=cookie)
+    assert student_view["class_grades"][0]["average_grade"] == "N/A"
+    _, teacher_view, _ = request(app, "GET", summary, users["teacher"], "teacher", cookie=cookie[:-2] + "xx")
+    assert teacher_view["student_grades"][0]["average_grade"] == 0
+
+    monkeypatch.setattr("app.replica.time.time", lambda: 2 ** 40)
+    _, teacher_view, _ = request(app, "GET", summary, users["teacher"], "teacher", cookie=cookie)
+    assert teacher_view["student_grades"][0]["average_grade"] == 0
+
+
+def test_cache_misses_read_primary(replicated):
+    app, users = replicated
+    write_to_primary(app, "Physics")
+    status, body, _ = request(app, "GET", "/api/classes/options", users["admin"], "admin")
+    assert status == 200
+    assert [c["label"] for c in body] == ["Math", "Physics"]
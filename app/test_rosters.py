@@ -0,0 +1,96 @@
+from app import db, rosters
+from app.models import Class, Enrollment, EnrollmentStatus, Role
+from app.conftest import make_user, make_class, enroll
+
+
+def counts(cls):
+    db.session.expire_all()
+    cls = db.session.get(Class, cls.id)
+    return cls.active_count, cls.pending_count, cls.dropped_count
+
+
+def test_enroll_status_change_and_drop_move_counters(client, auth_headers):
+    admin = make_user("Admin", role=Role.admin)
+    teacher = make_user("Teacher", role=Role.teacher)
+    ann, bob = make_user("Ann"), make_user("Bob")
+    math = make_class("Math", teacher)
+    db.session.commit()
+
+    assert client.post(f"/api/enrollments/enroll/{math.id}", headers=auth_headers(ann)).status_code == 201
+    response = client.post("/api/enrollments/", headers=auth_headers(admin), json={
+        "student_id": bob.id, "class_id": math.id, "enrollment_date": "2024-09-02T08:00:00Z",
+        "semester": "first_semester", "academic_year": "2024/2025"})
+    assert response.status_code == 201
+    assert client.post(f"/api/enrollments/enroll/{math.id}", headers=auth_headers(ann)).status_code == 400
+    assert counts(math) == (2, 0, 0)
+
+    bob_enrollment = response.get_json()["enrollment"]["id"]
+    client.put(f"/api/enrollments/{bob_enrollment}/update-status", headers=auth_headers(teacher),
+               json={"status": "dropped"})
+    assert counts(math) == (1, 0, 1)
+    client.delete(f"/api/enrollments/drop/{math.id}", headers=auth_headers(ann))
+    assert counts(math) == (0, 0, 1)
+    assert rosters.find_drift() == []
+
+
+def test_capacity_is_enforced_and_freed_seats_go_to_the_waitlist(client, auth_headers):
+    admin = make_user("Admin", role=Role.admin)
+    teacher = make_user("Teacher", role=Role.teacher)
+    students = [make_user(f"Student {i}") for i in range(3)]
+    db.session.commit()
+    response = client.post("/api/classes/", headers=auth_headers(admin),
+                           json={"name": "Math", "teacher_id": teacher.id, "capacity": 2})
+    class_id = response.get_json()["class"]["id"]
+
+    codes = [client.post(f"/api/enrollments/enroll/{class_id}", headers=auth_headers(s)).status_code
+             for s in students]
+    assert codes == [201, 201, 202]
+    assert Enrollment.query.filter_by(class_id=class_id, status=EnrollmentStatus.active).count() == 2
+
+    first = Enrollment.query.filter_by(student_id=students[0].id).one()
+    client.put(f"/api/enrollments/{first.id}/update-status", headers=auth_headers(teacher),
+               json={"status": "dropped"})
+    # The freed seat went to the waitlist
+    db.session.expire_all()
+    assert Enrollment.query.filter_by(student_id=students[2].id).one().status == EnrollmentStatus.active
+    response = client.put(f"/api/enrollments/{first.id}/update-status", headers=auth_headers(teacher),
+                          json={"status": "active"})
+    assert response.status_code == 409
+    assert client.post("/api/enrollments/enroll/999", headers=auth_headers(students[0])).status_code == 404
+
+
+def test_list_classes_reports_counts_without_joining_enrollments(client, auth_headers, statements):
+    teacher = make_user("Teacher", role=Role.teacher)
+    math = make_class("Math", teacher)
+    math.capacity = 30
+    for i in range(3):
+        enroll(make_user(f"Student {i}"), math)
+    db.session.commit()
+    rosters.refresh()
+    db.session.commit()
+
+    statements.clear()
+    body = client.get("/api/classes/", query_string={"fields": "id,capacity,active_count"},
+                      headers=auth_headers(teacher)).get_json()
+    assert body["classes"] == [{"id": math.id, "capacity": 30, "active_count": 3}]
+    assert not any("enrollments" in s for s in statements)
+
+
+def test_class_capacity_validation(client, auth_headers):
+    admin = make_user("Admin", role=Role.admin)
+    db.session.commit()
+    for capacity in (0, "10", True):
+        response = client.post("/api/classes/", headers=auth_headers(admin), json={"name": "X", "capacity": capacity})
+        assert response.status_code == 400
+
+
+def test_roster_counts_cli_fixes_drift(app):
+    teacher = make_user("Teacher", role=Role.teacher)
+    math = make_class("Math", teacher)
+    enroll(make_user("Ann"), math)
+    db.session.commit()
+    assert rosters.find_drift() == [math.id]
+
+    result = app.test_cli_runner().invoke(args=["roster-counts", "check", "--fix"])
+    assert "1 classes drifted" in result.output
+    assert rosters.find_drift() == [] and counts(math) == (1, 0, 0)
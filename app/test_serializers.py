@@ -0,0 +1,40 @@
+import json
+
+from app import db, serializers
+from app.models import User, Class, Enrollment, Grade, Role
+from app.conftest import make_user, make_class, enroll
+
+
+def seed():
+    teacher = make_user("Teacher", role=Role.teacher)
+    student = make_user("Étudiant")
+    enroll(student, make_class("Math", teacher), scores=[71.5])
+    make_class("Orphan", None)
+    db.session.commit()
+
+
+def test_plans_match_to_dict(app, monkeypatch):
+    seed()
+    cases = [
+        (serializers.user_plan(), User),
+        (serializers.class_plan(), Class),
+        (serializers.enrollment_plan(), Enrollment),
+        (serializers.grade_plan(), Grade),
+    ]
+    for backend in (serializers.orjson, None):
+        monkeypatch.setattr(serializers, "orjson", backend)
+        for plan, model in cases:
+            rows = plan.query(db.session).order_by(model.id).all()
+            expected = [obj.to_dict() for obj in model.query.order_by(model.id)]
+            if model is Enrollment:
+                for item in expected:
+                    del item["student"]
+            assert json.loads(serializers.dumps(plan.dicts(rows))) == expected
+
+
+def test_projection_keeps_row_key(app):
+    seed()
+    plan = serializers.class_plan(("name",))
+    rows = plan.query(db.session).order_by(Class.id).all()
+    assert [row[0] for row in rows] == [1, 2]
+    assert plan.dicts(rows) == [{"name": "Math"}, {"name": "Orphan"}]
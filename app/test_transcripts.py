@@ -0,0 +1,113 @@
+import json
+
+import pytest
+
+from config import TestingConfig
+from app import create_app, db, grade_stats
+from app.models import EnrollmentStatus, Role, Semester
+from app.settings import ConfigError
+from app.transcripts import service
+from app.conftest import make_user, make_class, enroll
+
+
+def seed():
+    admin = make_user("Admin", role=Role.admin)
+    teacher = make_user("Teacher", role=Role.teacher)
+    ann, bob = make_user("Ann"), make_user("Bob")
+    math, art, bio, chem, physics = (make_class(n, teacher) for n in ("Math", "Art", "Bio", "Chem", "Physics"))
+    enroll(ann, math, (90, 100), academic_year="2023/2024")
+    enroll(ann, art, (65,), academic_year="2023/2024")
+    enroll(ann, bio, (85,), academic_year="2023/2024", semester=Semester.second_semester)
+    enroll(ann, chem, (50,), academic_year="2023/2024", semester=Semester.second_semester).status = \
+        EnrollmentStatus.dropped
+    enroll(ann, physics, academic_year="2024/2025")
+    enroll(bob, math, (75,), academic_year="2024/2025")
+    db.session.commit()
+    grade_stats.rebuild()
+    return admin, teacher, ann, bob, math
+
+
+def test_transcript_groups_terms_and_computes_gpas(client, auth_headers):
+    admin, teacher, ann, bob, math = seed()
+    body = client.get("/api/transcripts/me", headers=auth_headers(ann)).get_json()
+
+    assert body["scale"] == "letter_4"
+    assert [(t["academic_year"], t["semester"], t["term_gpa"], t["cumulative_gpa"]) for t in body["terms"]] == [
+        ("2023/2024", "first_semester", 2.5, 2.5),
+        ("2023/2024", "second_semester", 3.0, 2.67),
+        ("2024/2025", "first_semester", None, 2.67),
+    ]
+    first = body["terms"][0]["courses"]
+    assert [(c["class_name"], c["score"], c["letter"], c["grade_points"]) for c in first] == [
+        ("Art", 65, "D", 1.0), ("Math", 95, "A", 4.0)]
+    dropped = body["terms"][1]["courses"][1]
+    assert (dropped["class_name"], dropped["letter"], dropped["counted"]) == ("Chem", "F", False)
+    assert (body["counted_courses"], body["cumulative_gpa"]) == (3, 2.67)
+
+    body = client.get(f"/api/transcripts/student/{ann.id}", query_string={"scale": "kenya_4"},
+                      headers=auth_headers(admin)).get_json()
+    assert (body["student_name"], body["cumulative_gpa"]) == ("Ann", 3.67)
+    response = client.get("/api/transcripts/me", query_string={"scale": "nope"}, headers=auth_headers(ann))
+    assert response.status_code == 400
+    assert client.get(f"/api/transcripts/student/{teacher.id}", headers=auth_headers(admin)).status_code == 400
+
+
+def test_transcripts_are_memoized_until_the_student_changes(client, auth_headers, statements):
+    admin, teacher, ann, bob, math = seed()
+    ann_headers, bob_headers, teacher_headers = auth_headers(ann), auth_headers(bob), auth_headers(teacher)
+    client.get("/api/transcripts/me", headers=ann_headers)
+    client.get("/api/transcripts/me", headers=bob_headers)
+
+    statements.clear()
+    client.get("/api/transcripts/me", headers=ann_headers)
+    # Only the version check
+    assert len(statements) == 1 and "transcript_version" in statements[0]
+
+    bob_math = math.enrollments[1].id
+    client.post("/api/grades/", json={"enrollment_id": bob_math, "score": 95}, headers=teacher_headers)
+    statements.clear()
+    client.get("/api/transcripts/me", headers=ann_headers)
+    assert len(statements) == 1
+    assert client.get("/api/transcripts/me", headers=bob_headers).get_json()["cumulative_gpa"] == 3.0
+
+    client.delete(f"/api/enrollments/drop/{math.id}", headers=bob_headers)
+    assert client.get("/api/transcripts/me", headers=bob_headers).get_json()["terms"] == []
+
+    client.put(f"/api/classes/{math.id}", json={"name": "Algebra"}, headers=auth_headers(admin))
+    body = client.get("/api/transcripts/me", headers=ann_headers).get_json()
+    assert body["terms"][0]["courses"][0]["class_name"] == "Algebra"
+
+
+def test_cohort_transcripts_stream_one_line_per_student(app, client, auth_headers, tmp_path):
+    admin, teacher, ann, bob, math = seed()
+    carl = make_user("Carl")
+    enroll(carl, math, (40,), academic_year="2022/2023")
+    db.session.commit()
+
+    response = client.get("/api/transcripts/cohort", query_string={"academic_year": "2024/2025"},
+                          headers=auth_headers(admin))
+    assert response.mimetype == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.get_data().splitlines()]
+    assert [(t["student_name"], t["cumulative_gpa"], len(t["terms"])) for t in lines] == [
+        ("Ann", 2.67, 3), ("Bob", 2.0, 1)]
+    assert lines[0] == {"student_id": ann.id, "student_name": "Ann", **service.for_student(ann.id)}
+
+    output = tmp_path / "transcripts.ndjson"
+    result = app.test_cli_runner().invoke(args=["export", "transcripts", "--scale", "kenya_4", "-o", str(output)])
+    assert result.exit_code == 0
+    assert [json.loads(line)["student_name"] for line in output.read_text().splitlines()] == ["Ann", "Bob", "Carl"]
+
+
+def test_grading_scales_are_validated():
+    class BadScale(TestingConfig):
+        TRANSCRIPT_SCALES = {"pass_fail": ((50, "P", 4.0), (10, "F", 0.0))}
+
+    with pytest.raises(ConfigError):
+        create_app(BadScale)
+
+    class CustomScale(TestingConfig):
+        TRANSCRIPT_SCALES = {"pass_fail": ((50, "P", 4.0), (0, "F", 0.0))}
+        TRANSCRIPT_GRADING_SCALE = "pass_fail"
+
+    create_app(CustomScale)
+    assert service.scale() == ("pass_fail", ((50, "P", 4.0), (0, "F", 0.0)))
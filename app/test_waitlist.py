@@ -0,0 +1,146 @@
+from app import db, rosters, waitlist
+from app.models import ActivityEvent, Class, Enrollment, EnrollmentStatus, Role, User
+from app.conftest import make_user, make_class
+
+
+def full_class(client, auth_headers, waiting=4):
+    admin = make_user("Admin", role=Role.admin)
+    teacher = make_user("Teacher", role=Role.teacher)
+    seated = make_user("Seated")
+    students = [make_user(f"Student {i}") for i in range(waiting)]
+    db.session.commit()
+    class_id = client.post("/api/classes/", headers=auth_headers(admin),
+                           json={"name": "Math", "teacher_id": teacher.id, "capacity": 1}).get_json()["class"]["id"]
+    assert client.post(f"/api/enrollments/enroll/{class_id}", headers=auth_headers(seated)).status_code == 201
+    for i, student in enumerate(students, 1):
+        response = client.post(f"/api/enrollments/enroll/{class_id}", headers=auth_headers(student))
+        assert response.status_code == 202 and response.get_json()["waitlist_position"] == i
+    return admin, teacher, seated, students, class_id
+
+
+def position(client, auth_headers, student, class_id):
+    response = client.get(f"/api/enrollments/waitlist/{class_id}", headers=auth_headers(student))
+    return response.get_json().get("position") if response.status_code == 200 else None
+
+
+def test_drop_promotes_the_head_of_the_line(client, auth_headers):
+    admin, teacher, seated, students, class_id = full_class(client, auth_headers)
+    client.delete(f"/api/enrollments/drop/{class_id}", headers=auth_headers(seated))
+
+    db.session.expire_all()
+    assert Enrollment.query.filter_by(student_id=students[0].id).one().status == EnrollmentStatus.active
+    assert [position(client, auth_headers, s, class_id) for s in students] == [None, 1, 2, 3]
+    event = ActivityEvent.query.filter_by(kind="enrollment.promoted").one()
+    assert event.description == "Student 0 moved off the waitlist into Math"
+    body = client.get(f"/api/enrollments/waitlist/{class_id}", headers=auth_headers(students[3])).get_json()
+    assert body == {"position": 3, "waitlist_length": 3}
+    assert rosters.find_drift() == []
+
+
+def test_leaving_the_middle_keeps_positions_contiguous(client, auth_headers):
+    admin, teacher, seated, students, class_id = full_class(client, auth_headers)
+    client.delete(f"/api/enrollments/drop/{class_id}", headers=auth_headers(students[1]))
+    assert [position(client, auth_headers, s, class_id) for s in (students[0], students[2], students[3])] == [1, 2, 3]
+
+    # A late joiner goes to the back, right after the others
+    late = make_user("Late")
+    db.session.commit()
+    response = client.post(f"/api/enrollments/enroll/{class_id}", headers=auth_headers(late))
+    assert response.get_json()["waitlist_position"] == 4
+
+    page = client.get(f"/api/enrollments/class/{class_id}/waitlist", query_string={"limit": 2},
+                      headers=auth_headers(teacher)).get_json()
+    assert [e["student"]["name"] for e in page["waitlist"]] == ["Student 0", "Student 2"]
+    page = client.get(f"/api/enrollments/class/{class_id}/waitlist", query_string={"after": page["next_after"]},
+                      headers=auth_headers(teacher)).get_json()
+    assert [(e["student"]["name"], e["position"]) for e in page["waitlist"]] == [("Student 3", 3), ("Late", 4)]
+
+
+def test_status_changes_and_capacity_raise_move_the_line(client, auth_headers):
+    admin, teacher, seated, students, class_id = full_class(client, auth_headers)
+    seated_enrollment = Enrollment.query.filter_by(student_id=seated.id).one()
+
+    # Seated -> waitlisted: the head takes the seat and the old holder goes to the back
+    client.put(f"/api/enrollments/{seated_enrollment.id}/update-status", headers=auth_headers(teacher),
+               json={"status": "waitlisted"})
+    assert [position(client, auth_headers, s, class_id) for s in students[1:] + [seated]] == [1, 2, 3, 4]
+
+    client.put(f"/api/classes/{class_id}", headers=auth_headers(admin), json={"capacity": 3})
+    db.session.expire_all()
+    cls = db.session.get(Class, class_id)
+    assert (cls.active_count, cls.waitlisted_count) == (3, 2)
+    assert [position(client, auth_headers, s, class_id) for s in (students[3], seated)] == [1, 2]
+
+
+def test_rank_is_two_index_seeks_on_a_long_line(app, statements):
+    teacher = make_user("Teacher", role=Role.teacher)
+    cls = make_class("Popular", teacher)
+    cls.capacity = 1
+    db.session.flush()
+    students = [{"name": f"S{i}", "email": f"s{i}@test.local", "role": Role.student, "password_hash": "x"}
+                for i in range(10000)]
+    db.session.execute(User.__table__.insert(), students)
+    db.session.execute(Enrollment.__table__.insert().from_select(
+        ["student_id", "class_id", "status", "semester", "academic_year", "enrollment_date"],
+        db.select(db.text("id"), db.literal(cls.id), db.literal("waitlisted"), db.literal("first_semester"),
+                  db.literal("2024/2025"), db.func.current_timestamp())
+        .select_from(db.text("users")).where(db.text("role = 'student'"))))
+    rosters.refresh([cls.id])
+    waitlist.rebuild([cls.id])
+    db.session.commit()
+
+    last = Enrollment.query.filter_by(class_id=cls.id).order_by(Enrollment.id.desc()).first()
+    statements.clear()
+    assert waitlist.rank(last) == 10000
+    assert len(statements) == 1 and "LIMIT" in statements[0]
+
+
+def test_demoting_to_the_waitlist_hands_the_seat_to_the_next_in_line(client, auth_headers):
+    admin, teacher, seated, students, class_id = full_class(client, auth_headers, waiting=1)
+    seated_id = Enrollment.query.filter_by(student_id=seated.id).one().id
+
+    response = client.put(f"/api/enrollments/{seated_id}/update-status", headers=auth_headers(teacher),
+                          json={"status": "waitlisted"})
+    assert response.status_code == 200 and response.get_json()["enrollment"]["status"] == "waitlisted"
+    db.session.expire_all()
+    assert Enrollment.query.filter_by(student_id=students[0].id).one().status == EnrollmentStatus.active
+    assert position(client, auth_headers, seated, class_id) == 1
+
+    # And back again: the old seat holder is now first in line
+    promoted_id = Enrollment.query.filter_by(student_id=students[0].id).one().id
+    response = client.put(f"/api/enrollments/{promoted_id}/update-status", headers=auth_headers(teacher),
+                          json={"status": "waitlisted"})
+    assert response.status_code == 200
+    assert position(client, auth_headers, students[0], class_id) == 1
+    db.session.expire_all()
+    assert Enrollment.query.get(seated_id).status == EnrollmentStatus.active
+
+
+def test_demoting_with_an_empty_line_is_refused(client, auth_headers):
+    teacher = make_user("Teacher", role=Role.teacher)
+    student = make_user("Student")
+    cls = make_class("Open", teacher)
+    db.session.commit()
+    client.post(f"/api/enrollments/enroll/{cls.id}", headers=auth_headers(student))
+    enrollment = Enrollment.query.filter_by(student_id=student.id).one()
+
+    response = client.put(f"/api/enrollments/{enrollment.id}/update-status", headers=auth_headers(teacher),
+                          json={"status": "waitlisted"})
+    assert response.status_code == 409
+    db.session.expire_all()
+    assert enrollment.status == EnrollmentStatus.active and rosters.find_drift() == []
+
+
+def test_waitlisted_students_are_not_graded_or_counted(client, auth_headers):
+    admin, teacher, seated, students, class_id = full_class(client, auth_headers, waiting=2)
+    headers = auth_headers(teacher)
+    waiting = Enrollment.query.filter_by(student_id=students[0].id).one()
+    response = client.post("/api/grades/", json={"enrollment_id": waiting.id, "score": 90}, headers=headers)
+    assert response.status_code == 409
+
+    body = client.post(f"/api/grades/class/{class_id}", headers=headers,
+                       json={"grades": {str(seated.id): 80, str(students[1].id): 70}}).get_json()
+    assert sorted((o["student_id"], o["outcome"]) for o in body["results"]) == [
+        (seated.id, "created"), (students[1].id, "skipped")]
+    summary = client.get("/api/dashboard/teacher-summary", headers=headers).get_json()
+    assert summary["total_students"] == 1 and summary["student_grades"][0]["name"] == "Seated"
@@ -0,0 +1,158 @@
+"""Transcripts: a student's enrollments by term, with term and cumulative GPA.
+
+A course's score is the mean of its grades (the grade_stats rollup). The
+score earns grade points on a grading scale. GPAs are unweighted means
+of grade points, since classes carry no credit hours. Dropped,
+waitlisted and ungraded enrollments are listed but do not count.
+
+for_student() is memoized per process by (student, scale). Write paths
+call touch() with the students they changed, which bumps
+users.transcript_version in the same transaction, and a memoized
+transcript is only served while that version still matches, so every
+worker sees the change once it commits.
+
+cohort() streams transcripts for many students from one query through a
+server-side cursor, for end-of-year runs.
+"""
+from itertools import groupby
+
+from sqlalchemy import select, update
+
+from . import db, rosters
+from .cache import MemoryBackend
+from .models import Class, Enrollment, GradeStat, Role, Semester, User
+from .replica import use_primary
+from .settings import ConfigError
+
+# (minimum score, letter, grade points), best first; the last minimum must be 0
+SCALES = {
+    "letter_4": ((90, "A", 4.0), (80, "B", 3.0), (70, "C", 2.0), (60, "D", 1.0), (0, "F", 0.0)),
+    "plus_minus_4": (
+        (93, "A", 4.0), (90, "A-", 3.7), (87, "B+", 3.3), (83, "B", 3.0), (80, "B-", 2.7), (77, "C+", 2.3),
+        (73, "C", 2.0), (70, "C-", 1.7), (67, "D+", 1.3), (63, "D", 1.0), (60, "D-", 0.7), (0, "F", 0.0),
+    ),
+    "kenya_4": ((70, "A", 4.0), (60, "B", 3.0), (50, "C", 2.0), (40, "D", 1.0), (0, "E", 0.0)),
+}
+SEMESTER_ORDER = {semester: i for i, semester in enumerate(Semester)}
+
+
+def _bump(condition):
+    db.session.execute(
+        update(User)
+        .where(condition)
+        .values(transcript_version=User.transcript_version + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def touch(student_ids):
+    """Mark the transcripts of these students (ids or a subquery) as changed."""
+    _bump(User.id.in_(student_ids))
+
+
+def touch_all():
+    _bump(User.role == Role.student)
+
+
+def _columns():
+    return (Enrollment.id, Enrollment.academic_year, Enrollment.semester, Enrollment.status,
+            Class.id, Class.name, GradeStat.score_sum, GradeStat.score_count)
+
+
+def _from_enrollments(stmt):
+    return (
+        stmt.select_from(Enrollment)
+        .join(Class, Class.id == Enrollment.class_id)
+        .outerjoin(GradeStat, GradeStat.enrollment_id == Enrollment.id)
+    )
+
+
+def _course(row, scale):
+    enrollment_id, _, _, status, class_id, class_name, score_sum, score_count = row
+    score = score_sum / score_count if score_count else None
+    course = {"enrollment_id": enrollment_id, "class_id": class_id, "class_name": class_name,
+              "status": status.value, "score": None, "letter": None, "grade_points": None,
+              "counted": score is not None and status in rosters.SEATED}
+    if score is not None:
+        _, letter, points = next(step for step in scale if score >= step[0])
+        course.update(score=round(score, 2), letter=letter, grade_points=points)
+    return course
+
+
+def _gpa(total, count):
+    return round(total / count, 2) if count else None
+
+
+def build(rows, scale_name, scale):
+    """Transcript dict from _columns() rows of one student, in any order."""
+    rows = sorted(rows, key=lambda r: (r[1], SEMESTER_ORDER[r[2]], r[5], r[0]))
+    terms, total, count = [], 0.0, 0
+    for (academic_year, semester), term_rows in groupby(rows, key=lambda r: (r[1], r[2])):
+        courses = [_course(row, scale) for row in term_rows]
+        points = [c["grade_points"] for c in courses if c["counted"]]
+        total += sum(points)
+        count += len(points)
+        terms.append({"academic_year": academic_year, "semester": semester.value, "courses": courses,
+                      "counted_courses": len(points), "term_gpa": _gpa(sum(points), len(points)),
+                      "cumulative_gpa": _gpa(total, count)})
+    return {"scale": scale_name, "terms": terms, "counted_courses": count, "cumulative_gpa": _gpa(total, count)}
+
+
+class TranscriptService:
+    def __init__(self):
+        self.scales = dict(SCALES)
+        self.default_scale = "letter_4"
+        self.memo = MemoryBackend(10000)
+
+    def init_app(self, app):
+        self.scales = {**SCALES, **app.config.get("TRANSCRIPT_SCALES", {})}
+        self.default_scale = app.config.get("TRANSCRIPT_GRADING_SCALE", "letter_4")
+        self.memo = MemoryBackend(app.config.get("TRANSCRIPT_CACHE_SIZE", 10000))
+        if self.default_scale not in self.scales:
+            raise ConfigError(f"TRANSCRIPT_GRADING_SCALE {self.default_scale!r} is not a known scale")
+        for name, scale in self.scales.items():
+            minimums = [step[0] for step in scale]
+            if not minimums or minimums != sorted(minimums, reverse=True) or minimums[-1] != 0:
+                raise ConfigError(f"grading scale {name!r} must list minimum scores from best down to 0")
+
+    def scale(self, name=None):
+        """(name, steps) of a grading scale; KeyError if unknown."""
+        name = name or self.default_scale
+        return name, self.scales[name]
+
+    def for_student(self, student_id, scale=None):
+        name, steps = self.scale(scale)
+        key = (student_id, name)
+        version = db.session.execute(select(User.transcript_version).where(User.id == student_id)).scalar()
+        entry = self.memo.get(key)
+        if entry is None or entry["version"] != version:
+            # The primary is at least as new as the version read above
+            with use_primary():
+                rows = db.session.execute(
+                    _from_enrollments(select(*_columns())).where(Enrollment.student_id == student_id)
+                ).all()
+            entry = {"version": version, "transcript": build(rows, name, steps)}
+            self.memo.set(key, entry)
+        return entry["transcript"]
+
+    def cohort(self, academic_year=None, scale=None, batch_size=1000):
+        """Yield a transcript dict per student, with their id and name.
+
+        With academic_year, only students enrolled in that year, but with
+        their whole history so cumulative GPAs are right.
+        """
+        name, steps = self.scale(scale)
+        stmt = _from_enrollments(select(Enrollment.student_id, User.name, *_columns())).join(
+            User, User.id == Enrollment.student_id
+        ).order_by(Enrollment.student_id)
+        if academic_year:
+            stmt = stmt.where(Enrollment.student_id.in_(
+                select(Enrollment.student_id).where(Enrollment.academic_year == academic_year)
+            ))
+        result = db.session.execute(stmt, execution_options={"yield_per": batch_size})
+        for (student_id, student_name), rows in groupby(result, key=lambda r: (r[0], r[1])):
+            yield {"student_id": student_id, "student_name": student_name,
+                   **build([row[2:] for row in rows], name, steps)}
+
+
+service = TranscriptService()
@@ -1,5 +1,5 @@
 from functools import wraps
-from flask import jsonify, request
+from flask import g, jsonify, request
 from flask_jwt_extended import verify_jwt_in_request, get_jwt
 from .models import Role
 
@@ -10,10 +10,51 @@ def role_required(*roles: str):
         def decorator(*args, **kwargs):
             if request.method == 'OPTIONS':
                 return fn(*args, **kwargs)
-            verify_jwt_in_request()
+            # Routes stacked under @jwt_required() already decoded the token
+            if not g.get("_jwt_extended_jwt"):
+                verify_jwt_in_request()
             claims = get_jwt()
             if claims.get("role") not in roles:
                 return jsonify({"msg": "Forbidden: insufficient role"}), 403
             return fn(*args, **kwargs)
         return decorator
     return wrapper
+
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def parse_list_args(allowed_fields):
+    """Read ?fields=, ?limit=, ?cursor= and ?all= for a list endpoint.
+
+    Raises ValueError with a client-facing message on bad input.
+    """
+    fields = None
+    raw_fields = request.args.get("fields")
+    if raw_fields:
+        fields = [f.strip() for f in raw_fields.split(",") if f.strip()]
+        unknown = [f for f in fields if f not in allowed_fields]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+
+    unpaginated = request.args.get("all", "").lower() in ("1", "true", "yes")
+    try:
+        limit = int(request.args.get("limit", DEFAULT_PAGE_SIZE))
+        cursor = int(request.args["cursor"]) if request.args.get("cursor") else None
+    except ValueError:
+        raise ValueError("limit and cursor must be integers")
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    return fields, limit, cursor, unpaginated
+
+
+def keyset_page(query, id_column, limit, cursor, key=lambda row: row.id):
+    """Return (rows, next_cursor) for the page of query after cursor, ordered by id."""
+    if cursor is not None:
+        query = query.filter(id_column > cursor)
+    rows = query.order_by(id_column).limit(limit + 1).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, key(rows[-1])
+    return rows, None
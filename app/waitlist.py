@@ -0,0 +1,132 @@
+"""Per-class waitlists ordered by enrollments.waitlist_position.
+
+Only waitlisted enrollments have a position, and the (class_id,
+waitlist_position) index is the priority queue. The head of a class's
+line is one index seek. New entries take classes.waitlist_tail + 1.
+Positions in a class stay contiguous: promoting the head leaves the
+others alone, and leaving from the middle shifts the rows behind down by
+one. A student's place in line is therefore their position minus the
+head's, plus one, without counting the rows ahead.
+
+Counters and capacity are app.rosters' business; the helpers here only
+keep positions in step and must run in the same transaction.
+"""
+from sqlalchemy import select, update
+from . import activity, db, rosters, transcripts
+from .models import Class, Enrollment, EnrollmentStatus, User
+
+
+def _execute(stmt):
+    return db.session.execute(stmt.execution_options(synchronize_session=False))
+
+
+def _line(class_id):
+    return select(Enrollment.waitlist_position).where(
+        Enrollment.class_id == class_id, Enrollment.waitlist_position.is_not(None)
+    )
+
+
+def head(class_id):
+    """Position of the first student in line, or None when nobody waits."""
+    return db.session.execute(_line(class_id).order_by(Enrollment.waitlist_position).limit(1)).scalar()
+
+
+def enqueue(enrollment):
+    """Put an enrollment (already counted as waitlisted) at the back of its class's line."""
+    enrollment.waitlist_position = _execute(
+        update(Class).where(Class.id == enrollment.class_id)
+        .values(waitlist_tail=Class.waitlist_tail + 1).returning(Class.waitlist_tail)
+    ).scalar()
+
+
+def leave(enrollment):
+    """Take an enrollment out of line before its status changes or it is deleted."""
+    position = enrollment.waitlist_position
+    if position is None:
+        return
+    if position != head(enrollment.class_id):
+        _execute(
+            update(Enrollment)
+            .where(Enrollment.class_id == enrollment.class_id, Enrollment.waitlist_position > position)
+            .values(waitlist_position=Enrollment.waitlist_position - 1)
+        )
+        _execute(update(Class).where(Class.id == enrollment.class_id)
+                 .values(waitlist_tail=Class.waitlist_tail - 1))
+    enrollment.waitlist_position = None
+
+
+def rank(enrollment):
+    """1-based place in line, or None if the enrollment is not waitlisted."""
+    if enrollment.waitlist_position is None:
+        return None
+    return enrollment.waitlist_position - head(enrollment.class_id) + 1
+
+
+def promote(class_id, exclude=None):
+    """Move students from the head of the line into free seats. Returns their enrollment ids.
+
+    exclude is an enrollment that just gave up its seat and must not win it back.
+    """
+    promoted, class_name = [], None
+    while True:
+        seat = _execute(
+            update(Class)
+            .where(Class.id == class_id, Class.waitlisted_count > 0, rosters.has_room())
+            .values(waitlisted_count=Class.waitlisted_count - 1, active_count=Class.active_count + 1)
+        )
+        if not seat.rowcount:
+            break
+        first = (
+            select(Enrollment.id)
+            .where(Enrollment.class_id == class_id, Enrollment.waitlist_position.is_not(None),
+                   Enrollment.id != exclude)
+            .order_by(Enrollment.waitlist_position)
+            .limit(1)
+            .scalar_subquery()
+        )
+        row = _execute(
+            update(Enrollment).where(Enrollment.id == first)
+            .values(status=EnrollmentStatus.active, waitlist_position=None)
+            .returning(Enrollment.id, Enrollment.student_id,
+                       select(User.name).where(User.id == Enrollment.student_id).scalar_subquery())
+        ).first()
+        if row is None:
+            # The counter said someone was waiting but the line is empty; undo the seat
+            rosters.refresh([class_id])
+            break
+        promoted.append(row.id)
+        transcripts.touch([row.student_id])
+        if class_name is None:
+            class_name = db.session.execute(select(Class.name).where(Class.id == class_id)).scalar()
+        activity.record("enrollment.promoted", f"{row[2]} moved off the waitlist into {class_name}",
+                        subject_id=row.student_id)
+    return promoted
+
+
+def rebuild(class_ids=None):
+    """Renumber every waitlist from 1, keeping the current order (unnumbered rows last, by id)."""
+    query = (
+        select(Enrollment.id, Enrollment.class_id)
+        .where(Enrollment.status == EnrollmentStatus.waitlisted)
+        .order_by(Enrollment.class_id, Enrollment.waitlist_position.is_(None),
+                  Enrollment.waitlist_position, Enrollment.id)
+    )
+    clear = update(Enrollment).where(Enrollment.status != EnrollmentStatus.waitlisted,
+                                     Enrollment.waitlist_position.is_not(None))
+    tails = update(Class)
+    if class_ids is not None:
+        class_ids = list(class_ids)
+        if not class_ids:
+            return
+        query = query.where(Enrollment.class_id.in_(class_ids))
+        clear = clear.where(Enrollment.class_id.in_(class_ids))
+        tails = tails.where(Class.id.in_(class_ids))
+    positions, counts = [], {}
+    for enrollment_id, class_id in db.session.execute(query):
+        counts[class_id] = counts.get(class_id, 0) + 1
+        positions.append({"id": enrollment_id, "waitlist_position": counts[class_id]})
+    _execute(clear.values(waitlist_position=None))
+    _execute(tails.values(waitlist_tail=0))
+    if positions:
+        db.session.execute(update(Enrollment), positions)
+        db.session.execute(update(Class), [{"id": c, "waitlist_tail": n} for c, n in counts.items()])
@@ -0,0 +1,71 @@
+"""Compare the async read endpoints (asgi:app) with the sync WSGI app.
+
+    python -m bench.asgi_vs_wsgi --seed-db --workers 1 --concurrency 64
+
+Replays the GET scenarios of bench/scenarios.jsonl that app.asgi serves
+natively, first against gunicorn sync workers running wsgi:app and then
+against uvicorn workers running asgi:app, with the same request plan and
+the same number of workers.
+"""
+import argparse
+from urllib.parse import urlsplit
+
+from app import create_app
+from app.asgi import ROUTES
+from bench.http_bench import (HERE, GunicornDriver, build_contexts, load_scenarios, make_config,
+                              plan_requests, print_report, run, seed_database, summarize)
+
+SERVERS = {
+    "wsgi": ("sync", "wsgi:app"),
+    "asgi": ("uvicorn.workers.UvicornWorker", "asgi:app"),
+}
+
+
+def async_scenarios(path):
+    return [s for s in load_scenarios(path)
+            if s["method"] == "GET" and urlsplit(s["path"]).path.rstrip("/") in ROUTES]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ASGI vs WSGI read benchmark.")
+    parser.add_argument("--database", default="sqlite:////tmp/ustadi-bench.db")
+    parser.add_argument("--scenarios", default=str(HERE / "scenarios.jsonl"))
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--random-seed", type=int, default=1)
+    parser.add_argument("--seed-db", action="store_true", help="reset and seed the database first")
+    parser.add_argument("--students", type=int, default=2000)
+    parser.add_argument("--teachers", type=int, default=50)
+    parser.add_argument("--classes", type=int, default=200)
+    parser.add_argument("--density", type=float, default=0.03)
+    parser.add_argument("--grades", type=int, default=3)
+    parser.add_argument("--years", default="2023/2024,2024/2025")
+    args = parser.parse_args()
+
+    app = create_app(make_config(args.database))
+    if args.seed_db:
+        seed_database(app, args)
+    planned = plan_requests(async_scenarios(args.scenarios), build_contexts(app),
+                            args.requests, args.random_seed)
+
+    throughput = {}
+    for name, (worker_class, app_module) in SERVERS.items():
+        driver = GunicornDriver(args.database, app.config["JWT_SECRET_KEY"], args.workers,
+                                args.port, worker_class, app_module)
+        driver.start()
+        try:
+            results, elapsed = run(driver, planned, args.concurrency)
+        finally:
+            driver.stop()
+        report = summarize(results, elapsed)
+        throughput[name] = report["throughput_rps"]
+        print(f"\n== {name} ({app_module}, {args.workers} x {worker_class}) ==")
+        print_report(report)
+
+    print(f"\nasgi/wsgi throughput: {throughput['asgi'] / throughput['wsgi']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
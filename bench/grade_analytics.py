@@ -0,0 +1,67 @@
+"""Time term-wide grade analytics, cold and cached, with and without NumPy.
+
+Usage: python -m bench.grade_analytics [--classes 5000] [--students 30] [--repeat 3]
+"""
+import argparse
+import random
+import time
+
+from config import TestingConfig
+from app import create_app, db, grade_stats
+from app.analytics import analytics, np
+from app.cache import MemoryBackend
+from app.models import User, Class, Enrollment, Grade, Role, Semester
+
+TERM = (Semester.first_semester, "2024/2025")
+
+
+def seed(classes, students):
+    rng = random.Random(1)
+    db.session.execute(User.__table__.insert(), [
+        {"name": f"Student {i}", "email": f"student{i}@bench.local", "password_hash": "x", "role": Role.student}
+        for i in range(classes * students // 4)
+    ])
+    db.session.execute(Class.__table__.insert(), [{"name": f"Class {i}", "description": ""} for i in range(classes)])
+    db.session.execute(Enrollment.__table__.insert(), [
+        {"student_id": 1 + (c * 7 + s) % (classes * students // 4), "class_id": c + 1, "status": "active",
+         "semester": TERM[0], "academic_year": TERM[1]}
+        for c in range(classes) for s in range(students)
+    ])
+    db.session.execute(Grade.__table__.insert(), [
+        {"enrollment_id": e, "score": round(rng.gauss(68, 14), 1), "remarks": ""}
+        for e in range(1, classes * students + 1) for _ in range(2)
+    ])
+    grade_stats.rebuild()
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--classes", type=int, default=5000)
+    parser.add_argument("--students", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    app = create_app(TestingConfig)
+    with app.app_context():
+        db.create_all()
+        seed(args.classes, args.students)
+        print(f"{args.classes} classes x {args.students} students")
+        for label, use_numpy in [("python", False)] + ([("numpy", True)] if np is not None else []):
+            analytics.use_numpy = use_numpy
+            cold = []
+            for _ in range(args.repeat):
+                analytics.cache = MemoryBackend(args.classes * 2)
+                elapsed, stats = timed(lambda: analytics.for_term(*TERM))
+                cold.append(elapsed)
+            warm, _ = timed(lambda: analytics.for_term(*TERM))
+            print(f"  {label:6} cold {min(cold) * 1000:8.1f} ms  cached {warm * 1000:8.1f} ms  {len(stats)} classes")
+
+
+if __name__ == "__main__":
+    main()
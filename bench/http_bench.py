@@ -0,0 +1,314 @@
+"""Replay weighted request scenarios against the API and compare with a baseline.
+
+    python -m bench.http_bench --seed-db --requests 2000
+    python -m bench.http_bench --driver gunicorn --workers 2 --concurrency 8
+    python -m bench.http_bench --driver gunicorn --worker-class uvicorn.workers.UvicornWorker \
+        --app-module asgi:app
+    python -m bench.http_bench --save-baseline      # record bench/baseline.json
+
+Scenarios are read from bench/scenarios.jsonl, one JSON object per line:
+name, weight, as (admin/teacher/student), method, path and an optional
+json body. "{placeholders}" in the path and body are filled per request
+from the caller's context (class_id, enrollment_id, email, password,
+score). Statement counts come from the Server-Timing header, so the
+server always runs with INSTRUMENTATION_ENABLED.
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+from flask_jwt_extended import create_access_token
+
+from config import Config
+from app import create_app, db
+from app.models import User, Class, Enrollment, Role
+
+HERE = Path(__file__).parent
+SYNTHETIC_PASSWORD = "Synthetic@123"
+STATEMENTS = re.compile(r'desc="(\d+) statements"')
+
+
+def load_scenarios(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def make_config(database_url):
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = database_url
+        INSTRUMENTATION_ENABLED = True
+    return BenchConfig
+
+
+def seed_database(app, args):
+    import seed
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        seed.seed_demo()
+        seed.seed_synthetic(args.students, args.teachers, args.classes, args.density,
+                            args.grades, args.years.split(","), password=SYNTHETIC_PASSWORD)
+
+
+def build_contexts(app, sample=200):
+    """Per-role lists of request contexts: a token plus placeholder values."""
+    with app.app_context():
+        def token(user):
+            return create_access_token(identity=user.id, additional_claims={"role": user.role.value})
+
+        contexts = {"admin": [], "teacher": [], "student": []}
+        for user in User.query.filter_by(role=Role.admin).limit(sample):
+            contexts["admin"].append({"token": token(user)})
+        students = (
+            User.query.filter(User.role == Role.student, User.email.like("%@synthetic.local"))
+            .limit(sample).all()
+        )
+        for user in students:
+            contexts["student"].append({"token": token(user), "email": user.email,
+                                        "password": SYNTHETIC_PASSWORD})
+        teacher_rows = (
+            db.session.query(User, Class.id, db.func.min(Enrollment.id))
+            .join(Class, Class.teacher_id == User.id)
+            .join(Enrollment, Enrollment.class_id == Class.id)
+            .group_by(User.id, Class.id)
+            .limit(sample)
+            .all()
+        )
+        for user, class_id, enrollment_id in teacher_rows:
+            contexts["teacher"].append({"token": token(user), "class_id": class_id,
+                                        "enrollment_id": enrollment_id})
+        return contexts
+
+
+def fill(template, values):
+    if isinstance(template, str):
+        return template.format(**values)
+    if isinstance(template, dict):
+        return {k: fill(v, values) for k, v in template.items()}
+    return template
+
+
+def plan_requests(scenarios, contexts, count, seed):
+    rng = random.Random(seed)
+    usable = [s for s in scenarios if contexts.get(s["as"])]
+    weights = [s.get("weight", 1) for s in usable]
+    planned = []
+    for _ in range(count):
+        scenario = rng.choices(usable, weights)[0]
+        context = {**rng.choice(contexts[scenario["as"]]), "score": round(rng.uniform(40, 100), 1)}
+        body = fill(scenario["json"], context) if "json" in scenario else None
+        planned.append((scenario["name"], scenario["method"], fill(scenario["path"], context),
+                        body, context["token"]))
+    return planned
+
+
+class FlaskDriver:
+    def __init__(self, app):
+        self.app = app
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def session(self):
+        client = self.app.test_client()
+
+        def send(method, path, body, token):
+            response = client.open(path, method=method, json=body,
+                                   headers={"Authorization": f"Bearer {token}"})
+            return response.status_code, response.headers.get("Server-Timing", "")
+        return send
+
+
+class GunicornDriver:
+    def __init__(self, database_url, secret, workers, port, worker_class="sync", app_module="wsgi:app",
+                 threads=1, env=None):
+        self.env = {**os.environ, "DATABASE_URL": database_url, "JWT_SECRET_KEY": secret,
+                    "INSTRUMENTATION_ENABLED": "1", **(env or {})}
+        self.workers = workers
+        self.port = port
+        self.worker_class = worker_class
+        self.app_module = app_module
+        self.threads = threads
+        self.process = None
+
+    def start(self):
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "-w", str(self.workers), "-k", self.worker_class,
+             "--threads", str(self.threads), "--backlog", "8192",
+             "-b", f"127.0.0.1:{self.port}", "--log-level", "warning", self.app_module],
+            env=self.env, cwd=HERE.parent,
+        )
+        deadline = time.time() + 30
+        while time.time() < deadline:
+            try:
+                conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=1)
+                conn.request("GET", "/api/health")
+                if conn.getresponse().status == 200:
+                    return
+            except OSError:
+                time.sleep(0.2)
+        raise RuntimeError("gunicorn did not become healthy")
+
+    def stop(self):
+        if self.process:
+            self.process.terminate()
+            self.process.wait(timeout=10)
+
+    def session(self):
+        conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=30)
+
+        def send(method, path, body, token):
+            headers = {"Authorization": f"Bearer {token}"}
+            payload = None
+            if body is not None:
+                payload = json.dumps(body)
+                headers["Content-Type"] = "application/json"
+            conn.request(method, path, body=payload, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            return response.status, response.getheader("Server-Timing", "")
+        return send
+
+
+def run(driver, planned, concurrency):
+    results = []
+    lock = threading.Lock()
+    chunks = [planned[i::concurrency] for i in range(concurrency)]
+
+    def worker(chunk):
+        send = driver.session()
+        local = []
+        for name, method, path, body, token in chunk:
+            start = time.perf_counter()
+            status, timing = send(method, path, body, token)
+            elapsed = (time.perf_counter() - start) * 1000
+            match = STATEMENTS.search(timing)
+            local.append((name, status, elapsed, int(match.group(1)) if match else None))
+        with lock:
+            results.extend(local)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(chunk,)) for chunk in chunks]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results, time.perf_counter() - started
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(results, elapsed):
+    report = {"throughput_rps": round(len(results) / elapsed, 1), "scenarios": {}}
+    for name in sorted({r[0] for r in results}):
+        rows = [r for r in results if r[0] == name]
+        latencies = [r[2] for r in rows]
+        statements = [r[3] for r in rows if r[3] is not None]
+        report["scenarios"][name] = {
+            "requests": len(rows),
+            "errors": sum(1 for r in rows if r[1] >= 400),
+            "p50_ms": round(percentile(latencies, 50), 2),
+            "p95_ms": round(percentile(latencies, 95), 2),
+            "p99_ms": round(percentile(latencies, 99), 2),
+            "avg_statements": round(sum(statements) / len(statements), 2) if statements else None,
+        }
+    return report
+
+
+def compare(report, baseline, tolerance):
+    """Return a list of human-readable regressions against the baseline."""
+    regressions = []
+    for name, current in report["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(name)
+        if not before:
+            continue
+        if (current["avg_statements"] or 0) > (before["avg_statements"] or 0) + 0.5:
+            regressions.append(f"{name}: statements {before['avg_statements']} -> {current['avg_statements']}")
+        if current["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {before['p95_ms']}ms -> {current['p95_ms']}ms")
+    return regressions
+
+
+def print_report(report):
+    print(f"{'scenario':24} {'n':>6} {'err':>4} {'p50':>8} {'p95':>8} {'p99':>8} {'stmts':>6}")
+    for name, s in report["scenarios"].items():
+        print(f"{name:24} {s['requests']:6} {s['errors']:4} {s['p50_ms']:8.2f} {s['p95_ms']:8.2f} "
+              f"{s['p99_ms']:8.2f} {s['avg_statements'] if s['avg_statements'] is not None else '-':>6}")
+    print(f"throughput: {report['throughput_rps']} req/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end HTTP benchmark.")
+    parser.add_argument("--database", default="sqlite:////tmp/ustadi-bench.db")
+    parser.add_argument("--scenarios", default=str(HERE / "scenarios.jsonl"))
+    parser.add_argument("--driver", choices=["flask", "gunicorn"], default="flask")
+    parser.add_argument("--workers", type=int, default=2, help="gunicorn workers")
+    parser.add_argument("--worker-class", default="sync", help="gunicorn worker class")
+    parser.add_argument("--app-module", default="wsgi:app", help="wsgi:app or asgi:app")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--random-seed", type=int, default=1)
+    parser.add_argument("--seed-db", action="store_true", help="reset and seed the database first")
+    parser.add_argument("--students", type=int, default=2000)
+    parser.add_argument("--teachers", type=int, default=50)
+    parser.add_argument("--classes", type=int, default=200)
+    parser.add_argument("--density", type=float, default=0.03)
+    parser.add_argument("--grades", type=int, default=3)
+    parser.add_argument("--years", default="2023/2024,2024/2025")
+    parser.add_argument("--baseline", default=str(HERE / "baseline.json"))
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed p95 slowdown")
+    args = parser.parse_args()
+
+    app = create_app(make_config(args.database))
+    if args.seed_db:
+        seed_database(app, args)
+    contexts = build_contexts(app)
+    planned = plan_requests(load_scenarios(args.scenarios), contexts, args.requests, args.random_seed)
+
+    if args.driver == "flask":
+        driver = FlaskDriver(app)
+    else:
+        driver = GunicornDriver(args.database, app.config["JWT_SECRET_KEY"], args.workers, args.port,
+                                args.worker_class, args.app_module)
+    driver.start()
+    try:
+        results, elapsed = run(driver, planned, args.concurrency)
+    finally:
+        driver.stop()
+
+    report = summarize(results, elapsed)
+    report["driver"] = args.driver
+    print_report(report)
+
+    if args.save_baseline:
+        Path(args.baseline).write_text(json.dumps(report, indent=2) + "\n")
+        print(f"baseline written to {args.baseline}")
+        return
+    if not Path(args.baseline).exists():
+        print("no baseline to compare against (run with --save-baseline)")
+        return
+    regressions = compare(report, json.loads(Path(args.baseline).read_text()), args.tolerance)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
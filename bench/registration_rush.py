@@ -0,0 +1,145 @@
+"""Load-test student self-enrollment at registration open.
+
+    python -m bench.registration_rush --students 5000 --capacity 300
+    python -m bench.registration_rush --modes rush --threads 512 --batch-size 500
+
+Seeds a fresh database with --students students and one class of
+--capacity seats. For each mode it starts gunicorn (one gthread worker,
+since the rush queue is per process) and fires one POST
+/api/enrollments/enroll/<id> per student from its own client thread.
+"direct" is the normal write path and "rush" sets
+REGISTRATION_RUSH_ENABLED.
+
+Requests are released in a --ramp-ms window in a known order, so arrival
+order is known. Fairness is reported two ways:
+- how many of the first --capacity arrivals got a seat (1.0 is strict
+  first come, first served)
+- Jain's index over request latencies (1.0 means everyone waited the
+  same)
+"""
+import argparse
+import http.client
+import threading
+import time
+from collections import Counter
+
+from flask_jwt_extended import create_access_token
+
+from app import create_app, db, rosters
+from app.models import User, Class, Enrollment, Role
+from bench.http_bench import GunicornDriver, make_config, percentile
+
+MODES = {"direct": {}, "rush": {"REGISTRATION_RUSH_ENABLED": "1"}}
+
+
+def seed(app, students, capacity):
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        teacher = User(name="Rush Teacher", email="rush.teacher@synthetic.local", role=Role.teacher,
+                       password_hash="x")
+        cls = Class(name="Rush 101", description="", teacher=teacher, capacity=capacity)
+        db.session.add(cls)
+        db.session.execute(User.__table__.insert(), [
+            {"name": f"Rush Student {i}", "email": f"rush{i}@synthetic.local", "role": Role.student,
+             "password_hash": "x"} for i in range(students)
+        ])
+        db.session.commit()
+        tokens = [create_access_token(identity=uid, additional_claims={"role": "student"})
+                  for uid in db.session.scalars(db.select(User.id).where(User.role == Role.student)
+                                                .order_by(User.id))]
+        return cls.id, tokens
+
+
+def fire(port, class_id, tokens, ramp):
+    """One request per token; token i is released at i/len(tokens) of the ramp."""
+    results = [None] * len(tokens)
+    ready = threading.Barrier(len(tokens) + 1)
+
+    def client(i, token):
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=120)
+        ready.wait()
+        release = started + ramp * i / len(tokens)
+        time.sleep(max(0, release - time.perf_counter()))
+        sent = time.perf_counter()
+        try:
+            conn.request("POST", f"/api/enrollments/enroll/{class_id}",
+                         headers={"Authorization": f"Bearer {token}", "Content-Length": "0"})
+            status = conn.getresponse().status
+        except OSError:
+            status = 0
+        results[i] = (status, (time.perf_counter() - sent) * 1000)
+
+    threading.stack_size(256 * 1024)
+    threads = [threading.Thread(target=client, args=(i, t)) for i, t in enumerate(tokens)]
+    for t in threads:
+        t.start()
+    started = time.perf_counter() + 0.5
+    ready.wait()
+    for t in threads:
+        t.join()
+    return results, time.perf_counter() - started
+
+
+def jain(values):
+    return sum(values) ** 2 / (len(values) * sum(v * v for v in values)) if values else 1.0
+
+
+def report(app, class_id, capacity, results, elapsed):
+    with app.app_context():
+        seated = set(db.session.scalars(
+            db.select(Enrollment.student_id).where(Enrollment.class_id == class_id,
+                                                   Enrollment.status == "active")))
+        first_ids = db.session.scalars(db.select(User.id).where(User.role == Role.student)
+                                       .order_by(User.id).limit(capacity)).all()
+        drift = rosters.find_drift()
+    latencies = [ms for status, ms in results if status]
+    return {
+        "requests": len(results),
+        "throughput_rps": round(len(results) / elapsed, 1),
+        "statuses": dict(sorted(Counter(status for status, _ in results).items())),
+        "seated": len(seated),
+        "fifo": round(len(seated & set(first_ids)) / max(1, min(capacity, len(seated))), 3),
+        "p50_ms": round(percentile(latencies, 50), 1),
+        "p99_ms": round(percentile(latencies, 99), 1),
+        "max_ms": round(max(latencies), 1),
+        "jain": round(jain(latencies), 3),
+        "counter_drift": drift,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Registration-rush load test.")
+    parser.add_argument("--database", default="sqlite:////tmp/ustadi-rush.db")
+    parser.add_argument("--modes", default="direct,rush")
+    parser.add_argument("--students", type=int, default=5000)
+    parser.add_argument("--capacity", type=int, default=300)
+    parser.add_argument("--threads", type=int, default=256, help="gunicorn gthread threads")
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--batch-wait-ms", type=float, default=5)
+    parser.add_argument("--ramp-ms", type=float, default=1000)
+    parser.add_argument("--port", type=int, default=8767)
+    args = parser.parse_args()
+
+    app = create_app(make_config(args.database))
+    for mode in args.modes.split(","):
+        class_id, tokens = seed(app, args.students, args.capacity)
+        driver = GunicornDriver(args.database, app.config["JWT_SECRET_KEY"], 1, args.port, "gthread",
+                                threads=args.threads, env={
+                                    **MODES[mode],
+                                    "REGISTRATION_BATCH_SIZE": str(args.batch_size),
+                                    "REGISTRATION_BATCH_WAIT_MS": str(args.batch_wait_ms),
+                                    "INSTRUMENTATION_ENABLED": "0",
+                                })
+        driver.start()
+        try:
+            results, elapsed = fire(args.port, class_id, tokens, args.ramp_ms / 1000)
+        finally:
+            driver.stop()
+        print(f"== {mode} ==")
+        for key, value in report(app, class_id, args.capacity, results, elapsed).items():
+            print(f"  {key:15} {value}")
+
+
+if __name__ == "__main__":
+    main()
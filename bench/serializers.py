@@ -0,0 +1,78 @@
+"""Compare the FieldPlan serializers with the ORM to_dict + jsonify path.
+
+Usage: python -m bench.serializers [--rows 10000] [--repeat 5]
+"""
+import argparse
+import time
+from datetime import datetime
+
+from flask import jsonify
+
+from config import TestingConfig
+from app import create_app, db, serializers
+from app.models import User, Class, Role
+
+
+def seed(rows):
+    now = datetime.utcnow()
+    db.session.execute(User.__table__.insert(), [
+        {"name": f"User {i}", "email": f"user{i}@bench.local", "password_hash": "x",
+         "role": Role.teacher if i % 20 == 0 else Role.student, "created_at": now}
+        for i in range(rows)
+    ])
+    db.session.execute(Class.__table__.insert(), [
+        {"name": f"Class {i}", "description": "", "teacher_id": 1 + (i // 20) * 20}
+        for i in range(rows)
+    ])
+    db.session.commit()
+
+
+def best_of(repeat, fn):
+    timings = []
+    for _ in range(repeat):
+        db.session.expunge_all()
+        start = time.perf_counter()
+        size = len(fn())
+        timings.append(time.perf_counter() - start)
+    return min(timings), size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    app = create_app(TestingConfig)
+    with app.app_context(), app.test_request_context():
+        db.create_all()
+        seed(args.rows)
+        orjson = serializers.orjson
+
+        def to_dict_path(model):
+            return lambda: jsonify([obj.to_dict() for obj in model.query.all()]).get_data()
+
+        def plan_path(plan, backend):
+            def run():
+                serializers.orjson = backend
+                return serializers.dumps(plan.dicts(plan.query(db.session).all()))
+            return run
+
+        cases = [
+            ("users", User, serializers.user_plan()),
+            ("classes", Class, serializers.class_plan()),
+        ]
+        print(f"{args.rows} rows, best of {args.repeat}")
+        for name, model, plan in cases:
+            base, size = best_of(args.repeat, to_dict_path(model))
+            print(f"  {name:8} to_dict+jsonify   {base * 1000:8.1f} ms  {size} bytes")
+            backends = [("json", None)] + ([("orjson", orjson)] if orjson else [])
+            for label, backend in backends:
+                elapsed, size = best_of(args.repeat, plan_path(plan, backend))
+                print(f"  {name:8} plan+{label:13} {elapsed * 1000:8.1f} ms  {size} bytes  "
+                      f"x{base / elapsed:.1f}")
+        serializers.orjson = orjson
+
+
+if __name__ == "__main__":
+    main()
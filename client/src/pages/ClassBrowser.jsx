@@ -13,7 +13,7 @@ const ClassBrowser = () => {
   useEffect(() => {
     const fetchClasses = async () => {
       try {
-        const response = await api.get('/classes');
+        const response = await api.get('/classes?all=true');
         setClasses(response.data.classes);
       } catch (error) {
         console.error('Failed to fetch classes:', error);
@@ -23,7 +23,7 @@ const ClassList = () => {
 
   const fetchClasses = async () => {
     try {
-      const response = await api.get('/classes');
+      const response = await api.get('/classes?all=true');
       setClasses(response.data.classes);
     } catch (error) {
       console.error('Failed to fetch classes:', error);
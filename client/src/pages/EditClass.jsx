@@ -37,7 +37,7 @@ const EditClass = () => {
       try {
         const [classRes, usersRes] = await Promise.all([
           api.get(`/classes/${id}`),
-          api.get('/users'),
+          api.get('/users?all=true'),
         ]);
         
         setClassData(classRes.data);
@@ -17,7 +17,7 @@ const UserManagement = () => {
   const fetchUsers = async () => {
     setLoading(true);
     try {
-      const endpoint = roleFilter ? `/users?role=${roleFilter}` : '/users';
+      const endpoint = roleFilter ? `/users?role=${roleFilter}&all=true` : '/users?all=true';
       const res = await api.get(endpoint);
       setUsers(res.data.users);
     } catch (error) {
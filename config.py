@@ -1,7 +1,128 @@
 import os
 
+
+def _env(name, default, cast=str):
+    value = os.environ.get(name)
+    if value is None or value == '':
+        return default
+    if cast is bool:
+        return value.lower() in ('1', 'true', 'yes')
+    return cast(value)
+
+
+def _database_url():
+    url = os.environ.get('DATABASE_URL') or 'sqlite:///' + os.path.join(os.path.abspath(os.path.dirname(__file__)), 'instance/app.db')
+    # Render and Heroku hand out postgres://, which SQLAlchemy no longer accepts
+    if url.startswith('postgres://'):
+        url = 'postgresql://' + url[len('postgres://'):]
+    return url
+
+
+# Development fallbacks; app.settings.validate rejects them in production
+INSECURE_DEFAULTS = {
+    'SECRET_KEY': 'a-very-secret-key',
+    'JWT_SECRET_KEY': 'another-very-secret-key',
+}
+
+
 class Config:
-    SECRET_KEY = os.environ.get('SECRET_KEY') or 'a-very-secret-key'
-    JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'another-very-secret-key'
-    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///' + os.path.join(os.path.abspath(os.path.dirname(__file__)), 'instance/app.db')
+    ENV_NAME = 'development'
+    SECRET_KEY = os.environ.get('SECRET_KEY') or INSECURE_DEFAULTS['SECRET_KEY']
+    JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or INSECURE_DEFAULTS['JWT_SECRET_KEY']
+    JWT_ACCESS_TOKEN_EXPIRES = _env('JWT_ACCESS_TOKEN_EXPIRES', 3600, int)
+    MAX_CONTENT_LENGTH = 16 * 1024 * 1024
+    SQLALCHEMY_DATABASE_URI = _database_url()
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Optional read replica for GET endpoints (app.replica); writers stay on
+    # the primary for REPLICA_STICKY_SECONDS after each commit
+    SQLALCHEMY_REPLICA_URI = os.environ.get('DATABASE_REPLICA_URL') or None
+    REPLICA_STICKY_SECONDS = _env('REPLICA_STICKY_SECONDS', 5, float)
+    # Connection pool, turned into SQLALCHEMY_ENGINE_OPTIONS by app.settings.
+    # Every gunicorn worker (WEB_CONCURRENCY) owns a pool of up to
+    # DB_POOL_SIZE + DB_MAX_OVERFLOW connections.
+    DB_POOL_SIZE = _env('DB_POOL_SIZE', 5, int)
+    DB_MAX_OVERFLOW = _env('DB_MAX_OVERFLOW', 5, int)
+    DB_POOL_TIMEOUT = _env('DB_POOL_TIMEOUT', 10, float)
+    DB_POOL_RECYCLE = _env('DB_POOL_RECYCLE', 1800, int)
+    DB_POOL_PRE_PING = _env('DB_POOL_PRE_PING', True, bool)
+    DB_STATEMENT_TIMEOUT_MS = _env('DB_STATEMENT_TIMEOUT_MS', 0, int)
+    DB_MAX_CONNECTIONS = _env('DB_MAX_CONNECTIONS', 100, int)
+    WEB_CONCURRENCY = _env('WEB_CONCURRENCY', 1, int)
+    POOL_METRICS_ENABLED = _env('POOL_METRICS_ENABLED', False, bool)
+    # Rows fetched per round trip by the streaming gradebook export
+    EXPORT_BATCH_SIZE = _env('EXPORT_BATCH_SIZE', 1000, int)
+    # Bulk import: rows validated per batch of lookups, rows per commit,
+    # and how many row errors the report lists
+    IMPORT_CHUNK_SIZE = _env('IMPORT_CHUNK_SIZE', 1000, int)
+    IMPORT_TRANSACTION_SIZE = _env('IMPORT_TRANSACTION_SIZE', 5000, int)
+    IMPORT_MAX_ERRORS = _env('IMPORT_MAX_ERRORS', 1000, int)
+    INSTRUMENTATION_ENABLED = _env('INSTRUMENTATION_ENABLED', False, bool)
+    INSTRUMENTATION_MAX_STATEMENTS = _env('INSTRUMENTATION_MAX_STATEMENTS', 0, int) or None
+    PRINCIPAL_CACHE_SIZE = _env('PRINCIPAL_CACHE_SIZE', 10000, int)
+    PRINCIPAL_CACHE_TTL = _env('PRINCIPAL_CACHE_TTL', 300, int)
+    # "memory" is per process: a write only invalidates the worker that served it,
+    # so with WEB_CONCURRENCY > 1 the other workers can serve the old response
+    # (and its ETag) for up to RESPONSE_CACHE_TTL seconds; 0 means until evicted.
+    # "file" shares versions and entries across the workers on a host and is
+    # always current, at the cost of an SQLite read per cached request.
+    # Either keeps at most RESPONSE_CACHE_SIZE entries, each for RESPONSE_CACHE_TTL.
+    RESPONSE_CACHE_BACKEND = _env('RESPONSE_CACHE_BACKEND', 'memory')
+    RESPONSE_CACHE_PATH = _env('RESPONSE_CACHE_PATH', '/tmp/ustadi-response-cache.db')
+    RESPONSE_CACHE_SIZE = _env('RESPONSE_CACHE_SIZE', 1024, int)
+    RESPONSE_CACHE_TTL = _env('RESPONSE_CACHE_TTL', 10, float)
+    # Registration rush: queue self-enrollments per class and apply them in batches
+    REGISTRATION_RUSH_ENABLED = _env('REGISTRATION_RUSH_ENABLED', False, bool)
+    REGISTRATION_BATCH_SIZE = _env('REGISTRATION_BATCH_SIZE', 200, int)
+    REGISTRATION_BATCH_WAIT_MS = _env('REGISTRATION_BATCH_WAIT_MS', 5, float)
+    REGISTRATION_QUEUE_LIMIT = _env('REGISTRATION_QUEUE_LIMIT', 10000, int)
+    REGISTRATION_TIMEOUT = _env('REGISTRATION_TIMEOUT', 30, float)
+    # Newest activity events kept in memory per process for the dashboard feed
+    ACTIVITY_BUFFER_SIZE = _env('ACTIVITY_BUFFER_SIZE', 200, int)
+    # Grade analytics: cached (class, term) results per process; NumPy is used when installed
+    ANALYTICS_CACHE_SIZE = _env('ANALYTICS_CACHE_SIZE', 20000, int)
+    ANALYTICS_HISTOGRAM_BINS = _env('ANALYTICS_HISTOGRAM_BINS', 10, int)
+    ANALYTICS_USE_NUMPY = _env('ANALYTICS_USE_NUMPY', True, bool)
+    # Transcripts: default scale name (app.transcripts.SCALES plus TRANSCRIPT_SCALES) and memoized students per process
+    TRANSCRIPT_GRADING_SCALE = _env('TRANSCRIPT_GRADING_SCALE', 'letter_4')
+    TRANSCRIPT_SCALES = {}
+    TRANSCRIPT_CACHE_SIZE = _env('TRANSCRIPT_CACHE_SIZE', 10000, int)
+    # Any werkzeug method string, e.g. "scrypt:32768:8:1" or "pbkdf2:sha256:600000"
+    HASH_METHOD = _env('HASH_METHOD', 'scrypt')
+    HASH_POOL_WORKERS = _env('HASH_POOL_WORKERS', 2, int)
+    HASH_QUEUE_LIMIT = _env('HASH_QUEUE_LIMIT', 32, int)
+    HASH_ADMISSION_TIMEOUT = _env('HASH_ADMISSION_TIMEOUT', 0, float)
+
+
+class DevelopmentConfig(Config):
+    pass
+
+
+class ProductionConfig(Config):
+    ENV_NAME = 'production'
+    DB_MAX_OVERFLOW = _env('DB_MAX_OVERFLOW', 10, int)
+    DB_POOL_TIMEOUT = _env('DB_POOL_TIMEOUT', 5, float)
+    DB_STATEMENT_TIMEOUT_MS = _env('DB_STATEMENT_TIMEOUT_MS', 30000, int)
+
+
+class TestingConfig(Config):
+    ENV_NAME = 'testing'
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    JWT_SECRET_KEY = 'testing-secret'
+    HASH_METHOD = 'pbkdf2:sha256:1000'
+    HASH_POOL_WORKERS = 0
+
+
+CONFIGS = {
+    'development': DevelopmentConfig,
+    'production': ProductionConfig,
+    'testing': TestingConfig,
+}
+
+
+def get_config(name=None):
+    """Config class for name, or for FLASK_ENV (default development)."""
+    name = name or os.environ.get('FLASK_ENV') or 'development'
+    if name not in CONFIGS:
+        raise ValueError(f"Unknown environment {name!r}; expected one of {', '.join(CONFIGS)}")
+    return CONFIGS[name]
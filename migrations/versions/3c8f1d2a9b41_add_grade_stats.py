@@ -0,0 +1,54 @@
+"""Add grade_stats rollup table.
+
+Revision ID: 3c8f1d2a9b41
+Revises: edea5ee49e55
+Create Date: 2026-10-17 09:12:40.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c8f1d2a9b41'
+down_revision = 'edea5ee49e55'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('grade_stats',
+    sa.Column('enrollment_id', sa.Integer(), nullable=False),
+    sa.Column('class_id', sa.Integer(), nullable=False),
+    sa.Column('student_id', sa.Integer(), nullable=False),
+    sa.Column('score_count', sa.Integer(), nullable=False),
+    sa.Column('score_sum', sa.Float(), nullable=False),
+    sa.Column('score_sum_sq', sa.Float(), nullable=False),
+    sa.Column('score_min', sa.Float(), nullable=True),
+    sa.Column('score_max', sa.Float(), nullable=True),
+    sa.ForeignKeyConstraint(['class_id'], ['classes.id'], ),
+    sa.ForeignKeyConstraint(['enrollment_id'], ['enrollments.id'], ),
+    sa.ForeignKeyConstraint(['student_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('enrollment_id')
+    )
+    with op.batch_alter_table('grade_stats', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_grade_stats_class_id'), ['class_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_grade_stats_student_id'), ['student_id'], unique=False)
+
+    # Backfill from existing grades
+    op.execute(
+        "INSERT INTO grade_stats (enrollment_id, class_id, student_id, score_count, score_sum, "
+        "score_sum_sq, score_min, score_max) "
+        "SELECT e.id, e.class_id, e.student_id, COUNT(g.id), SUM(g.score), SUM(g.score * g.score), "
+        "MIN(g.score), MAX(g.score) "
+        "FROM enrollments e JOIN grades g ON g.enrollment_id = e.id "
+        "GROUP BY e.id, e.class_id, e.student_id"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('grade_stats', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_grade_stats_student_id'))
+        batch_op.drop_index(batch_op.f('ix_grade_stats_class_id'))
+
+    op.drop_table('grade_stats')
@@ -0,0 +1,56 @@
+"""Add indexes for the hot filter paths.
+
+Revision ID: 7a1e4c9d2b60
+Revises: 3c8f1d2a9b41
+Create Date: 2026-10-17 11:40:02.551930
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7a1e4c9d2b60'
+down_revision = '3c8f1d2a9b41'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    duplicates = op.get_bind().execute(sa.text(
+        "SELECT student_id, class_id FROM enrollments "
+        "GROUP BY student_id, class_id HAVING COUNT(*) > 1"
+    )).fetchall()
+    if duplicates:
+        raise RuntimeError(
+            f"{len(duplicates)} (student_id, class_id) pairs are enrolled more than once; "
+            "merge them before adding uq_enrollments_student_class"
+        )
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.create_index('ix_users_role_id', ['role', 'id'], unique=False)
+
+    with op.batch_alter_table('classes', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_classes_teacher_id'), ['teacher_id'], unique=False)
+
+    with op.batch_alter_table('enrollments', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_enrollments_class_id'), ['class_id'], unique=False)
+        batch_op.create_unique_constraint('uq_enrollments_student_class', ['student_id', 'class_id'])
+
+    with op.batch_alter_table('grades', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_grades_enrollment_id'), ['enrollment_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('grades', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_grades_enrollment_id'))
+
+    with op.batch_alter_table('enrollments', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_enrollments_student_class', type_='unique')
+        batch_op.drop_index(batch_op.f('ix_enrollments_class_id'))
+
+    with op.batch_alter_table('classes', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_classes_teacher_id'))
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index('ix_users_role_id')
@@ -0,0 +1,26 @@
+"""Add the per-class grade version used by the analytics cache.
+
+Revision ID: a93e6b1d7f52
+Revises: f1c7d5e2a840
+Create Date: 2026-10-17 19:12:44.381905
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a93e6b1d7f52'
+down_revision = 'f1c7d5e2a840'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('classes', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('grade_version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    with op.batch_alter_table('classes', schema=None) as batch_op:
+        batch_op.drop_column('grade_version')
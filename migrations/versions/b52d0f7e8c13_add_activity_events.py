@@ -0,0 +1,47 @@
+"""Add the activity_events log and backfill enrollment events.
+
+Revision ID: b52d0f7e8c13
+Revises: 7a1e4c9d2b60
+Create Date: 2026-10-17 14:05:37.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b52d0f7e8c13'
+down_revision = '7a1e4c9d2b60'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('activity_events',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('kind', sa.String(length=40), nullable=False),
+    sa.Column('actor_id', sa.Integer(), nullable=True),
+    sa.Column('subject_id', sa.Integer(), nullable=True),
+    sa.Column('description', sa.String(length=255), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('activity_events', schema=None) as batch_op:
+        batch_op.create_index('ix_activity_events_created_at_id', ['created_at', 'id'], unique=False)
+
+    # The old feed was derived from enrollments; keep that history, dated by enrollment_date
+    op.execute(
+        "INSERT INTO activity_events (created_at, kind, subject_id, description) "
+        "SELECT e.enrollment_date, 'enrollment.created', e.student_id, "
+        "'New student ' || u.name || ' enrolled in ' || c.name "
+        "FROM enrollments e JOIN users u ON u.id = e.student_id JOIN classes c ON c.id = e.class_id "
+        "WHERE e.enrollment_date IS NOT NULL "
+        "ORDER BY e.enrollment_date, e.id"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('activity_events', schema=None) as batch_op:
+        batch_op.drop_index('ix_activity_events_created_at_id')
+
+    op.drop_table('activity_events')
@@ -0,0 +1,26 @@
+"""Add the per-student transcript version used by the transcript memo.
+
+Revision ID: c28e5f04a7d9
+Revises: a93e6b1d7f52
+Create Date: 2026-10-17 21:03:17.552310
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c28e5f04a7d9'
+down_revision = 'a93e6b1d7f52'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('transcript_version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('transcript_version')
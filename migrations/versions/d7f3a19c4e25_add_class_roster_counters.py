@@ -0,0 +1,40 @@
+"""Add class capacity and per-status enrollment counters.
+
+Revision ID: d7f3a19c4e25
+Revises: b52d0f7e8c13
+Create Date: 2026-10-17 15:22:48.603117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7f3a19c4e25'
+down_revision = 'b52d0f7e8c13'
+branch_labels = None
+depends_on = None
+
+STATUSES = ('active', 'pending', 'dropped')
+
+
+def upgrade():
+    with op.batch_alter_table('classes', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('capacity', sa.Integer(), nullable=True))
+        for status in STATUSES:
+            batch_op.add_column(sa.Column(f'{status}_count', sa.Integer(), nullable=False, server_default='0'))
+
+    op.execute(
+        "UPDATE classes SET " + ", ".join(
+            f"{status}_count = (SELECT COUNT(*) FROM enrollments "
+            f"WHERE enrollments.class_id = classes.id AND enrollments.status = '{status}')"
+            for status in STATUSES
+        )
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('classes', schema=None) as batch_op:
+        for status in STATUSES:
+            batch_op.drop_column(f'{status}_count')
+        batch_op.drop_column('capacity')
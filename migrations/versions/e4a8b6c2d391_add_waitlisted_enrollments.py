@@ -0,0 +1,43 @@
+"""Add the waitlisted enrollment status and its class counter.
+
+Revision ID: e4a8b6c2d391
+Revises: d7f3a19c4e25
+Create Date: 2026-10-17 16:48:10.274531
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4a8b6c2d391'
+down_revision = 'd7f3a19c4e25'
+branch_labels = None
+depends_on = None
+
+OLD_STATUS = sa.Enum('active', 'dropped', 'pending', name='enrollmentstatus')
+NEW_STATUS = sa.Enum('active', 'dropped', 'pending', 'waitlisted', name='enrollmentstatus')
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        # ALTER TYPE ... ADD VALUE cannot run inside a transaction block before PostgreSQL 12
+        with op.get_context().autocommit_block():
+            op.execute("ALTER TYPE enrollmentstatus ADD VALUE IF NOT EXISTS 'waitlisted'")
+
+    # Elsewhere the enum is a VARCHAR sized to its longest value (or a native
+    # ENUM listing them), so widen it for 'waitlisted'
+    with op.batch_alter_table('enrollments', schema=None) as batch_op:
+        batch_op.alter_column('status', existing_type=OLD_STATUS, type_=NEW_STATUS, existing_nullable=False)
+
+    with op.batch_alter_table('classes', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('waitlisted_count', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    op.execute("DELETE FROM enrollments WHERE status = 'waitlisted'")
+    with op.batch_alter_table('classes', schema=None) as batch_op:
+        batch_op.drop_column('waitlisted_count')
+    with op.batch_alter_table('enrollments', schema=None) as batch_op:
+        batch_op.alter_column('status', existing_type=NEW_STATUS, type_=OLD_STATUS, existing_nullable=False)
+    # PostgreSQL cannot drop a value from an enum type; 'waitlisted' stays unused
@@ -0,0 +1,45 @@
+"""Add waitlist positions to enrollments and the per-class waitlist tail.
+
+Revision ID: f1c7d5e2a840
+Revises: e4a8b6c2d391
+Create Date: 2026-10-17 18:05:37.912406
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1c7d5e2a840'
+down_revision = 'e4a8b6c2d391'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('enrollments', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('waitlist_position', sa.Integer(), nullable=True))
+        batch_op.create_index('ix_enrollments_class_waitlist', ['class_id', 'waitlist_position'], unique=False)
+
+    with op.batch_alter_table('classes', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('waitlist_tail', sa.Integer(), nullable=False, server_default='0'))
+
+    # Existing waitlisted rows line up in the order they were created
+    op.execute(
+        "UPDATE enrollments SET waitlist_position = (SELECT COUNT(*) FROM enrollments AS earlier "
+        "WHERE earlier.class_id = enrollments.class_id AND earlier.status = 'waitlisted' "
+        "AND earlier.id <= enrollments.id) WHERE status = 'waitlisted'"
+    )
+    op.execute(
+        "UPDATE classes SET waitlist_tail = (SELECT COUNT(*) FROM enrollments "
+        "WHERE enrollments.class_id = classes.id AND enrollments.status = 'waitlisted')"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('classes', schema=None) as batch_op:
+        batch_op.drop_column('waitlist_tail')
+
+    with op.batch_alter_table('enrollments', schema=None) as batch_op:
+        batch_op.drop_index('ix_enrollments_class_waitlist')
+        batch_op.drop_column('waitlist_position')
@@ -1,13 +1,29 @@
-from app import create_app, db
-from app.models import User, Class, Enrollment, Role, EnrollmentStatus, Semester
+"""Seed the database with demo accounts and, optionally, synthetic load-test data.
 
-app = create_app()
+    python seed.py                              # demo accounts only
+    python seed.py --students 50000 --teachers 500 --classes 2000 \\
+        --density 0.003 --grades 4 --years 2022/2023,2023/2024,2024/2025
 
-with app.app_context():
-    print("Clearing existing data...")
-    db.drop_all()
-    db.create_all()
+Synthetic users share one precomputed password hash (--password) and all
+rows are written with batched multi-row inserts, or COPY on Postgres.
+"""
+import argparse
+import csv
+import io
+import random
+import time
+from datetime import datetime, timedelta
+from itertools import islice
 
+from app import create_app, db, grade_stats, rosters
+from app.hashing import hasher
+from app.models import User, Class, Enrollment, Grade, Role, EnrollmentStatus, Semester
+
+BATCH_SIZE = 20000
+COPY_NULL = r"\N"
+
+
+def seed_demo():
     print("Seeding admin user...")
     admin = User(name="Admin User", email="admin@ustadi.local", role=Role.admin)
     admin.set_password("Admin@123")
@@ -39,6 +55,147 @@ with app.app_context():
     enrollment2 = Enrollment(student_id=student2.id, class_id=class1.id, status=EnrollmentStatus.active, semester=Semester.first_semester, academic_year="2024/2025")
     enrollment3 = Enrollment(student_id=student1.id, class_id=class2.id, status=EnrollmentStatus.active, semester=Semester.first_semester, academic_year="2024/2025")
     db.session.add_all([enrollment1, enrollment2, enrollment3])
+    db.session.flush()
+    rosters.refresh()
 
     db.session.commit()
-    print("Database seeded successfully!")
+
+
+def _next_id(model):
+    return (db.session.query(db.func.max(model.id)).scalar() or 0) + 1
+
+
+def _copy(table, rows):
+    """COPY rows into a Postgres table through the raw psycopg2 connection."""
+    columns = list(rows[0])
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([COPY_NULL if v is None else v.name if hasattr(v, "name") else v for v in row.values()])
+    buffer.seek(0)
+    cursor = db.session.connection().connection.cursor()
+    # CSV COPY reads an empty field as NULL by default, which would null out empty descriptions and remarks
+    cursor.copy_expert(
+        f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL}')", buffer
+    )
+
+
+def bulk_insert(model, rows):
+    """Write an iterable of row dicts in batches. Returns the number of rows."""
+    table = model.__table__
+    postgres = db.engine.dialect.name == "postgresql"
+    rows = iter(rows)
+    total = 0
+    while True:
+        batch = list(islice(rows, BATCH_SIZE))
+        if not batch:
+            break
+        if postgres:
+            _copy(table, batch)
+        else:
+            db.session.execute(table.insert(), batch)
+        total += len(batch)
+    if postgres and total:
+        # Explicit ids were written, so move the serial sequence past them
+        db.session.execute(db.text(
+            f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), (SELECT MAX(id) FROM {table.name}))"
+        ))
+    return total
+
+
+def seed_synthetic(students, teachers, classes, density, grades_per_enrollment, years,
+                   password="Synthetic@123", seed=42):
+    """Generate a school of the given shape. Every student takes about
+    density * classes classes in each academic year."""
+    rng = random.Random(seed)
+    # With the configured HASH_METHOD, so logins do not rehash every synthetic user
+    password_hash = hasher.hash(password)
+    now = datetime.utcnow()
+    started = time.perf_counter()
+
+    first_user = _next_id(User)
+    teacher_ids = list(range(first_user, first_user + teachers))
+    student_ids = list(range(first_user + teachers, first_user + teachers + students))
+
+    def users():
+        for uid in teacher_ids:
+            yield {"id": uid, "name": f"Teacher {uid}", "email": f"teacher{uid}@synthetic.local",
+                   "password_hash": password_hash, "role": Role.teacher, "created_at": now}
+        for uid in student_ids:
+            yield {"id": uid, "name": f"Student {uid}", "email": f"student{uid}@synthetic.local",
+                   "password_hash": password_hash, "role": Role.student, "created_at": now}
+
+    print(f"Seeding {bulk_insert(User, users())} synthetic users...")
+
+    first_class = _next_id(Class)
+    class_ids = list(range(first_class, first_class + classes))
+
+    def class_rows():
+        for cid in class_ids:
+            yield {"id": cid, "name": f"Class {cid}", "description": "",
+                   "teacher_id": rng.choice(teacher_ids) if teacher_ids else None}
+
+    print(f"Seeding {bulk_insert(Class, class_rows())} synthetic classes...")
+
+    per_year = max(1, round(density * classes))
+    # A student takes each class at most once (uq_enrollments_student_class)
+    if per_year * len(years) > classes:
+        raise ValueError("density * classes * number of years exceeds the number of classes")
+    semesters = list(Semester)
+    first_enrollment = _next_id(Enrollment)
+    enrolled_on = [now - timedelta(days=365 * (len(years) - 1 - i)) for i in range(len(years))]
+
+    def enrollments():
+        eid = first_enrollment
+        for student_id in student_ids:
+            taken = rng.sample(class_ids, per_year * len(years))
+            for i, class_id in enumerate(taken):
+                year = i // per_year
+                yield {"id": eid, "student_id": student_id, "class_id": class_id,
+                       "status": EnrollmentStatus.active, "enrollment_date": enrolled_on[year],
+                       "semester": rng.choice(semesters), "academic_year": years[year]}
+                eid += 1
+
+    enrollment_count = bulk_insert(Enrollment, enrollments())
+    print(f"Seeding {enrollment_count} synthetic enrollments...")
+
+    def grades():
+        for eid in range(first_enrollment, first_enrollment + enrollment_count):
+            for _ in range(grades_per_enrollment):
+                yield {"enrollment_id": eid, "score": round(rng.uniform(35, 100), 1), "remarks": ""}
+
+    print(f"Seeding {bulk_insert(Grade, grades())} synthetic grades...")
+    db.session.commit()
+    grade_stats.rebuild()
+    rosters.refresh()
+    db.session.commit()
+    print(f"Synthetic data written in {time.perf_counter() - started:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reset and seed the database.")
+    parser.add_argument("--students", type=int, default=0)
+    parser.add_argument("--teachers", type=int, default=0)
+    parser.add_argument("--classes", type=int, default=0)
+    parser.add_argument("--density", type=float, default=0.005,
+                        help="fraction of all classes each student takes per academic year")
+    parser.add_argument("--grades", type=int, default=3, help="grades per enrollment")
+    parser.add_argument("--years", default="2024/2025", help="comma-separated academic years")
+    parser.add_argument("--password", default="Synthetic@123", help="password of every synthetic user")
+    parser.add_argument("--seed", type=int, default=42, help="random seed")
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        print("Clearing existing data...")
+        db.drop_all()
+        db.create_all()
+        seed_demo()
+        if args.students or args.teachers or args.classes:
+            seed_synthetic(args.students, args.teachers, args.classes, args.density, args.grades,
+                           args.years.split(","), password=args.password, seed=args.seed)
+        print("Database seeded successfully!")
+
+
+if __name__ == "__main__":
+    main()